@@ -1,10 +1,21 @@
 from django.contrib import admin
 
-from .models import Dataset
+from .models import Dataset, IngestionJob, RetentionPolicy
 
 
 @admin.register(Dataset)
 class DatasetAdmin(admin.ModelAdmin):
-	list_display = ('id', 'original_filename', 'uploaded_at', 'row_count')
+	list_display = ('id', 'original_filename', 'uploaded_at', 'row_count', 'size_bytes')
 	list_filter = ('uploaded_at',)
 	search_fields = ('original_filename',)
+
+
+@admin.register(IngestionJob)
+class IngestionJobAdmin(admin.ModelAdmin):
+	list_display = ('id', 'original_filename', 'status', 'rows_processed', 'created_at', 'finished_at')
+	list_filter = ('status',)
+
+
+@admin.register(RetentionPolicy)
+class RetentionPolicyAdmin(admin.ModelAdmin):
+	list_display = ('user', 'max_count', 'max_age_days', 'max_bytes')
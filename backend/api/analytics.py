@@ -1,10 +1,22 @@
 from __future__ import annotations
 
+import io
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Any
+from typing import IO, Any, Callable, Iterator
 
+import numpy as np
 import pandas as pd
 
+from .columnar import SidecarWriter, concat_sidecars
+from .compression import detect_encoding
+from .metrics import record_span, span
+from .stats import FrameStats
+
 
 class CsvValidationError(ValueError):
     pass
@@ -51,57 +63,356 @@ def _build_column_map(actual_columns: list[str]) -> dict[str, str]:
     return mapping
 
 
+CLEANED_COLUMNS = ['equipment_name', 'type', 'flowrate', 'pressure', 'temperature']
+NUMERIC_COLUMNS = ['flowrate', 'pressure', 'temperature']
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
 @dataclass(frozen=True)
 class ParsedDataset:
     df: pd.DataFrame
     summary: dict[str, Any]
 
+    @property
+    def type_categories(self) -> list[str]:
+        return [str(c) for c in self.df['type'].cat.categories]
+
+    @property
+    def type_codes(self) -> np.ndarray:
+        """Per-row index into ``type_categories``."""
+        return self.df['type'].cat.codes.to_numpy()
+
+
+@dataclass(frozen=True)
+class StreamedDataset:
+    row_count: int
+    summary: dict[str, Any]
+
+
+UNKNOWN_TYPE = 'Unknown'
+
+
+def _normalize_type_labels(labels: pd.Index) -> pd.Index:
+    labels = labels.where(labels != 'nan', '').str.strip()
+    return labels.where(labels != '', UNKNOWN_TYPE)
+
+
+def _categorical(
+    series: pd.Series,
+    normalize: Callable[[pd.Index], pd.Index] | None = None,
+    missing: str | None = None,
+) -> pd.Series:
+    """Factorize ``series`` and clean only its distinct values.
+
+    String work (``str()``, stripping) runs once per distinct label instead of
+    once per row; labels that collapse to the same text share one category.
+    Missing values become ``missing``, or stay null when it is None.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    labels = pd.Index(uniques, dtype=object).astype(str)
+    if normalize is not None:
+        labels = normalize(labels)
+    if missing is not None:
+        labels = labels.append(pd.Index([missing]))
+        codes = np.where(codes < 0, len(labels) - 1, codes)
+
+    remap, categories = pd.factorize(labels)
+    codes = np.where(codes >= 0, remap[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories), index=series.index)
+
+
+def _clean_frame(df: pd.DataFrame, column_map: dict[str, str]) -> pd.DataFrame:
+    # Numeric columns are always float64 so that every chunk of a streamed file
+    # shares the same schema, whatever pandas inferred for that chunk.
+    return pd.DataFrame({
+        # A blank name reads as 'nan', as it did when the column was cast with
+        # astype(str); stored rows and filters depend on that text.
+        'equipment_name': _categorical(df[column_map['equipment_name']], missing='nan'),
+        'type': _categorical(df[column_map['type']], _normalize_type_labels, missing=UNKNOWN_TYPE),
+        'flowrate': pd.to_numeric(df[column_map['flowrate']], errors='coerce').astype('float64'),
+        'pressure': pd.to_numeric(df[column_map['pressure']], errors='coerce').astype('float64'),
+        'temperature': pd.to_numeric(df[column_map['temperature']], errors='coerce').astype('float64'),
+    })
+
+
+class SummaryAccumulator:
+    """Folds cleaned frames into mergeable partial statistics so a summary can
+    be built without holding the whole dataset in memory."""
+
+    def __init__(self) -> None:
+        self.total_count = 0
+        self.type_counts: dict[str, int] = {}
+        self.stats = FrameStats()
+
+    def add(self, cleaned: pd.DataFrame) -> None:
+        types = cleaned['type']
+        self.total_count += int(len(cleaned))
+        counts = np.bincount(types.cat.codes.to_numpy(), minlength=len(types.cat.categories))
+        for key, value in zip(types.cat.categories, counts):
+            if value:
+                key = str(key)
+                self.type_counts[key] = self.type_counts.get(key, 0) + int(value)
+        self.stats = self.stats.merge(FrameStats.from_frame(cleaned, NUMERIC_COLUMNS, types))
+
+    def merge(self, other: SummaryAccumulator) -> None:
+        self.total_count += other.total_count
+        for key, value in other.type_counts.items():
+            self.type_counts[key] = self.type_counts.get(key, 0) + value
+        self.stats = self.stats.merge(other.stats)
+
+    @classmethod
+    def from_summary(cls, summary: dict[str, Any]) -> SummaryAccumulator:
+        """Resume accumulating from a stored ``summary()``."""
+        accumulator = cls()
+        accumulator.total_count = int(summary.get('total_count') or 0)
+        accumulator.type_counts = dict(summary.get('type_distribution') or {})
+        accumulator.stats = FrameStats.from_dict(summary.get('statistics') or {})
+        return accumulator
+
+    def _mean(self, col: str) -> float | None:
+        stats = self.stats.columns.get(col)
+        if stats is None or not stats.count:
+            return None
+        return stats.mean
+
+    def summary(self) -> dict[str, Any]:
+        type_distribution = sorted(self.type_counts.items(), key=lambda item: item[1], reverse=True)
+        return {
+            'total_count': self.total_count,
+            'averages': {col: self._mean(col) for col in NUMERIC_COLUMNS},
+            'type_distribution': dict(type_distribution),
+            'columns': list(CLEANED_COLUMNS),
+            'statistics': self.stats.to_dict(),
+        }
+
+
+def _label_dtypes(source: str | IO[bytes], header: bytes | None = None) -> dict[str, type]:
+    """Read the name and type columns as text, so their values never depend
+    on what pandas infers for a whole file or for one chunk ('1' vs '1.0').
+
+    ``header`` is the header line of a ``source`` that cannot be rewound.
+    """
+    try:
+        if header is not None:
+            columns = pd.read_csv(io.BytesIO(header), nrows=0).columns
+        elif isinstance(source, str):
+            columns = pd.read_csv(source, nrows=0, compression=detect_encoding(source)).columns
+        else:
+            position = source.tell()
+            columns = pd.read_csv(source, nrows=0, compression=detect_encoding(source)).columns
+            source.seek(position)
+        column_map = _build_column_map(list(columns))
+    except Exception:
+        # The full read reports what is wrong with the file.
+        return {}
+    return {column_map['equipment_name']: str, column_map['type']: str}
+
 
 def parse_and_analyze_csv(file_path: str) -> ParsedDataset:
+    with span('parse'):
+        try:
+            df = pd.read_csv(file_path, compression=detect_encoding(file_path), dtype=_label_dtypes(file_path))
+        except Exception as exc:  # pragma: no cover
+            raise CsvValidationError(f"Unable to read CSV: {exc}") from exc
+
+        if df.empty:
+            raise CsvValidationError("CSV is empty.")
+
+        column_map = _build_column_map(list(df.columns))
+        cleaned = _clean_frame(df, column_map)
+
+    with span('summary'):
+        accumulator = SummaryAccumulator()
+        accumulator.add(cleaned)
+        summary = accumulator.summary()
+    return ParsedDataset(df=cleaned, summary=summary)
+
+
+def iter_cleaned_chunks(
+    file_path: str | IO[bytes],
+    *,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    header: bytes | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield cleaned frames of at most ``chunksize`` rows. Pass ``header`` when
+    ``file_path`` is a stream that cannot be rewound."""
     try:
-        df = pd.read_csv(file_path)
+        reader = pd.read_csv(
+            file_path,
+            chunksize=chunksize,
+            compression=detect_encoding(file_path),
+            dtype=_label_dtypes(file_path, header),
+        )
     except Exception as exc:  # pragma: no cover
         raise CsvValidationError(f"Unable to read CSV: {exc}") from exc
 
-    if df.empty:
+    column_map: dict[str, str] | None = None
+    with reader:
+        while True:
+            # Timed per chunk: a span cannot stay open across the yield.
+            start = time.perf_counter()
+            try:
+                chunk = next(reader)
+            except StopIteration:
+                return
+            except Exception as exc:
+                raise CsvValidationError(f"Unable to read CSV: {exc}") from exc
+
+            if column_map is None:
+                column_map = _build_column_map(list(chunk.columns))
+            cleaned = _clean_frame(chunk, column_map)
+            record_span('parse', time.perf_counter() - start)
+            yield cleaned
+
+
+def stream_analyze_csv(
+    file_path: str | IO[bytes],
+    *,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    on_chunk: Callable[[pd.DataFrame], None] | None = None,
+) -> StreamedDataset:
+    """Summarize a CSV chunk by chunk; peak memory is bounded by ``chunksize``.
+
+    ``on_chunk`` receives every cleaned chunk, e.g. to append it to the
+    columnar sidecar, so callers never need the full frame either.
+    """
+    accumulator = SummaryAccumulator()
+    for cleaned in iter_cleaned_chunks(file_path, chunksize=chunksize):
+        with span('summary'):
+            accumulator.add(cleaned)
+        if on_chunk is not None:
+            on_chunk(cleaned)
+
+    if accumulator.total_count == 0:
         raise CsvValidationError("CSV is empty.")
 
-    column_map = _build_column_map(list(df.columns))
+    with span('summary'):
+        summary = accumulator.summary()
+    return StreamedDataset(row_count=accumulator.total_count, summary=summary)
 
-    cleaned = pd.DataFrame({
-        'equipment_name': df[column_map['equipment_name']].astype(str),
-        'type': df[column_map['type']].astype(str),
-        'flowrate': pd.to_numeric(df[column_map['flowrate']], errors='coerce'),
-        'pressure': pd.to_numeric(df[column_map['pressure']], errors='coerce'),
-        'temperature': pd.to_numeric(df[column_map['temperature']], errors='coerce'),
-    })
 
-    total_count = int(len(cleaned))
-    type_distribution = (
-        cleaned['type']
-        .fillna('')
-        .replace({'nan': ''})
-        .apply(lambda s: s.strip() if isinstance(s, str) else str(s))
-        .replace({'': 'Unknown'})
-        .value_counts(dropna=False)
-        .to_dict()
-    )
-
-    def _mean(series: pd.Series) -> float | None:
-        value = series.mean(skipna=True)
-        if pd.isna(value):
-            return None
-        return float(value)
-
-    summary = {
-        'total_count': total_count,
-        'averages': {
-            'flowrate': _mean(cleaned['flowrate']),
-            'pressure': _mean(cleaned['pressure']),
-            'temperature': _mean(cleaned['temperature']),
-        },
-        'type_distribution': {str(k): int(v) for k, v in type_distribution.items()},
-        'columns': ['equipment_name', 'type', 'flowrate', 'pressure', 'temperature'],
-    }
+class _ByteRangeReader(io.RawIOBase):
+    """Presents the CSV header followed by ``[start, end)`` of a file as one
+    stream, so pandas can parse a slice of a large file on its own."""
 
-    return ParsedDataset(df=cleaned, summary=summary)
+    def __init__(self, file_path: str, header: bytes, start: int, end: int) -> None:
+        super().__init__()
+        self._handle = open(file_path, 'rb')
+        self._handle.seek(start)
+        self._header = header
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._header:
+            n = min(len(buffer), len(self._header))
+            buffer[:n] = self._header[:n]
+            self._header = self._header[n:]
+            return n
+        n = min(len(buffer), self._remaining)
+        if n <= 0:
+            return 0
+        data = self._handle.read(n)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self) -> None:
+        self._handle.close()
+        super().close()
+
+
+def split_line_ranges(file_path: str, parts: int) -> tuple[bytes, list[tuple[int, int]]]:
+    """Return the header line and up to ``parts`` byte ranges ending on line
+    boundaries. Quoted fields spanning lines are not supported."""
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as handle:
+        header = handle.readline()
+        body_start = handle.tell()
+
+        boundaries = [body_start]
+        for i in range(1, parts):
+            target = body_start + (size - body_start) * i // parts
+            if target <= boundaries[-1]:
+                continue
+            handle.seek(target - 1)
+            handle.readline()
+            boundary = handle.tell()
+            if boundary >= size:
+                break
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+        boundaries.append(size)
+
+    return header, list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def analyze_byte_range(
+    file_path: str,
+    header: bytes,
+    start: int,
+    end: int,
+    chunksize: int,
+    part_path: str | None,
+) -> SummaryAccumulator:
+    """Summarize ``header`` plus bytes ``[start, end)`` of a CSV, writing the
+    cleaned rows to a sidecar at ``part_path`` when given."""
+    accumulator = SummaryAccumulator()
+    with io.BufferedReader(_ByteRangeReader(file_path, header, start, end)) as stream:
+        if part_path is None:
+            for cleaned in iter_cleaned_chunks(stream, chunksize=chunksize, header=header):
+                accumulator.add(cleaned)
+        else:
+            with SidecarWriter(part_path) as sidecar:
+                for cleaned in iter_cleaned_chunks(stream, chunksize=chunksize, header=header):
+                    accumulator.add(cleaned)
+                    sidecar.write(cleaned)
+    return accumulator
+
+
+def parallel_analyze_csv(
+    file_path: str,
+    *,
+    workers: int,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    sidecar: str | None = None,
+) -> StreamedDataset:
+    """Summarize a CSV by parsing line-aligned byte ranges in a process pool.
+
+    Each worker streams its range in chunks and returns a mergeable
+    SummaryAccumulator. When ``sidecar`` is given, workers also write their
+    cleaned rows to numbered part files that are stitched into ``sidecar``
+    in file order afterwards.
+    """
+    header, ranges = split_line_ranges(file_path, workers)
+    # Two jobs for the same bytes may parse at once; each run gets its own
+    # part names so neither stitches or removes the other's parts.
+    run = uuid.uuid4().hex
+    part_paths = [f"{sidecar}.{run}.part{i}" if sidecar else None for i in range(len(ranges))]
+
+    # Spawned workers only import pandas and this module; forking a Django
+    # process that may hold DB connections and threads is avoided.
+    context = multiprocessing.get_context('spawn')
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=context) as pool:
+            futures = [
+                pool.submit(analyze_byte_range, file_path, header, start, end, chunksize, part_path)
+                for (start, end), part_path in zip(ranges, part_paths)
+            ]
+            accumulator = SummaryAccumulator()
+            for future in futures:
+                accumulator.merge(future.result())
+
+        if accumulator.total_count == 0:
+            raise CsvValidationError("CSV is empty.")
+        if sidecar:
+            concat_sidecars(part_paths, sidecar)
+    finally:
+        for part_path in part_paths:
+            if part_path and os.path.exists(part_path):
+                os.remove(part_path)
+
+    return StreamedDataset(row_count=accumulator.total_count, summary=accumulator.summary())
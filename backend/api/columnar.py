@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+SIDECAR_SUFFIX = '.arrow'
+
+
+def sidecar_path(csv_path: str) -> str:
+    return f"{csv_path}{SIDECAR_SUFFIX}"
+
+
+def temp_path_for(path: str) -> str:
+    """A new, uniquely named file next to ``path`` to build it in.
+
+    Writers that race to build the same file each get their own; a shared
+    temp name would let one truncate the file another has just renamed into
+    place and readers have memory-mapped.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+    os.close(fd)
+    return tmp_path
+
+
+class SidecarWriter:
+    """Appends cleaned frames to an Arrow IPC file as record batches.
+
+    Data goes to a temporary file that replaces ``path`` only when the block
+    exits cleanly, so readers never see a half-written sidecar.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._tmp_path: str | None = None
+        self._sink: pa.OSFile | None = None
+        self._writer: pa.ipc.RecordBatchFileWriter | None = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        self.write_table(pa.Table.from_pandas(df, preserve_index=False))
+
+    @staticmethod
+    def _decode_dictionaries(table: pa.Table) -> pa.Table:
+        # Each chunk's categoricals carry their own dictionary, which the IPC
+        # file format cannot replace mid-file, so store plain strings.
+        for i, field in enumerate(table.schema):
+            if pa.types.is_dictionary(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+        return table
+
+    def write_table(self, table: pa.Table) -> None:
+        table = self._decode_dictionaries(table).replace_schema_metadata(None)
+        if self._writer is None:
+            self._tmp_path = temp_path_for(self.path)
+            self._sink = pa.OSFile(self._tmp_path, 'wb')
+            self._writer = pa.ipc.new_file(self._sink, table.schema)
+        self._writer.write_table(table)
+
+    def __enter__(self) -> SidecarWriter:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+        if exc_type is not None:
+            if self._tmp_path is not None and os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+            return
+        if self._writer is not None:
+            os.replace(self._tmp_path, self.path)
+
+
+def write_sidecar(df: pd.DataFrame, path: str) -> None:
+    with SidecarWriter(path) as writer:
+        writer.write(df)
+
+
+def sidecar_version(path: str) -> str:
+    """Changes whenever the sidecar is rewritten."""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def open_sidecar(path: str) -> pa.Table:
+    # Uncompressed Arrow IPC files can be memory-mapped, so the returned table
+    # references the page cache instead of copying column data into the heap.
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+INDEX_SUFFIX = '.idx'
+
+
+def index_path(path: str, column: str) -> str:
+    return f"{path}.{column}{INDEX_SUFFIX}"
+
+
+def derived_paths(csv_path: str, columns: list[str]) -> list[str]:
+    """Every file kept next to an uploaded CSV: its sidecar and column indexes."""
+    path = sidecar_path(csv_path)
+    return [path] + [index_path(path, column) for column in columns]
+
+
+@dataclass(frozen=True)
+class ColumnIndex:
+    """Row ids of a sidecar ordered by one column (nulls last).
+
+    ``values`` holds the matching sorted non-null values for numeric columns,
+    so range predicates resolve to a slice of ``order`` by binary search.
+    """
+    order: np.ndarray
+    values: np.ndarray | None
+    valid_count: int
+
+    def range_slice(
+        self,
+        lower: float | None,
+        upper: float | None,
+        *,
+        lower_inclusive: bool = True,
+        upper_inclusive: bool = True,
+    ) -> slice:
+        start = 0
+        end = len(self.values)
+        if lower is not None:
+            start = int(np.searchsorted(self.values, lower, side='left' if lower_inclusive else 'right'))
+        if upper is not None:
+            end = int(np.searchsorted(self.values, upper, side='right' if upper_inclusive else 'left'))
+        return slice(start, max(start, end))
+
+
+def _build_index(table: pa.Table, column: str, path: str) -> None:
+    order = pc.sort_indices(table, sort_keys=[(column, 'ascending')])
+    arrays = {'row': order}
+    if pa.types.is_floating(table.schema.field(column).type) or pa.types.is_integer(table.schema.field(column).type):
+        arrays['value'] = pc.take(table.column(column), order)
+
+    index = pa.table(arrays, metadata={'null_count': str(table.column(column).null_count)})
+    # Requests may build the same index at once while others map it.
+    tmp_path = temp_path_for(path)
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, index.schema) as writer:
+                writer.write_table(index)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_index(table: pa.Table, sidecar: str, column: str) -> ColumnIndex:
+    """Open the on-disk sort index of ``column``, building it on first use."""
+    path = index_path(sidecar, column)
+    if not os.path.exists(path):
+        _build_index(table, column, path)
+
+    index = open_sidecar(path)
+    order = index.column('row').combine_chunks().to_numpy()
+    valid_count = len(order) - int(index.schema.metadata[b'null_count'])
+    values = None
+    if 'value' in index.column_names:
+        values = index.column('value').combine_chunks().slice(0, valid_count).to_numpy()
+    return ColumnIndex(order=order, values=values, valid_count=valid_count)
+
+
+def concat_sidecars(part_paths: list[str], path: str) -> None:
+    """Stitch partial sidecars into ``path`` batch by batch and remove them."""
+    with SidecarWriter(path) as writer:
+        for part_path in part_paths:
+            if os.path.exists(part_path):
+                writer.write_table(open_sidecar(part_path))
+    for part_path in part_paths:
+        if os.path.exists(part_path):
+            os.remove(part_path)
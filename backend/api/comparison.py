@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Any
+
+from .analytics import NUMERIC_COLUMNS
+from .stats import FrameStats
+
+
+def _column_count(summary: dict[str, Any], column: str) -> int:
+    # Summaries stored before the statistics block existed only know their
+    # row count, which is the best available weight for their averages.
+    stats = ((summary.get('statistics') or {}).get('columns') or {}).get(column)
+    if stats is not None:
+        return int(stats.get('count') or 0)
+    return int(summary.get('total_count') or 0)
+
+
+def _type_means(summary: dict[str, Any]) -> dict[str, dict[str, float | None]]:
+    by_type = (summary.get('statistics') or {}).get('by_type') or {}
+    return {
+        equipment_type: {col: (columns.get(col) or {}).get('mean') for col in NUMERIC_COLUMNS}
+        for equipment_type, columns in by_type.items()
+    }
+
+
+def _difference(current: float | None, baseline: float | None) -> float | None:
+    if current is None or baseline is None:
+        return None
+    return current - baseline
+
+
+def combine_summaries(summaries: list[dict[str, Any]]) -> dict[str, Any]:
+    """Merge stored dataset summaries as if their rows had been parsed together."""
+    type_counts: Counter[str] = Counter()
+    for summary in summaries:
+        type_counts.update(summary.get('type_distribution') or {})
+    stats = FrameStats.merge_all(FrameStats.from_dict(summary.get('statistics') or {}) for summary in summaries)
+
+    averages = {}
+    for col in NUMERIC_COLUMNS:
+        weighted = [
+            (summary['averages'][col], _column_count(summary, col))
+            for summary in summaries
+            if (summary.get('averages') or {}).get(col) is not None
+        ]
+        weight = sum(w for _, w in weighted)
+        averages[col] = sum(value * w for value, w in weighted) / weight if weight else None
+
+    return {
+        'total_count': sum(int(summary.get('total_count') or 0) for summary in summaries),
+        'averages': averages,
+        'type_distribution': dict(type_counts.most_common()),
+        'statistics': stats.to_dict(),
+    }
+
+
+def compare_summaries(summaries: list[dict[str, Any]], baseline: int = 0) -> list[dict[str, Any]]:
+    """Per-summary counts and means with their differences from ``summaries[baseline]``.
+
+    Types missing from one side count as zero rows and have no mean delta.
+    """
+    base = summaries[baseline]
+    base_distribution = base.get('type_distribution') or {}
+    base_averages = base.get('averages') or {}
+    base_type_means = _type_means(base)
+
+    entries = []
+    for summary in summaries:
+        distribution = summary.get('type_distribution') or {}
+        averages = summary.get('averages') or {}
+        type_means = _type_means(summary)
+        entries.append({
+            'total_count': int(summary.get('total_count') or 0),
+            'averages': averages,
+            'type_distribution': distribution,
+            'type_means': type_means,
+            'delta': {
+                'total_count': int(summary.get('total_count') or 0) - int(base.get('total_count') or 0),
+                'averages': {
+                    col: _difference(averages.get(col), base_averages.get(col)) for col in NUMERIC_COLUMNS
+                },
+                'type_distribution': {
+                    equipment_type: distribution.get(equipment_type, 0) - base_distribution.get(equipment_type, 0)
+                    for equipment_type in {**base_distribution, **distribution}
+                },
+                'type_means': {
+                    equipment_type: {
+                        col: _difference(means.get(col), base_type_means.get(equipment_type, {}).get(col))
+                        for col in NUMERIC_COLUMNS
+                    }
+                    for equipment_type, means in type_means.items()
+                },
+            },
+        })
+    return entries
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import gzip
+from typing import IO, BinaryIO, Iterator
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Stored file suffix per encoding; the names double as pandas' compression
+# argument and the HTTP Content-Encoding tokens.
+ENCODING_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+
+def sniff_encoding(head: bytes) -> str | None:
+    """Content encoding from a file's first bytes, or None for plain text."""
+    if head.startswith(GZIP_MAGIC):
+        return 'gzip'
+    if head.startswith(ZSTD_MAGIC):
+        return 'zstd'
+    return None
+
+
+def detect_encoding(source: str | IO[bytes]) -> str | None:
+    """Sniff a path or a seekable binary handle without moving it."""
+    if isinstance(source, str):
+        with open(source, 'rb') as handle:
+            return sniff_encoding(handle.read(4))
+    if not (hasattr(source, 'seekable') and source.seekable()):
+        return None
+    position = source.tell()
+    head = source.read(4)
+    source.seek(position)
+    return sniff_encoding(head)
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd-compressed files need the 'zstandard' package.") from None
+    return zstandard
+
+
+def open_decompressed(path: str) -> BinaryIO:
+    """Open a stored CSV for reading as plain bytes, whatever its encoding."""
+    encoding = detect_encoding(path)
+    if encoding == 'gzip':
+        return gzip.open(path, 'rb')
+    if encoding == 'zstd':
+        return _zstandard().ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, 'rb')
+
+
+def compressing_writer(raw: BinaryIO, encoding: str, level: int) -> BinaryIO:
+    """Wrap ``raw`` so writes are compressed; closing the wrapper flushes the
+    trailer but leaves ``raw`` open."""
+    if encoding == 'gzip':
+        # No name or timestamp in the header, so equal input gives equal bytes.
+        return gzip.GzipFile(filename='', mode='wb', fileobj=raw, compresslevel=level, mtime=0)
+    if encoding == 'zstd':
+        return _zstandard().ZstdCompressor(level=level).stream_writer(raw, closefd=False)
+    raise ValueError(f"Unknown encoding: {encoding}")
+
+
+def accepts_encoding(accept_encoding: str, encoding: str) -> bool:
+    """Whether an Accept-Encoding header admits ``encoding`` (q=0 refuses)."""
+    for item in accept_encoding.split(','):
+        token, _, params = item.partition(';')
+        if token.strip().lower() not in (encoding, '*'):
+            continue
+        quality = params.strip().lower()
+        if quality.startswith('q='):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def strip_encoding_suffix(filename: str) -> str:
+    for suffix in ENCODING_SUFFIXES.values():
+        if filename.lower().endswith(suffix):
+            return filename[: -len(suffix)]
+    return filename
+
+
+def iter_file(handle: BinaryIO, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+    with handle:
+        while chunk := handle.read(chunk_size):
+            yield chunk
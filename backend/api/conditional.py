@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import os
+import re
+from datetime import datetime
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+READ_SIZE = 1 << 16
+
+
+def dataset_etag(dataset, *parts: str) -> str:
+	"""Validator for one representation of ``dataset``.
+
+	Datasets only change by being renamed, so the content hash and
+	``updated_at`` version every representation; ``parts`` add whatever else
+	it depends on (a sidecar version, a report template, an encoding).
+	"""
+	content = dataset.content_hash[:16] or f"{dataset.uploaded_at.timestamp():.0f}"
+	revision = f"{int(dataset.updated_at.timestamp() * 1_000_000):x}"
+	return '"' + '-'.join([str(dataset.id), content, revision, *parts]) + '"'
+
+
+def set_validators(response, etag: str, last_modified: datetime | None = None):
+	response['ETag'] = etag
+	if last_modified is not None:
+		response['Last-Modified'] = http_date(last_modified.timestamp())
+	# Responses are per-user; caches may keep them but must revalidate.
+	patch_cache_control(response, private=True, no_cache=True)
+	return response
+
+
+def conditional_response(request, etag: str, last_modified: datetime | None = None):
+	"""The 304 or 412 answer to the request's preconditions, or None when the
+	full response should be built."""
+	timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+	response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+	if response is None:
+		return None
+	return set_validators(response, etag, last_modified)
+
+
+def _requested_range(request, size: int, etag: str, last_modified: datetime | None) -> tuple[int, int] | None:
+	# A single "bytes=" range, as (first, last) inclusive. Multiple ranges
+	# and malformed headers are ignored, which RFC 9110 allows.
+	match = RANGE_RE.match(request.META.get('HTTP_RANGE', '').strip())
+	if not match or not any(match.groups()):
+		return None
+
+	if_range = request.META.get('HTTP_IF_RANGE', '').strip()
+	if if_range:
+		if if_range.startswith(('"', 'W/')):
+			# Only the current ETag keeps the range valid.
+			if if_range != etag:
+				return None
+		elif last_modified is None or parse_http_date_safe(if_range) != int(last_modified.timestamp()):
+			return None
+
+	first, last = match.groups()
+	if not first:
+		# Suffix range: the final ``last`` bytes.
+		return max(0, size - int(last)), size - 1
+	return int(first), min(int(last), size - 1) if last else size - 1
+
+
+def _iter_range(path: str, start: int, length: int):
+	with open(path, 'rb') as handle:
+		handle.seek(start)
+		while length > 0:
+			data = handle.read(min(READ_SIZE, length))
+			if not data:
+				return
+			length -= len(data)
+			yield data
+
+
+def ranged_file_response(
+	request,
+	path: str,
+	*,
+	filename: str,
+	content_type: str,
+	etag: str,
+	last_modified: datetime | None = None,
+):
+	"""Serve ``path`` as an attachment, honouring a single-range ``Range``."""
+	size = os.path.getsize(path)
+	byte_range = _requested_range(request, size, etag, last_modified)
+	if byte_range is None:
+		response = FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type=content_type)
+	elif byte_range[0] >= size or byte_range[0] > byte_range[1]:
+		response = HttpResponse(status=416)
+		response['Content-Range'] = f"bytes */{size}"
+	else:
+		first, last = byte_range
+		response = StreamingHttpResponse(_iter_range(path, first, last - first + 1), status=206, content_type=content_type)
+		response['Content-Range'] = f"bytes {first}-{last}/{size}"
+		response['Content-Length'] = str(last - first + 1)
+		response['Content-Disposition'] = content_disposition_header(True, filename)
+	response['Accept-Ranges'] = 'bytes'
+	return set_validators(response, etag, last_modified)
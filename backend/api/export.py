@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from .query import Selection
+
+
+EXPORT_BATCH_ROWS = 50_000
+
+# format -> (content type, file extension)
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+}
+
+
+class ChunkSink:
+    """Write-only file object that hands back whatever was written so far."""
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _batches(table: pa.Table, selection: Selection, columns: tuple[str, ...], batch_rows: int) -> Iterator[pa.Table]:
+    for start in range(0, selection.total, batch_rows):
+        yield selection.window(table, start, batch_rows, columns)
+
+
+def iter_export(
+    table: pa.Table,
+    selection: Selection,
+    columns: tuple[str, ...],
+    fmt: str,
+    *,
+    batch_rows: int = EXPORT_BATCH_ROWS,
+) -> Iterator[bytes]:
+    """Encode the selected rows batch by batch; at most one batch is decoded
+    from the sidecar at a time."""
+    schema = pa.schema([table.schema.field(c) for c in columns])
+
+    if fmt == 'ndjson':
+        for batch in _batches(table, selection, columns, batch_rows):
+            if batch.num_rows:
+                # pandas' C JSON encoder is much faster than json.dumps per row.
+                yield batch.to_pandas().to_json(orient='records', lines=True, double_precision=15).encode('utf-8')
+        return
+
+    sink = ChunkSink()
+    if fmt == 'csv':
+        writer = pa_csv.CSVWriter(sink, schema)
+    elif fmt == 'arrow':
+        writer = pa.ipc.new_stream(sink, schema)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    with writer:
+        for batch in _batches(table, selection, columns, batch_rows):
+            writer.write_table(batch)
+            yield sink.drain()
+    yield sink.drain()
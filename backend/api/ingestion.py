@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+from typing import Callable
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from .analytics import CsvValidationError, StreamedDataset, parallel_analyze_csv, stream_analyze_csv
+from .columnar import SidecarWriter, sidecar_path
+from .compression import ENCODING_SUFFIXES, compressing_writer, detect_encoding, sniff_encoding
+from .metrics import metric_lines, register_collector, span
+from .models import Dataset, IngestionJob, release_csv_file
+from .uploads import hash_file
+
+
+logger = logging.getLogger(__name__)
+
+
+BLOB_DIR = 'blobs'
+
+
+def blob_name(content_hash: str, encoding: str | None = None) -> str:
+	suffix = ENCODING_SUFFIXES[encoding] if encoding else ''
+	return f"{BLOB_DIR}/{content_hash[:2]}/{content_hash}.csv{suffix}"
+
+
+def blob_storage():
+	return IngestionJob._meta.get_field('csv_file').storage
+
+
+def existing_blob(content_hash: str) -> str | None:
+	"""Name of the stored blob for ``content_hash`` in whichever encoding it
+	was kept, so toggling DATASET_STORAGE_COMPRESSION never stores twice."""
+	storage = blob_storage()
+	for encoding in (None, *ENCODING_SUFFIXES):
+		name = blob_name(content_hash, encoding)
+		if storage.exists(name):
+			return name
+	return None
+
+
+def stored_encoding(upload_encoding: str | None) -> str | None:
+	"""Compressed uploads are kept as sent; plain ones are compressed at rest
+	when DATASET_STORAGE_COMPRESSION is set."""
+	return upload_encoding or settings.DATASET_STORAGE_COMPRESSION
+
+
+def write_compressed(chunks, path: str, encoding: str) -> None:
+	"""Compress ``chunks`` into ``path``, replacing it only once complete."""
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+	try:
+		with os.fdopen(fd, 'wb') as raw:
+			with compressing_writer(raw, encoding, settings.DATASET_STORAGE_COMPRESSION_LEVEL) as out:
+				for chunk in chunks:
+					out.write(chunk)
+		os.replace(tmp_path, path)
+	finally:
+		if os.path.exists(tmp_path):
+			os.remove(tmp_path)
+
+
+def store_blob(file_obj, content_hash: str) -> str:
+	"""Save ``file_obj`` under its content address unless that blob exists."""
+	existing = existing_blob(content_hash)
+	if existing:
+		return existing
+
+	storage = blob_storage()
+	file_obj.seek(0)
+	upload_encoding = sniff_encoding(file_obj.read(4))
+	file_obj.seek(0)
+	encoding = stored_encoding(upload_encoding)
+	name = blob_name(content_hash, encoding)
+	if encoding != upload_encoding:
+		write_compressed(file_obj.chunks(), storage.path(name), encoding)
+		return name
+	saved = storage.save(name, file_obj)
+	if saved != name:
+		# Another upload of the same bytes won the race; keep its copy.
+		storage.delete(saved)
+	return name
+
+
+def ensure_blob(job: IngestionJob, restore: Callable[[], str]) -> None:
+	"""Check that the blob ``job`` was created for is still stored.
+
+	A blob found by its content hash may be released before the job that
+	refers to it is saved. Once the job is committed, release_csv_file
+	either keeps the blob or has already moved it away; in the latter case
+	``restore`` stores the bytes again and returns their name.
+	"""
+	if not blob_storage().exists(job.csv_file.name):
+		job.csv_file = restore()
+		job.save(update_fields=['csv_file'])
+
+
+def enqueue_upload(user, file_obj, content_hash: str | None = None) -> IngestionJob:
+	content_hash = content_hash or hash_file(file_obj)
+	job = IngestionJob.objects.create(
+		user=user,
+		original_filename=getattr(file_obj, 'name', 'upload.csv'),
+		csv_file=store_blob(file_obj, content_hash),
+		content_hash=content_hash,
+		bytes_total=getattr(file_obj, 'size', 0) or 0,
+	)
+	ensure_blob(job, lambda: store_blob(file_obj, content_hash))
+	return job
+
+
+def claim_next_job() -> IngestionJob | None:
+	"""Atomically move the oldest queued job to running and return it.
+
+	The conditional UPDATE acts as the lock, so several workers can poll the
+	same table without a broker and without claiming a job twice.
+	"""
+	while True:
+		job_id = (
+			IngestionJob.objects.filter(status=IngestionJob.STATUS_QUEUED)
+			.order_by('created_at', 'id')
+			.values_list('id', flat=True)
+			.first()
+		)
+		if job_id is None:
+			return None
+		claimed = IngestionJob.objects.filter(id=job_id, status=IngestionJob.STATUS_QUEUED).update(
+			status=IngestionJob.STATUS_RUNNING,
+			started_at=timezone.now(),
+		)
+		if claimed:
+			return IngestionJob.objects.get(id=job_id)
+
+
+def run_job(job: IngestionJob) -> IngestionJob:
+	"""Parse the job's CSV, write its sidecar and publish it as a Dataset."""
+	if job.status != IngestionJob.STATUS_RUNNING:
+		job.status = IngestionJob.STATUS_RUNNING
+		job.started_at = timezone.now()
+		job.save(update_fields=['status', 'started_at'])
+
+	try:
+		with span('ingest'):
+			parsed = _reuse(job) or _parse(job)
+	except CsvValidationError as exc:
+		return _fail(job, str(exc))
+	except Exception as exc:
+		logger.exception("Ingestion job %s crashed", job.id)
+		return _fail(job, f"Ingestion failed: {exc}")
+	return publish(job, parsed)
+
+
+def publish(job: IngestionJob, parsed: StreamedDataset) -> IngestionJob:
+	"""Create the job's Dataset from an already computed summary."""
+	with transaction.atomic():
+		dataset = Dataset.objects.create(
+			user=job.user,
+			original_filename=job.original_filename,
+			csv_file=job.csv_file.name,
+			content_hash=job.content_hash,
+			row_count=parsed.row_count,
+			size_bytes=job.csv_file.size,
+			summary=parsed.summary,
+		)
+		job.dataset = dataset
+		job.status = IngestionJob.STATUS_SUCCEEDED
+		job.rows_processed = parsed.row_count
+		job.bytes_processed = job.bytes_total
+		job.finished_at = timezone.now()
+		job.save(update_fields=['dataset', 'status', 'rows_processed', 'bytes_processed', 'finished_at'])
+	return job
+
+
+def _reuse(job: IngestionJob) -> StreamedDataset | None:
+	# The same bytes were ingested before: their summary holds, and the
+	# sidecar and indexes already sit next to the shared blob.
+	if not job.content_hash:
+		return None
+	source = (
+		Dataset.objects.filter(content_hash=job.content_hash)
+		.exclude(summary={})
+		.only('row_count', 'summary')
+		.first()
+	)
+	if source is None:
+		return None
+	return StreamedDataset(row_count=source.row_count, summary=source.summary)
+
+
+def _parse(job: IngestionJob) -> StreamedDataset:
+	path = job.csv_file.path
+	workers = settings.DATASET_INGEST_PARSE_WORKERS
+	# Compressed files cannot be split into byte ranges; they stream instead.
+	if (
+		workers > 1
+		and os.path.getsize(path) >= settings.DATASET_INGEST_PARALLEL_MIN_BYTES
+		and detect_encoding(path) is None
+	):
+		return parallel_analyze_csv(
+			path,
+			workers=workers,
+			chunksize=settings.DATASET_INGEST_CHUNKSIZE,
+			sidecar=sidecar_path(path),
+		)
+
+	rows_processed = 0
+	with open(path, 'rb') as handle, SidecarWriter(sidecar_path(path)) as sidecar:
+		def on_chunk(cleaned):
+			nonlocal rows_processed
+			sidecar.write(cleaned)
+			rows_processed += len(cleaned)
+			IngestionJob.objects.filter(id=job.id).update(
+				rows_processed=rows_processed,
+				bytes_processed=handle.tell(),
+			)
+
+		return stream_analyze_csv(
+			handle,
+			chunksize=settings.DATASET_INGEST_CHUNKSIZE,
+			on_chunk=on_chunk,
+		)
+
+
+def _fail(job: IngestionJob, message: str) -> IngestionJob:
+	job.status = IngestionJob.STATUS_FAILED
+	job.error = message
+	job.finished_at = timezone.now()
+	job.save(update_fields=['status', 'error', 'finished_at'])
+	release_csv_file(job.csv_file.storage, job.csv_file.name)
+	return job
+
+
+def _queue_metrics():
+	counts = dict(
+		IngestionJob.objects.filter(status__in=[IngestionJob.STATUS_QUEUED, IngestionJob.STATUS_RUNNING])
+		.values_list('status')
+		.annotate(n=models.Count('id'))
+	)
+	yield from metric_lines(
+		'chemequip_ingest_jobs',
+		'gauge',
+		'Ingestion jobs waiting or in progress.',
+		[((('status', status),), counts.get(status, 0)) for status in (IngestionJob.STATUS_QUEUED, IngestionJob.STATUS_RUNNING)],
+	)
+
+
+register_collector(_queue_metrics)
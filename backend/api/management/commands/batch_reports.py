@@ -0,0 +1,66 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from api.models import Dataset
+from api.reports import iter_reports_zip
+
+
+class Command(BaseCommand):
+    help = "Render PDF reports for many datasets into one ZIP archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path of the ZIP file to write.")
+        parser.add_argument('--ids', type=int, nargs='+', help="Dataset ids to include.")
+        parser.add_argument('--user', help="Only include datasets uploaded by this username.")
+        parser.add_argument('--uploaded-from', help="First upload date to include (YYYY-MM-DD).")
+        parser.add_argument('--uploaded-to', help="Last upload date to include (YYYY-MM-DD).")
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processes rendering reports that are not cached yet.",
+        )
+
+    def _date(self, options, key):
+        value = options[key]
+        if not value:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"--{key.replace('_', '-')} must be a date (YYYY-MM-DD).")
+        return day
+
+    def handle(self, *args, **options):
+        datasets = Dataset.objects.select_related('user').order_by('uploaded_at')
+        if options['ids']:
+            datasets = datasets.filter(id__in=options['ids'])
+        if options['user']:
+            datasets = datasets.filter(user__username=options['user'])
+        uploaded_from = self._date(options, 'uploaded_from')
+        if uploaded_from:
+            datasets = datasets.filter(uploaded_at__date__gte=uploaded_from)
+        uploaded_to = self._date(options, 'uploaded_to')
+        if uploaded_to:
+            datasets = datasets.filter(uploaded_at__date__lte=uploaded_to)
+
+        datasets = list(datasets)
+        if not datasets:
+            raise CommandError("No datasets match.")
+
+        start = time.perf_counter()
+        tmp_path = f"{options['output']}.tmp"
+        try:
+            with open(tmp_path, 'wb') as handle:
+                for chunk in iter_reports_zip(datasets, workers=options['workers']):
+                    handle.write(chunk)
+            os.replace(tmp_path, options['output'])
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self.stdout.write(
+            f"Wrote {len(datasets)} reports to {options['output']} in {time.perf_counter() - start:.1f}s"
+        )
@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.ingestion import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Process queued dataset uploads. Run one or more alongside the web workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit.")
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.DATASET_INGEST_POLL_INTERVAL,
+            help="Seconds to sleep when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            job = run_job(job)
+            if job.status == job.STATUS_FAILED:
+                self.stderr.write(f"Job {job.id} failed: {job.error}")
+            else:
+                self.stdout.write(f"Job {job.id} ingested {job.rows_processed} rows as dataset #{job.dataset_id}")
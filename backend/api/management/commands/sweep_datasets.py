@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.resumable import expire_sessions
+from api.retention import sweep_retention
+
+
+class Command(BaseCommand):
+    help = "Delete datasets outside each user's retention (count, age, total bytes) and stale upload sessions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Sweep once and exit (e.g. from cron).")
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.DATASET_RETENTION_SWEEP_INTERVAL,
+            help="Seconds between sweeps.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = sweep_retention()
+            expired = expire_sessions()
+            self.stdout.write(f"Retention sweep removed {deleted} datasets and {expired} upload sessions")
+            if options['once']:
+                return
+            time.sleep(options['interval'])
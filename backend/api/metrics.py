@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+
+# Upper bounds in seconds; the implicit last bucket is +Inf.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def metric_lines(name: str, kind: str, help_text: str, samples) -> Iterator[str]:
+    """Exposition lines of one metric from ``(labels, value)`` samples."""
+    yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} {kind}"
+    for labels, value in samples:
+        yield f"{name}{_format_labels(tuple(labels))} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values, Prometheus style."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...], buckets=DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, seconds: float, *label_values: str) -> None:
+        slot = bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts, total = self._series.setdefault(label_values, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[slot] += 1
+            total[0] += seconds
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = {key: (list(counts), total[0]) for key, (counts, total) in self._series.items()}
+        for label_values, (counts, total) in sorted(series.items()):
+            labels = tuple(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f"{self.name}_bucket{_format_labels((*labels, ('le', le)))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {total}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        yield from self.samples()
+
+
+REQUEST_SECONDS = Histogram(
+    'chemequip_http_request_duration_seconds',
+    'Time from the first middleware to the response, by route.',
+    ('method', 'route', 'status'),
+)
+SPAN_SECONDS = Histogram(
+    'chemequip_span_duration_seconds',
+    'Time spent in named stages (view, render, db, parse, summary, pdf_render, ...).',
+    ('span',),
+)
+
+# Called on each scrape for metrics kept elsewhere (caches, queues); each
+# returns exposition lines, e.g. from ``metric_lines``.
+_collectors: list[Callable[[], Iterator[str]]] = []
+
+
+def register_collector(collector: Callable[[], Iterator[str]]) -> None:
+    _collectors.append(collector)
+
+
+class RequestTimings:
+    """Span durations of one request, summed by name, for Server-Timing."""
+
+    def __init__(self) -> None:
+        self.durations: dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def header(self) -> str:
+        return ', '.join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items())
+
+
+current_timings: contextvars.ContextVar[RequestTimings | None] = contextvars.ContextVar('current_timings', default=None)
+
+
+def record_span(name: str, seconds: float) -> None:
+    SPAN_SECONDS.observe(seconds, name)
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the block into the span histogram and the current request's
+    Server-Timing entries."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start)
+
+
+def render_metrics() -> str:
+    lines = [*REQUEST_SECONDS.render(), *SPAN_SECONDS.render()]
+    for collector in _collectors:
+        lines.extend(collector())
+    return '\n'.join(lines) + '\n'
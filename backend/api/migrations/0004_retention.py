@@ -0,0 +1,50 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_size_bytes(apps, schema_editor):
+    Dataset = apps.get_model('api', 'Dataset')
+    for dataset in Dataset.objects.exclude(csv_file='').only('id', 'csv_file').iterator():
+        try:
+            size = dataset.csv_file.size
+        except (FileNotFoundError, OSError):
+            continue
+        Dataset.objects.filter(id=dataset.id).update(size_bytes=size)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_ingestionjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RetentionPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('max_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_age_days', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_bytes', models.PositiveBigIntegerField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='size_bytes',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_size_bytes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='dataset',
+            index=models.Index(fields=['user', 'uploaded_at'], name='api_dataset_user_uploaded'),
+        ),
+        migrations.AddField(
+            model_name='retentionpolicy',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='retention_policy', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_content_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('complete', 'Complete'), ('failed', 'Failed')], default='open', max_length=16)),
+                ('original_filename', models.CharField(max_length=255)),
+                ('bytes_expected', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('content_hash', models.CharField(blank=True, default='', max_length=64)),
+                ('bytes_received', models.PositiveBigIntegerField(default=0)),
+                ('bytes_parsed', models.PositiveBigIntegerField(default=0)),
+                ('parts', models.PositiveIntegerField(default=0)),
+                ('summary', models.JSONField(default=dict)),
+                ('error', models.TextField(blank=True, default='')),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.ingestionjob')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
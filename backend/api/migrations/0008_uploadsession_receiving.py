@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_dataset_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('open', 'Open'), ('receiving', 'Receiving'), ('complete', 'Complete'), ('failed', 'Failed')], default='open', max_length=16),
+        ),
+    ]
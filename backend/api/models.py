@@ -1,6 +1,14 @@
+import os
+import uuid
+
 from django.conf import settings
 from django.db import models
 
+from .analytics import CLEANED_COLUMNS
+from .columnar import derived_paths, sidecar_path
+from .query_cache import invalidate_sidecar
+from .reports import invalidate_reports
+
 
 class Dataset(models.Model):
 	user = models.ForeignKey(
@@ -11,14 +19,25 @@ class Dataset(models.Model):
 		related_name='datasets',
 	)
 	uploaded_at = models.DateTimeField(auto_now_add=True)
+	# Bumped by renames, the only change a dataset sees after upload; with
+	# content_hash it versions the dataset for HTTP validators.
+	updated_at = models.DateTimeField(auto_now=True)
 	original_filename = models.CharField(max_length=255)
-	csv_file = models.FileField(upload_to='datasets/')
+	csv_file = models.FileField(upload_to='datasets/', db_index=True)
+	# SHA-256 of the uploaded bytes; identical uploads share one stored file.
+	content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
 
 	row_count = models.PositiveIntegerField(default=0)
+	size_bytes = models.PositiveBigIntegerField(default=0)
 	summary = models.JSONField(default=dict)
 
 	class Meta:
 		ordering = ['-uploaded_at']
+		indexes = [
+			# Serves the per-user listing and the retention sweep, both of
+			# which walk one user's datasets by upload time.
+			models.Index(fields=['user', 'uploaded_at'], name='api_dataset_user_uploaded'),
+		]
 
 	def __str__(self) -> str:
 		return f"Dataset {self.id} ({self.original_filename})"
@@ -26,6 +45,159 @@ class Dataset(models.Model):
 	def delete(self, using=None, keep_parents=False):
 		storage = self.csv_file.storage
 		name = self.csv_file.name
+		dataset_id = self.id
 		super().delete(using=using, keep_parents=keep_parents)
-		if name:
-			storage.delete(name)
+		invalidate_reports(dataset_id)
+		release_csv_file(storage, name)
+
+
+class RetentionPolicy(models.Model):
+	"""Per-user overrides of the DATASET_RETENTION_* settings; empty fields
+	fall back to the setting."""
+
+	user = models.OneToOneField(
+		settings.AUTH_USER_MODEL,
+		on_delete=models.CASCADE,
+		related_name='retention_policy',
+	)
+	max_count = models.PositiveIntegerField(null=True, blank=True)
+	max_age_days = models.PositiveIntegerField(null=True, blank=True)
+	max_bytes = models.PositiveBigIntegerField(null=True, blank=True)
+
+	def __str__(self) -> str:
+		return f"Retention for {self.user}"
+
+
+class IngestionJob(models.Model):
+	STATUS_QUEUED = 'queued'
+	STATUS_RUNNING = 'running'
+	STATUS_SUCCEEDED = 'succeeded'
+	STATUS_FAILED = 'failed'
+	STATUS_CHOICES = [
+		(STATUS_QUEUED, 'Queued'),
+		(STATUS_RUNNING, 'Running'),
+		(STATUS_SUCCEEDED, 'Succeeded'),
+		(STATUS_FAILED, 'Failed'),
+	]
+
+	user = models.ForeignKey(
+		settings.AUTH_USER_MODEL,
+		on_delete=models.CASCADE,
+		related_name='ingestion_jobs',
+	)
+	created_at = models.DateTimeField(auto_now_add=True)
+	started_at = models.DateTimeField(null=True, blank=True)
+	finished_at = models.DateTimeField(null=True, blank=True)
+	status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+
+	original_filename = models.CharField(max_length=255)
+	csv_file = models.FileField(upload_to='datasets/')
+	content_hash = models.CharField(max_length=64, blank=True, default='')
+	bytes_total = models.PositiveBigIntegerField(default=0)
+	bytes_processed = models.PositiveBigIntegerField(default=0)
+	rows_processed = models.PositiveBigIntegerField(default=0)
+	error = models.TextField(blank=True, default='')
+
+	dataset = models.ForeignKey(
+		Dataset,
+		on_delete=models.SET_NULL,
+		null=True,
+		blank=True,
+		related_name='+',
+	)
+
+	class Meta:
+		ordering = ['created_at']
+
+	def __str__(self) -> str:
+		return f"IngestionJob {self.id} ({self.status})"
+
+	@property
+	def is_finished(self) -> bool:
+		return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+
+class UploadSession(models.Model):
+	"""A resumable upload: the client appends chunks at explicit offsets and
+	complete lines are parsed as they arrive."""
+
+	STATUS_OPEN = 'open'
+	# Held by the one request writing a chunk or finalizing; see resumable.
+	STATUS_RECEIVING = 'receiving'
+	STATUS_COMPLETE = 'complete'
+	STATUS_FAILED = 'failed'
+	STATUS_CHOICES = [
+		(STATUS_OPEN, 'Open'),
+		(STATUS_RECEIVING, 'Receiving'),
+		(STATUS_COMPLETE, 'Complete'),
+		(STATUS_FAILED, 'Failed'),
+	]
+
+	user = models.ForeignKey(
+		settings.AUTH_USER_MODEL,
+		on_delete=models.CASCADE,
+		related_name='upload_sessions',
+	)
+	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True, db_index=True)
+	status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_OPEN)
+
+	original_filename = models.CharField(max_length=255)
+	bytes_expected = models.PositiveBigIntegerField(null=True, blank=True)
+	content_hash = models.CharField(max_length=64, blank=True, default='')
+	bytes_received = models.PositiveBigIntegerField(default=0)
+	# Bytes up to the last fully parsed line; 0 until the header has arrived.
+	bytes_parsed = models.PositiveBigIntegerField(default=0)
+	parts = models.PositiveIntegerField(default=0)
+	# SummaryAccumulator state of the parsed prefix.
+	summary = models.JSONField(default=dict)
+	error = models.TextField(blank=True, default='')
+
+	job = models.ForeignKey(
+		IngestionJob,
+		on_delete=models.SET_NULL,
+		null=True,
+		blank=True,
+		related_name='+',
+	)
+
+	def __str__(self) -> str:
+		return f"UploadSession {self.id} ({self.status})"
+
+
+def _is_referenced(name: str) -> bool:
+	if Dataset.objects.filter(csv_file=name).exists():
+		return True
+	return IngestionJob.objects.filter(
+		csv_file=name,
+		status__in=[IngestionJob.STATUS_QUEUED, IngestionJob.STATUS_RUNNING],
+	).exists()
+
+
+def release_csv_file(storage, name: str) -> None:
+	"""Delete a stored CSV and its derived files once no dataset and no
+	pending ingestion job refers to it. Deduplicated uploads share files, so
+	the references are counted at release time rather than stored.
+
+	An upload may find the file and record a reference between the count and
+	the delete. The file is therefore moved aside and the count repeated:
+	a reference recorded by then gets the file back, and one recorded later
+	finds it gone and stores it again (see ``ingestion.ensure_blob``).
+	"""
+	if not name or _is_referenced(name):
+		return
+	path = storage.path(name)
+	released = f"{path}.{uuid.uuid4().hex}.released"
+	try:
+		os.replace(path, released)
+	except FileNotFoundError:
+		released = None
+	if _is_referenced(name):
+		if released is not None:
+			os.replace(released, path)
+		return
+	if released is not None:
+		os.remove(released)
+	for derived in derived_paths(name, CLEANED_COLUMNS):
+		storage.delete(derived)
+	invalidate_sidecar(storage.path(sidecar_path(name)))
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from django.core import signing
+
+
+CURSOR_SALT = 'api.dataset-data-cursor'
+
+
+class CursorError(ValueError):
+	pass
+
+
+@dataclass(frozen=True)
+class Cursor:
+	"""Position in one dataset version under one filter/sort order."""
+	dataset_id: int
+	version: str
+	order: str
+	position: int
+
+	def encode(self) -> str:
+		# Signed so clients cannot forge positions for other orders or versions.
+		return signing.dumps(
+			[self.dataset_id, self.version, self.order, self.position],
+			salt=CURSOR_SALT,
+			compress=True,
+		)
+
+	@classmethod
+	def decode(cls, token: str) -> Cursor:
+		try:
+			dataset_id, version, order, position = signing.loads(token, salt=CURSOR_SALT)
+		except (signing.BadSignature, ValueError, TypeError):
+			raise CursorError("Invalid cursor.") from None
+		return cls(int(dataset_id), str(version), str(order), int(position))
+
+	def check(self, dataset_id: int, version: str, order: str) -> None:
+		if self.dataset_id != dataset_id:
+			raise CursorError("Cursor belongs to a different dataset.")
+		if self.version != version:
+			raise CursorError("Cursor is stale; the dataset changed since it was issued.")
+		if self.order != order:
+			raise CursorError("Cursor was issued for different filters or sort order.")
+
+
+def page_cursors(
+	dataset_id: int,
+	version: str,
+	order: str,
+	offset: int,
+	limit: int,
+	total: int,
+) -> tuple[str | None, str | None]:
+	"""Cursors for the pages after and before ``[offset, offset + limit)``."""
+	next_cursor = None
+	prev_cursor = None
+	if offset + limit < total:
+		next_cursor = Cursor(dataset_id, version, order, offset + limit).encode()
+	if offset > 0:
+		prev_cursor = Cursor(dataset_id, version, order, max(offset - limit, 0)).encode()
+	return next_cursor, prev_cursor
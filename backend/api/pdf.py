@@ -3,54 +3,149 @@ from __future__ import annotations
 from io import BytesIO
 from typing import Any
 
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import inch
-from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
+from .metrics import span
+
+
+# Bump whenever the layout or content changes so cached reports are rebuilt.
+REPORT_TEMPLATE_VERSION = 2
+
+CHART_MAX_BARS = 15
+NUMERIC_LABELS = {
+    'flowrate': 'Flowrate',
+    'pressure': 'Pressure',
+    'temperature': 'Temperature',
+}
+
+ACCENT = colors.HexColor('#3b82f6')
+GRID = colors.HexColor('#e5e7eb')
+HEADER_BG = colors.HexColor('#f3f4f6')
+
+
+def _fmt(value: Any) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    return str(value)
 
-def build_dataset_report_pdf(*, title: str, summary: dict[str, Any]) -> bytes:
-    buffer = BytesIO()
-    canvas = Canvas(buffer, pagesize=letter)
-    width, height = letter
 
-    x = 0.75 * inch
-    y = height - 0.9 * inch
+def _table(rows: list[list[Any]], col_widths: list[float] | None = None) -> Table:
+    table = Table([[_fmt(cell) for cell in row] for row in rows], colWidths=col_widths, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('BACKGROUND', (0, 0), (-1, 0), HEADER_BG),
+        ('GRID', (0, 0), (-1, -1), 0.5, GRID),
+        ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    return table
 
-    canvas.setFont("Helvetica-Bold", 16)
-    canvas.drawString(x, y, title)
 
-    y -= 0.4 * inch
-    canvas.setFont("Helvetica", 11)
+def _top_with_other(items: list[tuple[str, float]], limit: int) -> list[tuple[str, float]]:
+    if len(items) <= limit:
+        return items
+    head = items[:limit - 1]
+    return head + [('Other', sum(value for _, value in items[limit - 1:]))]
 
-    canvas.drawString(x, y, f"Total equipment count: {summary.get('total_count', '-')}")
-    y -= 0.25 * inch
+
+def _bar_chart(items: list[tuple[str, float]], title: str) -> Drawing:
+    drawing = Drawing(6.5 * inch, 2.6 * inch)
+    chart = VerticalBarChart()
+    chart.x = 0.5 * inch
+    chart.y = 0.7 * inch
+    chart.width = 5.8 * inch
+    chart.height = 1.6 * inch
+    chart.data = [[value or 0 for _, value in items]]
+    chart.categoryAxis.categoryNames = [label for label, _ in items]
+    chart.categoryAxis.labels.angle = 30
+    chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.categoryAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 7
+    chart.bars[0].fillColor = ACCENT
+    chart.bars[0].strokeColor = None
+    drawing.add(chart)
+    drawing.add(String(0.5 * inch, 2.45 * inch, title, fontName='Helvetica-Bold', fontSize=9))
+    return drawing
+
+
+@span('pdf_render')
+def build_dataset_report_pdf(*, title: str, summary: dict[str, Any]) -> bytes:
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        leftMargin=0.75 * inch,
+        rightMargin=0.75 * inch,
+        topMargin=0.75 * inch,
+        bottomMargin=0.75 * inch,
+        title=title,
+    )
+    styles = getSampleStyleSheet()
+    story: list[Any] = [Paragraph(title, styles['Title'])]
 
     averages = summary.get('averages') or {}
-    canvas.drawString(x, y, f"Average Flowrate: {averages.get('flowrate', '-')}")
-    y -= 0.2 * inch
-    canvas.drawString(x, y, f"Average Pressure: {averages.get('pressure', '-')}")
-    y -= 0.2 * inch
-    canvas.drawString(x, y, f"Average Temperature: {averages.get('temperature', '-')}")
-    y -= 0.35 * inch
-
-    canvas.setFont("Helvetica-Bold", 12)
-    canvas.drawString(x, y, "Equipment Type Distribution")
-    y -= 0.25 * inch
-    canvas.setFont("Helvetica", 11)
+    story.append(_table([
+        ['Metric', 'Value'],
+        ['Total equipment count', summary.get('total_count')],
+        *[[f"Average {label}", averages.get(col)] for col, label in NUMERIC_LABELS.items()],
+    ], col_widths=[3 * inch, 2 * inch]))
 
+    story += [Spacer(1, 0.25 * inch), Paragraph("Equipment Type Distribution", styles['Heading2'])]
     dist = summary.get('type_distribution') or {}
     if not dist:
-        canvas.drawString(x, y, "(no data)")
-        y -= 0.2 * inch
+        story.append(Paragraph("(no data)", styles['Normal']))
     else:
-        for equipment_type, count in dist.items():
-            canvas.drawString(x, y, f"- {equipment_type}: {count}")
-            y -= 0.2 * inch
-            if y < 1.0 * inch:
-                canvas.showPage()
-                y = height - 0.9 * inch
-                canvas.setFont("Helvetica", 11)
-
-    canvas.showPage()
-    canvas.save()
+        items = sorted(dist.items(), key=lambda item: item[1], reverse=True)
+        story.append(_bar_chart(_top_with_other(items, CHART_MAX_BARS), "Count by type"))
+        total = sum(dist.values()) or 1
+        story.append(_table(
+            [['Type', 'Count', 'Share']] + [[k, v, f"{100 * v / total:.1f}%"] for k, v in items],
+            col_widths=[3 * inch, 1.25 * inch, 1.25 * inch],
+        ))
+
+    statistics = summary.get('statistics') or {}
+    columns = statistics.get('columns') or {}
+    if columns:
+        story += [Spacer(1, 0.25 * inch), Paragraph("Column Statistics", styles['Heading2'])]
+        header = ['Column', 'Count', 'Missing', 'Mean', 'Std', 'Min', 'Median', 'Max']
+        rows = [header]
+        for col, label in NUMERIC_LABELS.items():
+            stats = columns.get(col) or {}
+            quantiles = stats.get('quantiles') or {}
+            rows.append([
+                label, stats.get('count'), stats.get('null_count'), stats.get('mean'),
+                stats.get('std'), stats.get('min'), quantiles.get('p50'), stats.get('max'),
+            ])
+        story.append(_table(rows))
+
+    by_type = statistics.get('by_type') or {}
+    if by_type:
+        story += [Spacer(1, 0.25 * inch), Paragraph("Statistics by Equipment Type", styles['Heading2'])]
+        types = sorted(by_type, key=lambda t: dist.get(t, 0), reverse=True)
+        for col, label in NUMERIC_LABELS.items():
+            means = [(t, (by_type[t].get(col) or {}).get('mean')) for t in types[:CHART_MAX_BARS]]
+            story.append(_bar_chart(means, f"Mean {label.lower()} by type"))
+            rows = [['Type', 'Count', 'Mean', 'Std', 'Min', 'Median', 'Max']]
+            for equipment_type in types:
+                stats = by_type[equipment_type].get(col) or {}
+                quantiles = stats.get('quantiles') or {}
+                rows.append([
+                    equipment_type, stats.get('count'), stats.get('mean'), stats.get('std'),
+                    stats.get('min'), quantiles.get('p50'), stats.get('max'),
+                ])
+            story += [_table(rows), Spacer(1, 0.2 * inch)]
+
+    doc.build(story)
     return buffer.getvalue()
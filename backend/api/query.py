@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .analytics import CLEANED_COLUMNS, NUMERIC_COLUMNS
+from .columnar import ColumnIndex
+
+
+class QueryError(ValueError):
+    pass
+
+
+RANGE_OPS = {'gt', 'gte', 'lt', 'lte'}
+STRING_OPS = {'eq', 'prefix'}
+
+# Query parameters with their own meaning; others naming a column are
+# filters, and the rest (cache busters such as ``_=123``) are ignored.
+RESERVED_PARAMS = {'limit', 'offset', 'columns', 'sort', 'cursor', 'format'}
+
+
+@dataclass(frozen=True)
+class RangeFilter:
+    column: str
+    lower: float | None = None
+    upper: float | None = None
+    lower_inclusive: bool = True
+    upper_inclusive: bool = True
+
+
+@dataclass(frozen=True)
+class StringFilter:
+    column: str
+    op: str
+    values: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class TableQuery:
+    columns: tuple[str, ...] = tuple(CLEANED_COLUMNS)
+    sort: tuple[tuple[str, str], ...] = ()
+    ranges: tuple[RangeFilter, ...] = ()
+    strings: tuple[StringFilter, ...] = ()
+
+    @property
+    def is_identity(self) -> bool:
+        return not (self.sort or self.ranges or self.strings)
+
+    def fingerprint(self) -> str:
+        """Identifies the row order (filters and sort), not the projection."""
+        return repr((self.sort, self.ranges, self.strings))
+
+
+def _split(value: str) -> list[str]:
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def _check_column(column: str) -> str:
+    if column not in CLEANED_COLUMNS:
+        raise QueryError(f"Unknown column '{column}'. Expected one of: {', '.join(CLEANED_COLUMNS)}.")
+    return column
+
+
+def parse_query(params) -> TableQuery:
+    """Build a TableQuery from request query parameters.
+
+    - ``columns=type,pressure`` projects columns.
+    - ``sort=-pressure,type`` sorts, ``-`` meaning descending.
+    - ``pressure__gte=5`` (``gt``/``gte``/``lt``/``lte``) filters numeric columns.
+    - ``type=Pump`` and ``equipment_name__prefix=R`` filter string columns;
+      repeating the parameter matches any of the values.
+
+    Parameters that name no column are ignored.
+    """
+    columns = tuple(CLEANED_COLUMNS)
+    if params.get('columns'):
+        columns = tuple(_check_column(c) for c in _split(params['columns']))
+
+    sort = []
+    for key in _split(params.get('sort') or ''):
+        descending = key.startswith('-')
+        column = _check_column(key.lstrip('-+'))
+        sort.append((column, 'descending' if descending else 'ascending'))
+
+    bounds: dict[str, dict] = {}
+    strings: list[StringFilter] = []
+    for key in params.keys():
+        if key in RESERVED_PARAMS:
+            continue
+        column, _, op = key.partition('__')
+        if column not in CLEANED_COLUMNS:
+            continue
+        values = params.getlist(key) if hasattr(params, 'getlist') else [params[key]]
+
+        if column in NUMERIC_COLUMNS:
+            if op not in RANGE_OPS:
+                raise QueryError(f"Numeric column '{column}' supports only {', '.join(sorted(RANGE_OPS))} filters.")
+            try:
+                number = float(values[-1])
+            except ValueError:
+                raise QueryError(f"Filter '{key}' expects a number.") from None
+            entry = bounds.setdefault(column, {})
+            if op in ('gt', 'gte'):
+                entry.update(lower=number, lower_inclusive=op == 'gte')
+            else:
+                entry.update(upper=number, upper_inclusive=op == 'lte')
+        else:
+            op = op or 'eq'
+            if op not in STRING_OPS:
+                raise QueryError(f"Column '{column}' supports only equality and 'prefix' filters.")
+            strings.append(StringFilter(column, op, tuple(values)))
+
+    ranges = tuple(RangeFilter(column, **entry) for column, entry in bounds.items())
+    return TableQuery(columns=columns, sort=tuple(sort), ranges=ranges, strings=tuple(strings))
+
+
+def _string_mask(table: pa.Table, flt: StringFilter) -> pa.ChunkedArray:
+    column = table.column(flt.column)
+    if flt.op == 'eq':
+        return pc.is_in(column, value_set=pa.array(flt.values, type=column.type))
+    masks = [pc.starts_with(column, pattern=prefix) for prefix in flt.values]
+    mask = masks[0]
+    for other in masks[1:]:
+        mask = pc.or_(mask, other)
+    return mask
+
+
+def _range_mask(table: pa.Table, flt: RangeFilter) -> pa.ChunkedArray:
+    column = table.column(flt.column)
+    mask = pc.is_valid(column)
+    if flt.lower is not None:
+        op = pc.greater_equal if flt.lower_inclusive else pc.greater
+        mask = pc.and_(mask, op(column, flt.lower))
+    if flt.upper is not None:
+        op = pc.less_equal if flt.upper_inclusive else pc.less
+        mask = pc.and_(mask, op(column, flt.upper))
+    return mask
+
+
+def _sorted_order(index: ColumnIndex, direction: str) -> tuple[np.ndarray, ...]:
+    if direction == 'ascending':
+        return (index.order,)
+    # Reverse the non-null run but keep nulls last, as pc.sort_indices does.
+    # Both parts are views of the memory-mapped index, so nothing is copied.
+    valid = index.valid_count
+    return (index.order[:valid][::-1], index.order[valid:])
+
+
+@dataclass(frozen=True)
+class Selection:
+    """Rows matching a query, in result order, as consecutive segments of row
+    ids. ``segments`` is None when the result is the whole table in its
+    natural order, so a page is a plain slice."""
+    segments: tuple[np.ndarray, ...] | None
+    total: int
+
+    def row_ids(self, start: int, stop: int) -> np.ndarray:
+        parts = []
+        base = 0
+        for segment in self.segments:
+            lo = max(start - base, 0)
+            hi = min(stop - base, len(segment))
+            if lo < hi:
+                parts.append(segment[lo:hi])
+            base += len(segment)
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def window(self, table: pa.Table, offset: int, limit: int, columns: tuple[str, ...]) -> pa.Table:
+        if self.segments is None:
+            page = table.slice(offset, limit)
+        else:
+            page = table.take(self.row_ids(offset, offset + limit))
+        return page.select(list(columns))
+
+
+def select_rows(
+    table: pa.Table,
+    query: TableQuery,
+    index_for: Callable[[str], ColumnIndex],
+) -> Selection:
+    """Resolve filters and sort order of ``query`` to row ids.
+
+    The most selective range filter is answered from its column's on-disk
+    sort index by binary search; remaining predicates run as Arrow compute
+    kernels over the surviving rows only. A single sort key without filters
+    reuses the index order directly, so no sort happens per request.
+    """
+    if query.is_identity:
+        return Selection(segments=None, total=table.num_rows)
+
+    row_ids: np.ndarray | None = None
+    remaining_ranges = list(query.ranges)
+    if remaining_ranges:
+        candidates = []
+        for flt in remaining_ranges:
+            index = index_for(flt.column)
+            bounds = index.range_slice(
+                flt.lower, flt.upper,
+                lower_inclusive=flt.lower_inclusive,
+                upper_inclusive=flt.upper_inclusive,
+            )
+            candidates.append((bounds.stop - bounds.start, flt, index, bounds))
+        _, best, index, bounds = min(candidates, key=lambda c: c[0])
+        remaining_ranges.remove(best)
+        row_ids = np.sort(index.order[bounds])
+
+    predicates = [(_range_mask, flt) for flt in remaining_ranges]
+    predicates += [(_string_mask, flt) for flt in query.strings]
+    if predicates:
+        subset = table if row_ids is None else table.take(row_ids)
+        mask = None
+        for mask_fn, flt in predicates:
+            current = mask_fn(subset, flt)
+            mask = current if mask is None else pc.and_(mask, current)
+        keep = np.flatnonzero(pc.fill_null(mask, False).to_numpy(zero_copy_only=False))
+        row_ids = keep if row_ids is None else row_ids[keep]
+
+    if query.sort:
+        if row_ids is None and len(query.sort) == 1:
+            column, direction = query.sort[0]
+            segments = _sorted_order(index_for(column), direction)
+            return Selection(segments=segments, total=sum(len(s) for s in segments))
+
+        subset = table if row_ids is None else table.take(row_ids)
+        order = pc.sort_indices(subset, sort_keys=list(query.sort)).to_numpy()
+        row_ids = order if row_ids is None else row_ids[order]
+
+    return Selection(segments=(row_ids,), total=len(row_ids))
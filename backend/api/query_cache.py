@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import pyarrow as pa
+from django.conf import settings
+
+from .columnar import ColumnIndex, load_index
+from .metrics import metric_lines, register_collector
+from .query import Selection, TableQuery, select_rows
+
+
+class ByteLRU:
+    """Thread-safe LRU cache bounded by the total size of its values.
+
+    ``limit`` is called on every insert, so the bound follows the setting it
+    reads. Values are built outside the lock; two threads missing the same key
+    at once both compute it and the second result wins.
+    """
+
+    def __init__(self, limit: Callable[[], int]) -> None:
+        self._limit = limit
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any], size_of: Callable[[Any], int]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = factory()
+        size = size_of(value)
+        limit = self._limit()
+        if size > limit:
+            return value
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > limit:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+        return value
+
+    def discard(self, predicate: Callable[[Hashable], bool]) -> int:
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                self._bytes -= self._entries.pop(key)[1]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+# Keys start with the sidecar path and version, so a rewritten sidecar never
+# serves stale entries and deleting a dataset can drop all of its own.
+query_cache = ByteLRU(lambda: settings.DATASET_QUERY_CACHE_MAX_BYTES)
+
+
+def _index_bytes(index: ColumnIndex) -> int:
+    return index.order.nbytes + (index.values.nbytes if index.values is not None else 0)
+
+
+def _selection_bytes(selection: Selection) -> int:
+    return sum(segment.nbytes for segment in selection.segments or ())
+
+
+def cached_index(table: pa.Table, sidecar: str, version: str, column: str) -> ColumnIndex:
+    return query_cache.get_or_create(
+        (sidecar, version, 'index', column),
+        lambda: load_index(table, sidecar, column),
+        _index_bytes,
+    )
+
+
+def cached_selection(table: pa.Table, sidecar: str, version: str, query: TableQuery) -> Selection:
+    """``select_rows`` memoized per sidecar version and row order, so paging
+    through a filtered or multi-key sorted result resolves it once."""
+    if query.is_identity:
+        return select_rows(table, query, lambda column: cached_index(table, sidecar, version, column))
+    return query_cache.get_or_create(
+        (sidecar, version, 'selection', query.fingerprint()),
+        lambda: select_rows(table, query, lambda column: cached_index(table, sidecar, version, column)),
+        _selection_bytes,
+    )
+
+
+def invalidate_sidecar(sidecar: str) -> int:
+    return query_cache.discard(lambda key: key[0] == sidecar)
+
+
+def _cache_metrics():
+    stats = query_cache.stats()
+    for key in ('hits', 'misses', 'evictions'):
+        yield from metric_lines(f'chemequip_query_cache_{key}_total', 'counter', f'Query cache {key}.', [((), stats[key])])
+    yield from metric_lines('chemequip_query_cache_bytes', 'gauge', 'Bytes held by the query cache.', [((), stats['bytes'])])
+    yield from metric_lines('chemequip_query_cache_entries', 'gauge', 'Entries in the query cache.', [((), stats['entries'])])
+
+
+register_collector(_cache_metrics)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Iterator
+
+from django.conf import settings
+
+from .export import ChunkSink
+from .pdf import REPORT_TEMPLATE_VERSION, build_dataset_report_pdf
+
+
+def report_title(dataset) -> str:
+	return f"Equipment Dataset Report (#{dataset.id})"
+
+
+def report_filename(dataset) -> str:
+	return f"dataset_{dataset.id}_report.pdf"
+
+
+def report_cache_key(dataset) -> str:
+	payload = json.dumps(
+		{'title': report_title(dataset), 'summary': dataset.summary or {}},
+		sort_keys=True,
+		default=str,
+	)
+	digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+	return f"{dataset.id}-{digest}-v{REPORT_TEMPLATE_VERSION}.pdf"
+
+
+def _cache_dir() -> str:
+	path = str(settings.REPORT_CACHE_DIR)
+	os.makedirs(path, exist_ok=True)
+	return path
+
+
+def cached_report_path(dataset) -> str:
+	"""Return the path of the dataset's PDF report, rendering it on a miss.
+
+	Reports are keyed by dataset id, a hash of the summary and the template
+	version, so a changed summary or layout never serves a stale file.
+	"""
+	cache_dir = _cache_dir()
+	path = os.path.join(cache_dir, report_cache_key(dataset))
+	if os.path.exists(path):
+		# Touch on hit so eviction drops the least recently used reports.
+		os.utime(path)
+		return path
+
+	_store_report(path, build_dataset_report_pdf(title=report_title(dataset), summary=dataset.summary or {}))
+	evict_reports(settings.REPORT_CACHE_MAX_BYTES, keep=path)
+	return path
+
+
+def _store_report(path: str, pdf_bytes: bytes) -> None:
+	fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+	with os.fdopen(fd, 'wb') as handle:
+		handle.write(pdf_bytes)
+	os.replace(tmp_path, path)
+
+
+def iter_dataset_reports(datasets: Iterable, *, workers: int = 1) -> Iterator[tuple[object, str]]:
+	"""Yield ``(dataset, report path)`` pairs as reports become available.
+
+	Cached reports are yielded first. Misses are rendered in a process pool
+	when ``workers > 1`` and yielded in completion order, so a caller can
+	stream each one out while the rest are still rendering.
+	"""
+	cache_dir = _cache_dir()
+	missing = []
+	for dataset in datasets:
+		path = os.path.join(cache_dir, report_cache_key(dataset))
+		if os.path.exists(path):
+			os.utime(path)
+			yield dataset, path
+		else:
+			missing.append((dataset, path))
+
+	try:
+		if workers <= 1 or len(missing) <= 1:
+			for dataset, path in missing:
+				_store_report(path, build_dataset_report_pdf(title=report_title(dataset), summary=dataset.summary or {}))
+				yield dataset, path
+			return
+
+		# Spawned workers import only reportlab and api.pdf, as in
+		# analytics.parallel_analyze_csv.
+		context = multiprocessing.get_context('spawn')
+		pool = ProcessPoolExecutor(max_workers=min(workers, len(missing)), mp_context=context)
+		try:
+			futures = {
+				pool.submit(build_dataset_report_pdf, title=report_title(dataset), summary=dataset.summary or {}): (dataset, path)
+				for dataset, path in missing
+			}
+			for future in as_completed(futures):
+				dataset, path = futures[future]
+				_store_report(path, future.result())
+				yield dataset, path
+		finally:
+			# A client that disconnects mid-download should not keep the pool busy.
+			pool.shutdown(cancel_futures=True)
+	finally:
+		if missing:
+			evict_reports(settings.REPORT_CACHE_MAX_BYTES)
+
+
+def iter_reports_zip(datasets: Iterable, *, workers: int = 1) -> Iterator[bytes]:
+	"""Encode the datasets' reports as a ZIP archive, one entry at a time."""
+	sink = ChunkSink()
+	with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+		for dataset, path in iter_dataset_reports(datasets, workers=workers):
+			archive.write(path, report_filename(dataset))
+			yield sink.drain()
+	yield sink.drain()
+
+
+def evict_reports(max_bytes: int, keep: str | None = None) -> None:
+	cache_dir = _cache_dir()
+	entries = []
+	for name in os.listdir(cache_dir):
+		if not name.endswith('.pdf'):
+			continue
+		full = os.path.join(cache_dir, name)
+		try:
+			stat = os.stat(full)
+		except FileNotFoundError:
+			continue
+		entries.append((stat.st_mtime, stat.st_size, full))
+
+	total = sum(size for _, size, _ in entries)
+	for _, size, full in sorted(entries):
+		if total <= max_bytes:
+			break
+		if full == keep:
+			continue
+		try:
+			os.remove(full)
+		except FileNotFoundError:
+			pass
+		total -= size
+
+
+def invalidate_reports(dataset_id: int) -> None:
+	cache_dir = str(settings.REPORT_CACHE_DIR)
+	if not os.path.isdir(cache_dir):
+		return
+	prefix = f"{dataset_id}-"
+	for name in os.listdir(cache_dir):
+		if name.startswith(prefix) and name.endswith('.pdf'):
+			try:
+				os.remove(os.path.join(cache_dir, name))
+			except FileNotFoundError:
+				pass
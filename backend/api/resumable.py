@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+from datetime import timedelta
+from typing import BinaryIO
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .analytics import CsvValidationError, StreamedDataset, SummaryAccumulator, analyze_byte_range
+from .columnar import concat_sidecars, sidecar_path
+from .compression import detect_encoding
+from .ingestion import (
+	blob_name,
+	blob_storage,
+	ensure_blob,
+	existing_blob,
+	publish,
+	run_job,
+	stored_encoding,
+	write_compressed,
+)
+from .models import Dataset, IngestionJob, UploadSession
+from .uploads import hash_path
+
+
+READ_SIZE = 1 << 20
+_QUOTE_OR_NEWLINE = re.compile(rb'["\n]')
+# A claim older than this belongs to a request that died; it may be taken over.
+STALE_CLAIM = timedelta(minutes=30)
+
+
+class UploadError(ValueError):
+	pass
+
+
+class UploadOffsetMismatch(UploadError):
+	def __init__(self, offset: int) -> None:
+		super().__init__(f"Upload is at offset {offset}.")
+		self.offset = offset
+
+
+def session_path(session: UploadSession) -> str:
+	return blob_storage().path(f"uploads/{session.id}.csv")
+
+
+def _part_paths(session: UploadSession) -> list[str]:
+	path = session_path(session)
+	return [f"{path}.part{i}" for i in range(session.parts)]
+
+
+def _discard_files(session: UploadSession) -> None:
+	for path in [session_path(session), *_part_paths(session)]:
+		if os.path.exists(path):
+			os.remove(path)
+
+
+def _fail(session: UploadSession, message: str) -> None:
+	session.status = UploadSession.STATUS_FAILED
+	session.error = message
+	session.save(update_fields=['status', 'error', 'updated_at'])
+	_discard_files(session)
+
+
+def _complete(session: UploadSession, job: IngestionJob) -> None:
+	session.job = job
+	if job.status != IngestionJob.STATUS_FAILED:
+		# Received in full; a queued job reports the ingestion from here.
+		session.status = UploadSession.STATUS_COMPLETE
+	else:
+		session.status = UploadSession.STATUS_FAILED
+		session.error = job.error
+	session.save(update_fields=['job', 'status', 'error', 'updated_at'])
+	_discard_files(session)
+
+
+def _claim(session: UploadSession, **conditions) -> bool:
+	"""Move the session to receiving if it is open and matches
+	``conditions``. The conditional UPDATE is the lock: only its holder
+	writes the session file or advances the parse state."""
+	now = timezone.now()
+	claimed = UploadSession.objects.filter(
+		Q(status=UploadSession.STATUS_OPEN)
+		| Q(status=UploadSession.STATUS_RECEIVING, updated_at__lt=now - STALE_CLAIM),
+		id=session.id,
+		**conditions,
+	).update(status=UploadSession.STATUS_RECEIVING, updated_at=now)
+	if claimed:
+		# Parse state may have moved since the caller loaded the session.
+		session.refresh_from_db()
+	return bool(claimed)
+
+
+def _release(session: UploadSession) -> None:
+	# No-op once the holder failed or completed the upload.
+	released = UploadSession.objects.filter(id=session.id, status=UploadSession.STATUS_RECEIVING).update(
+		status=UploadSession.STATUS_OPEN,
+		bytes_received=session.bytes_received,
+		updated_at=timezone.now(),
+	)
+	if released:
+		session.status = UploadSession.STATUS_OPEN
+
+
+def create_session(user, filename: str, size: int | None = None, content_hash: str = '') -> UploadSession:
+	"""Open an upload. When the client declares the SHA-256 of a file it
+	has already uploaded, the dataset is created at once and no data is sent.
+
+	Only the user's own datasets count: a declared hash proves nothing about
+	having the bytes, so matching another user's file would hand it over.
+	"""
+	session = UploadSession.objects.create(
+		user=user,
+		original_filename=filename,
+		bytes_expected=size,
+		content_hash=content_hash,
+	)
+	path = session_path(session)
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	open(path, 'wb').close()
+
+	if content_hash and Dataset.objects.filter(user=user, content_hash=content_hash).exists():
+		name = existing_blob(content_hash)
+		if name:
+			job = IngestionJob.objects.create(
+				user=user,
+				original_filename=filename,
+				csv_file=name,
+				content_hash=content_hash,
+				bytes_total=size or blob_storage().size(name),
+			)
+			if blob_storage().exists(name):
+				_complete(session, run_job(job))
+			else:
+				# Released before the job held it; the client sends the bytes after all.
+				job.delete()
+	return session
+
+
+def append_chunk(
+	session: UploadSession,
+	offset: int,
+	stream: BinaryIO,
+	checksum: bytes | None = None,
+) -> UploadSession:
+	"""Write ``stream`` at ``offset`` and parse any lines it completes.
+
+	``offset`` must equal the bytes received so far; ``checksum`` is the
+	SHA-256 digest of the chunk. A rejected chunk leaves the upload as it was.
+	"""
+	if not _claim(session, bytes_received=offset):
+		session.refresh_from_db()
+		if session.status not in (UploadSession.STATUS_OPEN, UploadSession.STATUS_RECEIVING):
+			raise UploadError(f"Upload is {session.status}.")
+		# Behind, ahead, or another chunk is being written right now.
+		raise UploadOffsetMismatch(session.bytes_received)
+	try:
+		_receive(session, offset, stream, checksum)
+	finally:
+		_release(session)
+	return session
+
+
+def _receive(session: UploadSession, offset: int, stream: BinaryIO, checksum: bytes | None) -> None:
+	digest = hashlib.sha256()
+	written = 0
+	last_newline = -1
+	limit = settings.DATASET_UPLOAD_MAX_CHUNK_BYTES
+	if session.bytes_expected is not None:
+		limit = min(limit, session.bytes_expected - offset)
+
+	with open(session_path(session), 'r+b') as handle:
+		handle.seek(offset)
+		while data := stream.read(READ_SIZE):
+			if written + len(data) > limit:
+				handle.truncate(offset)
+				raise UploadError(f"Chunk exceeds {limit} bytes.")
+			handle.write(data)
+			digest.update(data)
+			newline = data.rfind(b'\n')
+			if newline >= 0:
+				last_newline = offset + written + newline
+			written += len(data)
+		if checksum is not None and checksum != digest.digest():
+			handle.truncate(offset)
+			raise UploadError("Chunk checksum mismatch.")
+		# Drop leftovers of an earlier write that was never acknowledged.
+		handle.truncate(offset + written)
+	session.bytes_received = offset + written
+
+	# Compressed uploads have no line boundaries to parse along; they are
+	# parsed in one pass when finalized.
+	if last_newline >= 0 and detect_encoding(session_path(session)) is None:
+		end = _record_end(session, last_newline + 1)
+		if end is not None:
+			_parse_until(session, end)
+
+
+def _record_end(session: UploadSession, end: int) -> int | None:
+	"""Offset just past the last newline before ``end`` that is not inside a
+	quoted field, or None. Quotes are counted from ``bytes_parsed``, which is
+	always a record boundary; an escaped quote (``""``) flips twice."""
+	found = None
+	quoted = False
+	with open(session_path(session), 'rb') as handle:
+		header = handle.readline()
+		position = session.bytes_parsed or len(header)
+		handle.seek(position)
+		while position < end:
+			block = handle.read(min(READ_SIZE, end - position))
+			if not block:
+				break
+			if not quoted and b'"' not in block:
+				newline = block.rfind(b'\n')
+				if newline >= 0:
+					found = position + newline + 1
+			else:
+				for match in _QUOTE_OR_NEWLINE.finditer(block):
+					if match.group() == b'"':
+						quoted = not quoted
+					elif not quoted:
+						found = position + match.start() + 1
+			position += len(block)
+	return found
+
+
+def _parse_until(session: UploadSession, end: int, *, final: bool = False) -> None:
+	# Lines in [bytes_parsed, end) are complete: summarize them into the
+	# session and keep their cleaned rows as the next sidecar part, so
+	# finalizing never re-reads the file. A range that fails to parse before
+	# the last one is left for a later chunk; only the final parse fails the
+	# upload.
+	path = session_path(session)
+	with open(path, 'rb') as handle:
+		header = handle.readline()
+	start = session.bytes_parsed or len(header)
+
+	previous = {'bytes_parsed': session.bytes_parsed, 'parts': session.parts}
+	if end <= start:
+		_advance(session, previous, None, start)
+		return
+
+	# Rows go to a private name and become the part only once the parse
+	# state has advanced, so a parse that loses never touches a real part.
+	part = f"{path}.part{session.parts}"
+	fd, staged = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{os.path.basename(part)}.", suffix='.tmp')
+	os.close(fd)
+	try:
+		try:
+			partial = analyze_byte_range(path, header, start, end, settings.DATASET_INGEST_CHUNKSIZE, staged)
+		except CsvValidationError as exc:
+			if not final:
+				return
+			_fail(session, str(exc))
+			raise UploadError(str(exc)) from None
+		_advance(session, previous, partial, end)
+		os.replace(staged, part)
+	finally:
+		if os.path.exists(staged):
+			os.remove(staged)
+
+
+def _advance(session: UploadSession, previous: dict, partial: SummaryAccumulator | None, parsed_to: int) -> None:
+	if partial is not None:
+		accumulator = SummaryAccumulator.from_summary(session.summary)
+		accumulator.merge(partial)
+		summary, parts = accumulator.summary(), session.parts + 1
+	else:
+		summary, parts = session.summary, session.parts
+	# Advance only from the state this parse started at, so a range is never
+	# counted twice even if the claim was lost.
+	advanced = UploadSession.objects.filter(id=session.id, **previous).update(
+		summary=summary,
+		parts=parts,
+		bytes_parsed=parsed_to,
+		updated_at=timezone.now(),
+	)
+	if not advanced:
+		session.refresh_from_db()
+		raise UploadError("Upload was changed by another request.")
+	session.summary, session.parts, session.bytes_parsed = summary, parts, parsed_to
+
+
+def finalize_session(session: UploadSession, *, run: bool = True) -> IngestionJob:
+	"""Publish a fully received upload as a Dataset.
+
+	Plain uploads were parsed as they arrived and publish at once. Compressed
+	ones still need a full parse: with ``run`` false their job is left queued
+	for the ingest worker instead of running in this request.
+	"""
+	if not _claim(session):
+		session.refresh_from_db()
+		if session.status == UploadSession.STATUS_RECEIVING:
+			raise UploadError("A chunk of this upload is still being received.")
+		raise UploadError(f"Upload is {session.status}.")
+	try:
+		return _finalize(session, run)
+	finally:
+		_release(session)
+
+
+def _finalize(session: UploadSession, run: bool) -> IngestionJob:
+	if session.bytes_expected is not None and session.bytes_received != session.bytes_expected:
+		raise UploadError(
+			f"Upload is incomplete: {session.bytes_received} of {session.bytes_expected} bytes received."
+		)
+
+	path = session_path(session)
+	upload_encoding = detect_encoding(path)
+	if upload_encoding is None:
+		# What is left (a last line without a trailing newline, or rows a
+		# chunk could not parse yet) is parsed now.
+		if session.bytes_parsed < session.bytes_received:
+			_parse_until(session, session.bytes_received, final=True)
+		accumulator = SummaryAccumulator.from_summary(session.summary)
+		if accumulator.total_count == 0:
+			_fail(session, "CSV is empty.")
+			raise UploadError("CSV is empty.")
+
+	content_hash = hash_path(path)
+	if session.content_hash and session.content_hash != content_hash:
+		_fail(session, "Uploaded bytes do not match the declared sha256.")
+		raise UploadError("Uploaded bytes do not match the declared sha256.")
+
+	def store() -> str:
+		return _store_upload(session, content_hash, upload_encoding)
+
+	name = existing_blob(content_hash) or store()
+
+	if upload_encoding is not None:
+		job = IngestionJob.objects.create(
+			user=session.user,
+			original_filename=session.original_filename,
+			csv_file=name,
+			content_hash=content_hash,
+			bytes_total=session.bytes_received,
+		)
+		ensure_blob(job, store)
+		if run:
+			job = run_job(job)
+		_complete(session, job)
+		return job
+
+	job = IngestionJob.objects.create(
+		user=session.user,
+		original_filename=session.original_filename,
+		csv_file=name,
+		content_hash=content_hash,
+		bytes_total=session.bytes_received,
+		status=IngestionJob.STATUS_RUNNING,
+		started_at=timezone.now(),
+	)
+	ensure_blob(job, store)
+	job = publish(job, StreamedDataset(row_count=accumulator.total_count, summary=accumulator.summary()))
+	_complete(session, job)
+	return job
+
+
+def _store_upload(session: UploadSession, content_hash: str, upload_encoding: str | None) -> str:
+	"""Move the received file (and the sidecar stitched from its parts) to
+	its content address and return the blob name."""
+	path = session_path(session)
+	encoding = stored_encoding(upload_encoding)
+	name = blob_name(content_hash, encoding)
+	target = blob_storage().path(name)
+	os.makedirs(os.path.dirname(target), exist_ok=True)
+	if upload_encoding is None:
+		concat_sidecars(_part_paths(session), sidecar_path(target))
+	if encoding != upload_encoding:
+		with open(path, 'rb') as handle:
+			write_compressed(iter(lambda: handle.read(READ_SIZE), b''), target, encoding)
+	else:
+		os.replace(path, target)
+	return name
+
+
+def abort_session(session: UploadSession) -> None:
+	_discard_files(session)
+	session.delete()
+
+
+def expire_sessions(now=None) -> int:
+	"""Remove open uploads untouched for DATASET_UPLOAD_SESSION_TTL_HOURS and
+	finished ones past the same age; returns how many were removed."""
+	cutoff = (now or timezone.now()) - timedelta(hours=settings.DATASET_UPLOAD_SESSION_TTL_HOURS)
+	stale = list(UploadSession.objects.filter(updated_at__lt=cutoff))
+	for session in stale:
+		abort_session(session)
+	return len(stale)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Dataset, RetentionPolicy
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Retention:
+	max_count: int | None = None
+	max_age_days: int | None = None
+	max_bytes: int | None = None
+
+	@property
+	def is_unbounded(self) -> bool:
+		return self.max_count is None and self.max_age_days is None and self.max_bytes is None
+
+
+def retention_for(user) -> Retention:
+	"""The user's RetentionPolicy, with unset fields taken from settings."""
+	policy = RetentionPolicy.objects.filter(user=user).first()
+
+	def pick(field: str, setting: str):
+		value = getattr(policy, field, None) if policy else None
+		return value if value is not None else getattr(settings, setting)
+
+	return Retention(
+		max_count=pick('max_count', 'DATASET_RETENTION_MAX_COUNT'),
+		max_age_days=pick('max_age_days', 'DATASET_RETENTION_MAX_AGE_DAYS'),
+		max_bytes=pick('max_bytes', 'DATASET_RETENTION_MAX_BYTES'),
+	)
+
+
+def expired_dataset_ids(user, retention: Retention, now: datetime | None = None) -> list[int]:
+	"""Datasets of ``user`` beyond any of the retention limits, newest kept first."""
+	if retention.is_unbounded:
+		return []
+	now = now or timezone.now()
+	cutoff = now - timedelta(days=retention.max_age_days) if retention.max_age_days is not None else None
+
+	# Walks the (user, uploaded_at) index newest first, reading three columns.
+	rows = (
+		Dataset.objects.filter(user=user)
+		.order_by('-uploaded_at', '-id')
+		.values_list('id', 'uploaded_at', 'size_bytes')
+	)
+	expired = []
+	kept_bytes = 0
+	for position, (dataset_id, uploaded_at, size_bytes) in enumerate(rows.iterator()):
+		# Every limit is monotonic in age, so once one dataset is out, so is
+		# everything older.
+		if not expired and not (
+			(retention.max_count is not None and position >= retention.max_count)
+			or (cutoff is not None and uploaded_at < cutoff)
+			or (retention.max_bytes is not None and kept_bytes + size_bytes > retention.max_bytes)
+		):
+			kept_bytes += size_bytes
+			continue
+		expired.append(dataset_id)
+	return expired
+
+
+def sweep_retention(now: datetime | None = None) -> int:
+	"""Delete every user's datasets that fall outside their retention; returns
+	the number deleted."""
+	deleted = 0
+	user_ids = (
+		Dataset.objects.filter(user__isnull=False)
+		.order_by()
+		.values_list('user_id', flat=True)
+		.distinct()
+	)
+	for user_id in list(user_ids):
+		expired = expired_dataset_ids(user_id, retention_for(user_id), now)
+		# Delete one by one so Dataset.delete() also removes the stored files.
+		for dataset in Dataset.objects.filter(id__in=expired):
+			dataset.delete()
+		if expired:
+			logger.info("Retention removed %s datasets of user %s", len(expired), user_id)
+		deleted += len(expired)
+	return deleted
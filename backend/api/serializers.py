@@ -1,13 +1,69 @@
 from rest_framework import serializers
 
-from .models import Dataset
+from .models import Dataset, IngestionJob, UploadSession
+from .stats import column_histograms, strip_sketches
 
 
 class DatasetSerializer(serializers.ModelSerializer):
+    summary = serializers.SerializerMethodField()
+
     class Meta:
         model = Dataset
         fields = ['id', 'uploaded_at', 'original_filename', 'row_count', 'summary']
 
+    def get_summary(self, dataset: Dataset) -> dict:
+        summary = dict(dataset.summary or {})
+        if 'statistics' in summary:
+            # Built from the sketches before they are stripped.
+            summary['histograms'] = column_histograms(summary['statistics'])
+            summary['statistics'] = strip_sketches(summary['statistics'])
+        return summary
+
 
 class DatasetUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
+
+
+class IngestionJobSerializer(serializers.ModelSerializer):
+    dataset_id = serializers.IntegerField(read_only=True, allow_null=True)
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = IngestionJob
+        fields = [
+            'id', 'status', 'original_filename', 'created_at', 'started_at', 'finished_at',
+            'bytes_total', 'bytes_processed', 'rows_processed', 'progress', 'error', 'dataset_id',
+        ]
+
+    def get_progress(self, job: IngestionJob) -> float | None:
+        if job.status == IngestionJob.STATUS_SUCCEEDED:
+            return 1.0
+        if not job.bytes_total:
+            return None
+        return min(job.bytes_processed / job.bytes_total, 1.0)
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=0, required=False, allow_null=True, default=None)
+    sha256 = serializers.RegexField(r'^[0-9a-f]{64}$', required=False, default='')
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    offset = serializers.IntegerField(source='bytes_received', read_only=True)
+    rows_parsed = serializers.SerializerMethodField()
+    job_id = serializers.IntegerField(read_only=True, allow_null=True)
+    dataset_id = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'status', 'original_filename', 'created_at', 'updated_at', 'bytes_expected',
+            'offset', 'bytes_parsed', 'rows_parsed', 'error', 'job_id', 'dataset_id',
+        ]
+
+    def get_rows_parsed(self, session: UploadSession) -> int:
+        return int((session.summary or {}).get('total_count') or 0)
+
+    def get_dataset_id(self, session: UploadSession) -> int | None:
+        return session.job.dataset_id if session.job_id else None
@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_COMPRESSION = 100
+REPORTED_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+HISTOGRAM_BINS = 20
+
+
+def _k_scale(q: np.ndarray, compression: float) -> np.ndarray:
+    # t-digest k1 scale function: clusters are small near the tails and large
+    # around the median, which keeps extreme quantiles accurate.
+    return compression / (2 * math.pi) * np.arcsin(2 * np.clip(q, 0.0, 1.0) - 1)
+
+
+class TDigest:
+    """Mergeable quantile sketch (t-digest with the k1 scale function).
+
+    Centroids are compressed in one vectorized pass, so building a digest from
+    a chunk of values and merging digests are both cheap.
+    """
+
+    def __init__(
+        self,
+        means: np.ndarray | None = None,
+        weights: np.ndarray | None = None,
+        compression: float = DEFAULT_COMPRESSION,
+    ) -> None:
+        self.compression = compression
+        self.means = np.asarray(means if means is not None else [], dtype='float64')
+        self.weights = np.asarray(weights if weights is not None else [], dtype='float64')
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, compression: float = DEFAULT_COMPRESSION) -> TDigest:
+        values = np.sort(np.asarray(values, dtype='float64'))
+        return cls._compressed(values, np.ones_like(values), compression, presorted=True)
+
+    @classmethod
+    def _compressed(
+        cls,
+        means: np.ndarray,
+        weights: np.ndarray,
+        compression: float,
+        presorted: bool = False,
+    ) -> TDigest:
+        if not len(means):
+            return cls(compression=compression)
+
+        if not presorted:
+            order = np.argsort(means)
+            means = means[order]
+            weights = weights[order]
+
+        cumulative = np.cumsum(weights)
+        q_left = (cumulative - weights) / cumulative[-1]
+        k = _k_scale(q_left, compression)
+        bucket = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+
+        merged_weights = np.add.reduceat(weights, starts)
+        merged_means = np.add.reduceat(means * weights, starts) / merged_weights
+        return cls(merged_means, merged_weights, compression)
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def merge(self, other: TDigest) -> TDigest:
+        return self._compressed(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights]),
+            max(self.compression, other.compression),
+        )
+
+    @classmethod
+    def merge_all(cls, digests: Iterable[TDigest]) -> TDigest:
+        """Merge many digests with a single compression pass."""
+        digests = list(digests)
+        if not digests:
+            return cls()
+        return cls._compressed(
+            np.concatenate([d.means for d in digests]),
+            np.concatenate([d.weights for d in digests]),
+            max(d.compression for d in digests),
+        )
+
+    def quantile(self, q: float, *, lower: float, upper: float) -> float | None:
+        if not len(self.means):
+            return None
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        xs = np.concatenate([[0.0], centers, [total]])
+        ys = np.concatenate([[lower], self.means, [upper]])
+        return float(np.interp(q * total, xs, ys))
+
+    def cdf(self, x: np.ndarray, *, lower: float, upper: float) -> np.ndarray:
+        """Fraction of the weight at or below each ``x``; the inverse of
+        ``quantile`` over the same piecewise-linear model."""
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        xs = np.concatenate([[0.0], centers, [total]])
+        ys = np.concatenate([[lower], self.means, [upper]])
+        return np.interp(x, ys, xs) / total
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'compression': self.compression,
+            'means': [float(m) for m in self.means],
+            'weights': [float(w) for w in self.weights],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> TDigest:
+        return cls(data.get('means'), data.get('weights'), data.get('compression', DEFAULT_COMPRESSION))
+
+
+class ColumnStats:
+    """Count, null count, Welford moments, extremes and a quantile sketch for
+    one numeric column. Partials from chunks, workers or datasets combine with
+    ``merge`` without revisiting the rows."""
+
+    def __init__(
+        self,
+        count: int = 0,
+        null_count: int = 0,
+        mean: float = 0.0,
+        m2: float = 0.0,
+        minimum: float | None = None,
+        maximum: float | None = None,
+        digest: TDigest | None = None,
+    ) -> None:
+        self.count = count
+        self.null_count = null_count
+        self.mean = mean
+        self.m2 = m2
+        self.minimum = minimum
+        self.maximum = maximum
+        self.digest = digest if digest is not None else TDigest()
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> ColumnStats:
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+        present = values[~np.isnan(values)]
+        null_count = int(len(values) - len(present))
+        if not len(present):
+            return cls(null_count=null_count)
+
+        mean = float(present.mean())
+        return cls(
+            count=int(len(present)),
+            null_count=null_count,
+            mean=mean,
+            m2=float(((present - mean) ** 2).sum()),
+            minimum=float(present.min()),
+            maximum=float(present.max()),
+            digest=TDigest.from_values(present),
+        )
+
+    def merge(self, other: ColumnStats) -> ColumnStats:
+        return self._merge_moments(other, self.digest.merge(other.digest))
+
+    @classmethod
+    def merge_all(cls, items: Iterable[ColumnStats]) -> ColumnStats:
+        """Like chained ``merge`` calls, but the digests are combined once."""
+        items = list(items)
+        merged = cls()
+        for item in items:
+            merged = merged._merge_moments(item, merged.digest)
+        merged.digest = TDigest.merge_all(item.digest for item in items)
+        return merged
+
+    def _merge_moments(self, other: ColumnStats, digest: TDigest) -> ColumnStats:
+        if not other.count:
+            return ColumnStats(
+                self.count, self.null_count + other.null_count, self.mean, self.m2,
+                self.minimum, self.maximum, self.digest,
+            )
+        if not self.count:
+            return ColumnStats(
+                other.count, self.null_count + other.null_count, other.mean, other.m2,
+                other.minimum, other.maximum, other.digest,
+            )
+
+        # Chan et al. pairwise update of the Welford moments.
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        return ColumnStats(
+            count=count,
+            null_count=self.null_count + other.null_count,
+            mean=self.mean + delta * other.count / count,
+            m2=self.m2 + other.m2 + delta * delta * self.count * other.count / count,
+            minimum=min(self.minimum, other.minimum),
+            maximum=max(self.maximum, other.maximum),
+            digest=digest,
+        )
+
+    @property
+    def variance(self) -> float | None:
+        if self.count < 2:
+            return None
+        return self.m2 / (self.count - 1)
+
+    def quantile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+        return self.digest.quantile(q, lower=self.minimum, upper=self.maximum)
+
+    def histogram(self, bins: int = HISTOGRAM_BINS) -> dict[str, list] | None:
+        """Equal-width bin counts between the extremes, estimated from the
+        sketch, so a chart never needs the rows."""
+        if not self.count:
+            return None
+        if self.maximum == self.minimum:
+            return {'edges': [self.minimum, self.maximum], 'counts': [self.count]}
+        edges = np.linspace(self.minimum, self.maximum, bins + 1)
+        cumulative = self.digest.cdf(edges, lower=self.minimum, upper=self.maximum) * self.count
+        cumulative[0], cumulative[-1] = 0, self.count
+        # Rounding the running total keeps the counts whole and summing to count.
+        counts = np.diff(np.round(cumulative).astype(np.int64))
+        return {'edges': [float(edge) for edge in edges], 'counts': [int(c) for c in counts]}
+
+    def to_dict(self) -> dict[str, Any]:
+        variance = self.variance
+        return {
+            'count': self.count,
+            'null_count': self.null_count,
+            'mean': self.mean if self.count else None,
+            'm2': self.m2,
+            'variance': variance,
+            'std': math.sqrt(variance) if variance is not None else None,
+            'min': self.minimum,
+            'max': self.maximum,
+            'quantiles': {f"p{round(q * 100)}": self.quantile(q) for q in REPORTED_QUANTILES},
+            'sketch': self.digest.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ColumnStats:
+        return cls(
+            count=int(data.get('count') or 0),
+            null_count=int(data.get('null_count') or 0),
+            mean=float(data.get('mean') or 0.0),
+            m2=float(data.get('m2') or 0.0),
+            minimum=data.get('min'),
+            maximum=data.get('max'),
+            digest=TDigest.from_dict(data.get('sketch') or {}),
+        )
+
+
+class FrameStats:
+    """ColumnStats for each numeric column, overall and per equipment type."""
+
+    def __init__(
+        self,
+        columns: dict[str, ColumnStats] | None = None,
+        by_type: dict[str, dict[str, ColumnStats]] | None = None,
+    ) -> None:
+        self.columns = columns or {}
+        self.by_type = by_type or {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, numeric_columns: list[str], types: pd.Series) -> FrameStats:
+        columns = {col: ColumnStats.from_series(df[col]) for col in numeric_columns}
+        by_type = {
+            str(equipment_type): {col: ColumnStats.from_series(group[col]) for col in numeric_columns}
+            for equipment_type, group in df[numeric_columns].groupby(types, sort=False, observed=True)
+        }
+        return cls(columns, by_type)
+
+    @staticmethod
+    def _merge_columns(left: dict[str, ColumnStats], right: dict[str, ColumnStats]) -> dict[str, ColumnStats]:
+        merged = dict(left)
+        for col, stats in right.items():
+            merged[col] = merged[col].merge(stats) if col in merged else stats
+        return merged
+
+    def merge(self, other: FrameStats) -> FrameStats:
+        by_type = dict(self.by_type)
+        for equipment_type, columns in other.by_type.items():
+            by_type[equipment_type] = self._merge_columns(by_type.get(equipment_type, {}), columns)
+        return FrameStats(self._merge_columns(self.columns, other.columns), by_type)
+
+    @classmethod
+    def merge_all(cls, frames: Iterable[FrameStats]) -> FrameStats:
+        columns: dict[str, list[ColumnStats]] = {}
+        by_type: dict[str, dict[str, list[ColumnStats]]] = {}
+        for frame in frames:
+            for col, stats in frame.columns.items():
+                columns.setdefault(col, []).append(stats)
+            for equipment_type, type_columns in frame.by_type.items():
+                for col, stats in type_columns.items():
+                    by_type.setdefault(equipment_type, {}).setdefault(col, []).append(stats)
+        return cls(
+            {col: ColumnStats.merge_all(items) for col, items in columns.items()},
+            {
+                equipment_type: {col: ColumnStats.merge_all(items) for col, items in type_columns.items()}
+                for equipment_type, type_columns in by_type.items()
+            },
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'columns': {col: stats.to_dict() for col, stats in self.columns.items()},
+            'by_type': {
+                equipment_type: {col: stats.to_dict() for col, stats in columns.items()}
+                for equipment_type, columns in self.by_type.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> FrameStats:
+        return cls(
+            {col: ColumnStats.from_dict(stats) for col, stats in (data.get('columns') or {}).items()},
+            {
+                equipment_type: {col: ColumnStats.from_dict(stats) for col, stats in columns.items()}
+                for equipment_type, columns in (data.get('by_type') or {}).items()
+            },
+        )
+
+
+def strip_sketches(statistics: dict[str, Any]) -> dict[str, Any]:
+    """Drop the merge-only fields (sketch centroids, m2) for API responses."""
+
+    def _public(stats: dict[str, Any]) -> dict[str, Any]:
+        return {key: value for key, value in stats.items() if key not in ('sketch', 'm2')}
+
+    return {
+        'columns': {col: _public(stats) for col, stats in (statistics.get('columns') or {}).items()},
+        'by_type': {
+            equipment_type: {col: _public(stats) for col, stats in columns.items()}
+            for equipment_type, columns in (statistics.get('by_type') or {}).items()
+        },
+    }
+
+
+def column_histograms(statistics: dict[str, Any], bins: int = HISTOGRAM_BINS) -> dict[str, dict[str, list]]:
+    """Histograms of the overall columns of stored statistics."""
+    histograms = {}
+    for col, stats in (statistics.get('columns') or {}).items():
+        histogram = ColumnStats.from_dict(stats).histogram(bins)
+        if histogram is not None:
+            histograms[col] = histogram
+    return histograms
@@ -1,8 +1,49 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from benchmarks.synthetic import write_equipment_csv
+
+from . import ingestion, models
+from .analytics import (
+	CsvValidationError,
+	parallel_analyze_csv,
+	parse_and_analyze_csv,
+	split_line_ranges,
+	stream_analyze_csv,
+)
+from .columnar import index_path, load_index, open_sidecar, sidecar_path, write_sidecar
+from .pdf import build_dataset_report_pdf
+from .metrics import Histogram
+from .query import select_rows
+from .query_cache import ByteLRU, query_cache
+from .reports import evict_reports
+from .stats import ColumnStats, FrameStats, column_histograms
+from .models import Dataset, IngestionJob, RetentionPolicy, UploadSession
+from .resumable import UploadError, _parse_until, session_path
+from .retention import Retention, expired_dataset_ids, sweep_retention
+
 
 SAMPLE_CSV = (
 	"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
@@ -39,6 +80,7 @@ class ApiSmokeTests(APITestCase):
 		self.assertEqual(res.status_code, status.HTTP_201_CREATED)
 		dataset_id = res.data['id']
 		self.assertEqual(res.data['row_count'], 2)
+		self.assertEqual(sum(res.data['summary']['histograms']['flowrate']['counts']), 2)
 
 		res = self.client.get('/api/datasets/')
 		self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -86,3 +128,1093 @@ class ApiSmokeTests(APITestCase):
 		res = self.client.get('/api/datasets/')
 		self.assertEqual(res.status_code, status.HTTP_200_OK)
 		self.assertEqual(len(res.data), 0)
+
+
+class ColumnarSidecarTests(APITestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.user = User.objects.create_user(username='tester', password='tester12345')
+		self.client.force_authenticate(user=self.user)
+
+	def _upload(self):
+		upload = SimpleUploadedFile('sample.csv', SAMPLE_CSV.encode('utf-8'), content_type='text/csv')
+		res = self.client.post('/api/datasets/', data={'file': upload}, format='multipart')
+		self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+		return Dataset.objects.get(id=res.data['id'])
+
+	def test_sidecar_written_on_upload_and_removed_on_delete(self):
+		dataset = self._upload()
+		path = sidecar_path(dataset.csv_file.path)
+		self.assertTrue(os.path.exists(path))
+
+		res = self.client.get(f'/api/datasets/{dataset.id}/data/?limit=1&offset=1')
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		self.assertEqual(res.data['total_rows'], 2)
+		self.assertEqual(res.data['rows'], [{
+			'equipment_name': 'Reactor R1',
+			'type': 'Reactor',
+			'flowrate': 45.2,
+			'pressure': 5.8,
+			'temperature': 180.0,
+		}])
+
+		self.client.delete(f'/api/datasets/{dataset.id}/')
+		self.assertFalse(os.path.exists(path))
+
+	def test_missing_sidecar_is_rebuilt_from_csv(self):
+		dataset = self._upload()
+		path = sidecar_path(dataset.csv_file.path)
+		os.remove(path)
+
+		res = self.client.get(f'/api/datasets/{dataset.id}/data/')
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		self.assertEqual(len(res.data['rows']), 2)
+		self.assertTrue(os.path.exists(path))
+		dataset.delete()
+
+	@override_settings(DATASET_INGEST_CHUNKSIZE=2)
+	def test_streamed_and_rebuilt_sidecars_store_the_same_names(self):
+		content = (
+			"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+			"001,1,1.0,1.0,1.0\n"
+			"2,2,1.0,1.0,1.0\n"
+			",3,1.0,1.0,1.0\n"
+			"4,,1.0,1.0,1.0\n"
+		)
+		upload = SimpleUploadedFile('numeric.csv', content.encode('utf-8'), content_type='text/csv')
+		dataset = Dataset.objects.get(id=self.client.post('/api/datasets/', data={'file': upload}, format='multipart').data['id'])
+		path = sidecar_path(dataset.csv_file.path)
+		streamed = open_sidecar(path).select(['equipment_name', 'type']).to_pylist()
+
+		os.remove(path)
+		self.assertEqual(self.client.get(f'/api/datasets/{dataset.id}/data/').status_code, status.HTTP_200_OK)
+		rebuilt = open_sidecar(path).select(['equipment_name', 'type']).to_pylist()
+
+		self.assertEqual(streamed, rebuilt)
+		self.assertEqual([row['equipment_name'] for row in streamed], ['001', '2', 'nan', '4'])
+		self.assertEqual([row['type'] for row in streamed], ['1', '2', '3', 'Unknown'])
+		dataset.delete()
+
+	def test_duplicate_uploads_share_one_blob(self):
+		first = self._upload()
+		self.assertEqual(first.content_hash, hashlib.sha256(SAMPLE_CSV.encode('utf-8')).hexdigest())
+		self.assertTrue(first.csv_file.name.startswith('blobs/'))
+
+		other = get_user_model().objects.create_user(username='other', password='other12345')
+		self.client.force_authenticate(user=other)
+		with mock.patch('api.ingestion._parse') as parse:
+			second = self._upload()
+		parse.assert_not_called()
+		self.assertEqual(second.csv_file.name, first.csv_file.name)
+		self.assertEqual(second.summary, first.summary)
+
+		csv_path = first.csv_file.path
+		first.delete()
+		self.assertTrue(os.path.exists(csv_path))
+		self.assertTrue(os.path.exists(sidecar_path(csv_path)))
+		self.assertEqual(self.client.get(f'/api/datasets/{second.id}/data/').data['total_rows'], 2)
+
+		second.delete()
+		self.assertFalse(os.path.exists(csv_path))
+		self.assertFalse(os.path.exists(sidecar_path(csv_path)))
+
+	def test_release_keeps_a_blob_referenced_after_the_count(self):
+		dataset = self._upload()
+		name, path = dataset.csv_file.name, dataset.csv_file.path
+		is_referenced = models._is_referenced
+
+		def count_then_upload(blob):
+			referenced = is_referenced(blob)
+			if not IngestionJob.objects.filter(original_filename='again.csv').exists():
+				# Another upload of the same bytes records its job right after the first count.
+				IngestionJob.objects.create(user=self.user, original_filename='again.csv', csv_file=blob)
+			return referenced
+
+		with mock.patch('api.models._is_referenced', side_effect=count_then_upload):
+			dataset.delete()
+		self.assertTrue(os.path.exists(path))
+		self.assertTrue(os.path.exists(sidecar_path(path)))
+		self.assertEqual(sorted(os.listdir(os.path.dirname(path))), [os.path.basename(path), os.path.basename(sidecar_path(path))])
+		IngestionJob.objects.filter(original_filename='again.csv').delete()
+		models.release_csv_file(dataset.csv_file.storage, name)
+
+	def test_upload_restores_a_blob_released_after_it_was_found(self):
+		first = self._upload()
+		path = first.csv_file.path
+		find = ingestion.existing_blob
+
+		def find_then_release(content_hash):
+			name = find(content_hash)
+			if Dataset.objects.filter(id=first.id).exists():
+				first.delete()
+			return name
+
+		with mock.patch('api.ingestion.existing_blob', side_effect=find_then_release):
+			second = self._upload()
+		self.assertEqual(second.csv_file.path, path)
+		self.assertTrue(os.path.exists(path))
+		self.assertEqual(self.client.get(f'/api/datasets/{second.id}/data/').data['total_rows'], 2)
+		second.delete()
+
+	def test_concurrent_sidecar_writers_do_not_share_a_temp_file(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+		path = os.path.join(directory, 'data.csv.arrow')
+		frame = pd.DataFrame({'flowrate': np.arange(50_000, dtype='float64')})
+
+		with ThreadPoolExecutor(4) as pool:
+			list(pool.map(lambda _: write_sidecar(frame, path), range(8)))
+		self.assertEqual(os.listdir(directory), ['data.csv.arrow'])
+		self.assertEqual(open_sidecar(path).num_rows, 50_000)
+
+	def test_concurrent_index_builds_keep_mapped_indexes_valid(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+		path = os.path.join(directory, 'data.csv.arrow')
+		write_sidecar(pd.DataFrame({'flowrate': np.random.default_rng(1).random(200_000)}), path)
+		table = open_sidecar(path)
+
+		start = threading.Barrier(4)
+
+		def build(_):
+			start.wait()
+			return load_index(table, path, 'flowrate').values.sum()
+
+		totals = set()
+		with ThreadPoolExecutor(4) as pool:
+			for _ in range(4):
+				# Every round, all four requests find no index and build it.
+				if os.path.exists(index_path(path, 'flowrate')):
+					os.remove(index_path(path, 'flowrate'))
+				totals.update(pool.map(build, range(4)))
+		self.assertEqual(len(totals), 1)
+		self.assertEqual(sorted(os.listdir(directory)), ['data.csv.arrow', 'data.csv.arrow.flowrate.idx'])
+
+
+class StreamingAnalyticsTests(SimpleTestCase):
+	def _write_csv(self, text: str) -> str:
+		handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+		with handle:
+			handle.write(text)
+		self.addCleanup(os.remove, handle.name)
+		return handle.name
+
+	def test_streamed_summary_matches_full_parse(self):
+		path = self._write_csv(
+			SAMPLE_CSV
+			+ "Pump B,Pump,100.0,,70.0\n"
+			+ "Valve V1, Valve ,10.0,1.0,n/a\n"
+			+ "Mystery,,1.0,1.0,1.0\n"
+		)
+		chunks = []
+		streamed = stream_analyze_csv(path, chunksize=2, on_chunk=chunks.append)
+		full = parse_and_analyze_csv(path)
+
+		self.assertEqual(len(chunks), 3)
+		self.assertEqual(streamed.row_count, 5)
+		self.assertEqual(streamed.summary['type_distribution'], full.summary['type_distribution'])
+		self.assertEqual(streamed.summary['type_distribution'], {'Pump': 2, 'Reactor': 1, 'Valve': 1, 'Unknown': 1})
+		for col, value in full.summary['averages'].items():
+			self.assertAlmostEqual(streamed.summary['averages'][col], value)
+
+	def test_types_are_normalized_categoricals(self):
+		path = self._write_csv(SAMPLE_CSV + "Pump B,  Pump ,1.0,1.0,1.0\nMystery,,1.0,1.0,1.0\n")
+		parsed = parse_and_analyze_csv(path)
+
+		self.assertEqual(parsed.df['type'].dtype, 'category')
+		self.assertEqual(parsed.df['equipment_name'].dtype, 'category')
+		self.assertEqual(parsed.type_categories, ['Pump', 'Reactor', 'Unknown'])
+		self.assertEqual(parsed.type_codes.tolist(), [0, 1, 0, 2])
+		self.assertEqual(parsed.summary['type_distribution'], {'Pump': 2, 'Reactor': 1, 'Unknown': 1})
+
+	def test_missing_equipment_name_reads_as_nan(self):
+		path = self._write_csv(SAMPLE_CSV + ",Pump,1.0,1.0,1.0\n")
+		self.assertEqual(parse_and_analyze_csv(path).df['equipment_name'].tolist()[-1], 'nan')
+
+		rows = []
+		stream_analyze_csv(path, chunksize=2, on_chunk=lambda chunk: rows.extend(chunk['equipment_name']))
+		self.assertEqual(rows[-1], 'nan')
+
+	def test_streaming_rejects_empty_and_invalid_files(self):
+		with self.assertRaises(CsvValidationError):
+			stream_analyze_csv(self._write_csv("Equipment Name,Type,Flowrate,Pressure,Temperature\n"))
+		with self.assertRaises(CsvValidationError):
+			stream_analyze_csv(self._write_csv("Name,Type\nPump A,Pump\n"))
+
+
+class ResumableUploadTests(APITestCase):
+	def setUp(self):
+		media_root = tempfile.TemporaryDirectory()
+		self.addCleanup(media_root.cleanup)
+		override = override_settings(MEDIA_ROOT=media_root.name)
+		override.enable()
+		self.addCleanup(override.disable)
+
+		User = get_user_model()
+		self.user = User.objects.create_user(username='tester', password='tester12345')
+		self.client.force_authenticate(user=self.user)
+		self.content = QUERY_CSV.encode('utf-8')
+
+	def tearDown(self):
+		for dataset in Dataset.objects.all():
+			dataset.delete()
+
+	def _put(self, upload_id: int, offset: int, data: bytes, checksum: bytes | None = None):
+		extra = {'HTTP_UPLOAD_OFFSET': str(offset)}
+		if checksum is not None:
+			extra['HTTP_UPLOAD_CHECKSUM'] = f"sha256 {base64.b64encode(checksum).decode()}"
+		return self.client.put(
+			f'/api/uploads/{upload_id}/', data=data, content_type='application/octet-stream', **extra,
+		)
+
+	def test_chunks_are_parsed_as_they_arrive(self):
+		res = self.client.post('/api/uploads/', {'filename': 'week.csv', 'size': len(self.content)}, format='json')
+		self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+		upload_id = res.data['id']
+
+		# Split mid-line: only complete lines are parsed per chunk.
+		first, second = self.content[:90], self.content[90:]
+		res = self._put(upload_id, 0, first, hashlib.sha256(first).digest())
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		self.assertEqual(res['Upload-Offset'], '90')
+		self.assertEqual(res.data['rows_parsed'], 1)
+
+		res = self._put(upload_id, 90, second, hashlib.sha256(b'corrupt').digest())
+		self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+		res = self._put(upload_id, 0, second)
+		self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+		self.assertEqual(res.data['offset'], 90)
+
+		self.assertEqual(self.client.get(f'/api/uploads/{upload_id}/').data['offset'], 90)
+		res = self._put(upload_id, 90, second)
+		self.assertEqual(res.data['rows_parsed'], 6)
+
+		with mock.patch('api.ingestion._parse') as parse:
+			res = self.client.post(f'/api/uploads/{upload_id}/finalize/')
+		parse.assert_not_called()
+		self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+		dataset = Dataset.objects.get(id=res.data['id'])
+		self.assertEqual(dataset.content_hash, hashlib.sha256(self.content).hexdigest())
+		with tempfile.NamedTemporaryFile('wb', suffix='.csv', delete=False) as handle:
+			handle.write(self.content)
+		self.addCleanup(os.remove, handle.name)
+		expected = stream_analyze_csv(handle.name).summary
+		self.assertEqual(dataset.summary['type_distribution'], expected['type_distribution'])
+		self.assertAlmostEqual(dataset.summary['averages']['pressure'], expected['averages']['pressure'])
+
+		table = open_sidecar(sidecar_path(dataset.csv_file.path))
+		self.assertEqual(table.num_rows, 6)
+		self.assertEqual(os.listdir(os.path.dirname(session_path(UploadSession.objects.get(id=upload_id)))), [])
+
+	def test_chunk_ending_inside_a_quoted_field_waits_for_the_rest(self):
+		content = (
+			b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+			b"\"Pump\nA\",Pump,120.5,5.2,110.0\n"
+			b"\"Valve \"\"V1\"\"\",Valve,60.0,4.1,105.0\n"
+		)
+		res = self.client.post('/api/uploads/', {'filename': 'quoted.csv', 'size': len(content)}, format='json')
+		upload_id = res.data['id']
+
+		cut = content.index(b'\nA"') + 1
+		res = self._put(upload_id, 0, content[:cut])
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		self.assertEqual(res.data['rows_parsed'], 0)
+		res = self._put(upload_id, cut, content[cut:])
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		self.assertEqual(res.data['rows_parsed'], 2)
+
+		res = self.client.post(f'/api/uploads/{upload_id}/finalize/')
+		self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+		table = open_sidecar(sidecar_path(Dataset.objects.get(id=res.data['id']).csv_file.path))
+		self.assertEqual(table.column('equipment_name').to_pylist(), ['Pump\nA', 'Valve "V1"'])
+
+	def test_known_content_skips_the_transfer(self):
+		upload = SimpleUploadedFile('week.csv', self.content, content_type='text/csv')
+		dataset_id = self.client.post('/api/datasets/', data={'file': upload}, format='multipart').data['id']
+
+		res = self.client.post(
+			'/api/uploads/',
+			{'filename': 'again.csv', 'sha256': hashlib.sha256(self.content).hexdigest()},
+			format='json',
+		)
+		self.assertEqual(res.data['status'], UploadSession.STATUS_COMPLETE)
+		dataset = Dataset.objects.get(id=res.data['dataset_id'])
+		self.assertNotEqual(dataset.id, dataset_id)
+		self.assertEqual(dataset.csv_file.name, Dataset.objects.get(id=dataset_id).csv_file.name)
+
+	def test_known_content_of_another_user_needs_the_bytes(self):
+		upload = SimpleUploadedFile('week.csv', self.content, content_type='text/csv')
+		self.client.post('/api/datasets/', data={'file': upload}, format='multipart')
+
+		other = get_user_model().objects.create_user(username='other', password='other12345')
+		self.client.force_authenticate(user=other)
+		res = self.client.post(
+			'/api/uploads/',
+			{'filename': 'theirs.csv', 'sha256': hashlib.sha256(self.content).hexdigest()},
+			format='json',
+		)
+		self.assertEqual(res.data['status'], UploadSession.STATUS_OPEN)
+		self.assertIsNone(res.data['dataset_id'])
+		self.assertFalse(Dataset.objects.filter(user=other).exists())
+
+	def test_overlapping_requests_cannot_write_or_parse_twice(self):
+		upload_id = self.client.post('/api/uploads/', {'filename': 'week.csv'}, format='json').data['id']
+		first = self.content[:90]
+
+		# Another request holds the claim: this one neither writes nor finalizes.
+		UploadSession.objects.filter(id=upload_id).update(status=UploadSession.STATUS_RECEIVING)
+		res = self._put(upload_id, 0, first)
+		self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+		self.assertEqual(os.path.getsize(session_path(UploadSession.objects.get(id=upload_id))), 0)
+		self.assertEqual(self.client.post(f'/api/uploads/{upload_id}/finalize/').status_code, status.HTTP_400_BAD_REQUEST)
+
+		UploadSession.objects.filter(id=upload_id).update(status=UploadSession.STATUS_OPEN)
+		stale = UploadSession.objects.get(id=upload_id)
+		self.assertEqual(self._put(upload_id, 0, first).data['rows_parsed'], 1)
+		self.assertEqual(UploadSession.objects.get(id=upload_id).status, UploadSession.STATUS_OPEN)
+
+		# A parse from outdated state must not count the same range again.
+		stale.bytes_received = 90
+		with self.assertRaises(UploadError):
+			_parse_until(stale, 90)
+		session = UploadSession.objects.get(id=upload_id)
+		self.assertEqual((session.parts, session.summary['total_count']), (1, 1))
+		path = session_path(session)
+		self.assertEqual(sorted(os.listdir(os.path.dirname(path))), [os.path.basename(path), f"{os.path.basename(path)}.part0"])
+		self.assertEqual(open_sidecar(f"{path}.part0").num_rows, 1)
+
+	def test_bad_csv_fails_the_upload_at_finalize(self):
+		for content in (b"a,b\n1,2\n", b"Equipment Name,Type,Flowrate,Pressure,Temperature\n\"Pump A,Pump,1,1,1\n"):
+			upload_id = self.client.post('/api/uploads/', {'filename': 'bad.csv'}, format='json').data['id']
+			res = self._put(upload_id, 0, content)
+			self.assertEqual(res.status_code, status.HTTP_200_OK)
+			self.assertEqual(UploadSession.objects.get(id=upload_id).status, UploadSession.STATUS_OPEN)
+
+			res = self.client.post(f'/api/uploads/{upload_id}/finalize/')
+			self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+			self.assertEqual(UploadSession.objects.get(id=upload_id).status, UploadSession.STATUS_FAILED)
+
+
+class CompressedUploadTests(APITestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.user = User.objects.create_user(username='tester', password='tester12345')
+		self.client.force_authenticate(user=self.user)
+		self.content = QUERY_CSV.encode('utf-8')
+		self.compressed = gzip.compress(self.content, mtime=0)
+
+	def tearDown(self):
+		for dataset in Dataset.objects.all():
+			dataset.delete()
+
+	def _upload(self, data: bytes, name: str = 'week.csv.gz'):
+		upload = SimpleUploadedFile(name, data, content_type='application/gzip')
+		return self.client.post('/api/datasets/', data={'file': upload}, format='multipart')
+
+	def _download(self, dataset_id: int, **extra):
+		res = self.client.get(f'/api/datasets/{dataset_id}/csv/', **extra)
+		return res, b''.join(res.streaming_content)
+
+	def test_gzip_upload_is_parsed_and_served_by_accept_encoding(self):
+		res = self._upload(self.compressed)
+		self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+		self.assertEqual(res.data['row_count'], 6)
+		dataset = Dataset.objects.get(id=res.data['id'])
+		self.assertTrue(dataset.csv_file.name.endswith('.csv.gz'))
+		self.assertEqual(dataset.size_bytes, len(self.compressed))
+		self.assertEqual(open_sidecar(sidecar_path(dataset.csv_file.path)).num_rows, 6)
+
+		res, body = self._download(dataset.id, HTTP_ACCEPT_ENCODING='br, gzip;q=0.8')
+		self.assertEqual(res['Content-Encoding'], 'gzip')
+		self.assertIn('Accept-Encoding', res['Vary'])
+		self.assertIn('filename="week.csv"', res['Content-Disposition'])
+		self.assertEqual(body, self.compressed)
+
+		res, body = self._download(dataset.id, HTTP_ACCEPT_ENCODING='gzip;q=0')
+		self.assertNotIn('Content-Encoding', res)
+		self.assertEqual(body, self.content)
+
+	@override_settings(DATASET_STORAGE_COMPRESSION='gzip')
+	def test_plain_uploads_can_be_compressed_at_rest(self):
+		res = self._upload(self.content, 'week.csv')
+		self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+		dataset = Dataset.objects.get(id=res.data['id'])
+		self.assertTrue(dataset.csv_file.name.endswith('.csv.gz'))
+		self.assertEqual(dataset.content_hash, hashlib.sha256(self.content).hexdigest())
+		with dataset.csv_file.open('rb') as handle:
+			self.assertEqual(gzip.decompress(handle.read()), self.content)
+
+		upload_id = self.client.post('/api/uploads/', {'filename': 'week2.csv'}, format='json').data['id']
+		self.client.put(
+			f'/api/uploads/{upload_id}/', data=self.content + b'Pump Z,Pump,1,1,1\n',
+			content_type='application/octet-stream', HTTP_UPLOAD_OFFSET='0',
+		)
+		res = self.client.post(f'/api/uploads/{upload_id}/finalize/')
+		self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+		dataset = Dataset.objects.get(id=res.data['id'])
+		self.assertTrue(dataset.csv_file.name.endswith('.csv.gz'))
+		self.assertEqual(open_sidecar(sidecar_path(dataset.csv_file.path)).num_rows, 7)
+
+	def test_resumable_gzip_upload_is_parsed_on_finalize(self):
+		upload_id = self.client.post('/api/uploads/', {'filename': 'week.csv.gz'}, format='json').data['id']
+		half = len(self.compressed) // 2
+		for offset, chunk in ((0, self.compressed[:half]), (half, self.compressed[half:])):
+			res = self.client.put(
+				f'/api/uploads/{upload_id}/', data=chunk,
+				content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+			)
+			self.assertEqual(res.status_code, status.HTTP_200_OK)
+			self.assertEqual(res.data['rows_parsed'], 0)
+
+		res = self.client.post(f'/api/uploads/{upload_id}/finalize/')
+		self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+		self.assertEqual(res.data['row_count'], 6)
+
+	def test_resumable_gzip_upload_can_be_ingested_async(self):
+		upload_id = self.client.post('/api/uploads/', {'filename': 'week.csv.gz'}, format='json').data['id']
+		self.client.put(
+			f'/api/uploads/{upload_id}/', data=self.compressed,
+			content_type='application/octet-stream', HTTP_UPLOAD_OFFSET='0',
+		)
+
+		with mock.patch('api.ingestion._parse') as parse:
+			res = self.client.post(f'/api/uploads/{upload_id}/finalize/', HTTP_PREFER='respond-async')
+		parse.assert_not_called()
+		self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+		self.assertEqual(res.data['status'], 'queued')
+		self.assertEqual(self.client.get(f'/api/uploads/{upload_id}/').data['status'], UploadSession.STATUS_COMPLETE)
+
+		call_command('ingest_worker', once=True, stdout=StringIO())
+		dataset_id = self.client.get(f'/api/uploads/{upload_id}/').data['dataset_id']
+		self.assertEqual(Dataset.objects.get(id=dataset_id).row_count, 6)
+
+
+class AsyncIngestionTests(APITestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.user = User.objects.create_user(username='tester', password='tester12345')
+		self.client.force_authenticate(user=self.user)
+
+	def _post(self, content: bytes):
+		upload = SimpleUploadedFile('sample.csv', content, content_type='text/csv')
+		return self.client.post(
+			'/api/datasets/',
+			data={'file': upload},
+			format='multipart',
+			HTTP_PREFER='respond-async',
+		)
+
+	def test_async_upload_is_processed_by_worker(self):
+		res = self._post(SAMPLE_CSV.encode('utf-8'))
+		self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+		job_id = res.data['id']
+		self.assertEqual(res.data['status'], 'queued')
+		self.assertEqual(self.client.get('/api/datasets/').data, [])
+
+		call_command('ingest_worker', once=True, stdout=StringIO())
+
+		res = self.client.get(f'/api/ingest-jobs/{job_id}/')
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		self.assertEqual(res.data['status'], 'succeeded')
+		self.assertEqual(res.data['rows_processed'], 2)
+		self.assertEqual(res.data['progress'], 1.0)
+
+		dataset = Dataset.objects.get(id=res.data['dataset_id'])
+		self.assertEqual(dataset.row_count, 2)
+		self.assertTrue(os.path.exists(sidecar_path(dataset.csv_file.path)))
+		dataset.delete()
+
+	def test_async_failure_is_reported_on_job(self):
+		res = self._post(b"Name,Type\nPump A,Pump\n")
+		self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+
+		call_command('ingest_worker', once=True, stderr=StringIO())
+
+		res = self.client.get(f"/api/ingest-jobs/{res.data['id']}/")
+		self.assertEqual(res.data['status'], 'failed')
+		self.assertIn('Missing required columns', res.data['error'])
+		self.assertIsNone(res.data['dataset_id'])
+
+
+class MergeableStatisticsTests(SimpleTestCase):
+	def test_merged_partials_match_single_pass(self):
+		values = pd.Series(np.random.default_rng(7).normal(50.0, 5.0, 10_000))
+		values.iloc[::100] = np.nan
+
+		merged = ColumnStats()
+		for part in np.array_split(values.to_numpy(), 9):
+			merged = merged.merge(ColumnStats.from_series(pd.Series(part)))
+		single = ColumnStats.from_series(values)
+
+		self.assertEqual(merged.count, single.count)
+		self.assertEqual(merged.null_count, 100)
+		self.assertAlmostEqual(merged.mean, values.mean())
+		self.assertAlmostEqual(merged.variance, values.var())
+		self.assertEqual((merged.minimum, merged.maximum), (values.min(), values.max()))
+		self.assertAlmostEqual(merged.quantile(0.5), values.median(), delta=0.5)
+
+		parts = [ColumnStats.from_series(pd.Series(part)) for part in np.array_split(values.to_numpy(), 9)]
+		merged_all = ColumnStats.merge_all(parts)
+		self.assertEqual((merged_all.count, merged_all.null_count), (merged.count, merged.null_count))
+		self.assertAlmostEqual(merged_all.variance, values.var())
+		self.assertAlmostEqual(merged_all.quantile(0.5), values.median(), delta=0.5)
+
+	def test_summary_statistics_round_trip(self):
+		handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+		with handle:
+			handle.write(SAMPLE_CSV + "Pump B,Pump,100.5,3.3,75.0\n")
+		self.addCleanup(os.remove, handle.name)
+
+		summary = stream_analyze_csv(handle.name, chunksize=1).summary
+		stats = FrameStats.from_dict(summary['statistics'])
+
+		self.assertEqual(stats.columns['flowrate'].count, 3)
+		self.assertEqual(stats.by_type['Pump']['pressure'].count, 2)
+		self.assertAlmostEqual(stats.by_type['Pump']['flowrate'].mean, 110.5)
+		self.assertAlmostEqual(stats.by_type['Pump']['flowrate'].variance, 200.0)
+		self.assertEqual(stats.by_type['Reactor']['temperature'].maximum, 180.0)
+
+	def test_histogram_from_sketch_matches_rows(self):
+		values = np.random.default_rng(3).gamma(2.0, 10.0, 50_000)
+		stats = ColumnStats.merge_all(ColumnStats.from_series(pd.Series(part)) for part in np.array_split(values, 7))
+
+		histogram = stats.histogram(20)
+		expected, edges = np.histogram(values, bins=20)
+		np.testing.assert_allclose(histogram['edges'], edges)
+		self.assertEqual(sum(histogram['counts']), len(values))
+		self.assertLess(np.abs(np.array(histogram['counts']) - expected).max(), 0.01 * len(values))
+
+		constant = ColumnStats.from_series(pd.Series([4.0, 4.0, 4.0]))
+		self.assertEqual(constant.histogram(), {'edges': [4.0, 4.0], 'counts': [3]})
+		self.assertEqual(column_histograms({'columns': {'flowrate': ColumnStats().to_dict()}}), {})
+
+
+class ParallelParseTests(SimpleTestCase):
+	def setUp(self):
+		rows = [
+			f"Unit {i},{['Pump', 'Reactor', ' Valve'][i % 3]},{i * 1.5},{i % 7},{100 + i}\n"
+			for i in range(500)
+		]
+		handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+		with handle:
+			handle.write("Equipment Name,Type,Flowrate,Pressure,Temperature\n" + ''.join(rows))
+		self.path = handle.name
+		self.addCleanup(os.remove, self.path)
+
+	def test_ranges_cover_file_on_line_boundaries(self):
+		header, ranges = split_line_ranges(self.path, 4)
+		self.assertEqual(header, b"Equipment Name,Type,Flowrate,Pressure,Temperature\n")
+		self.assertEqual(len(ranges), 4)
+		self.assertEqual(ranges[0][0], len(header))
+		self.assertEqual(ranges[-1][1], os.path.getsize(self.path))
+		with open(self.path, 'rb') as handle:
+			data = handle.read()
+		for start, end in ranges:
+			self.assertEqual(data[start - 1:start], b"\n")
+
+	def test_parallel_matches_streaming(self):
+		sidecar = f"{self.path}.arrow"
+		self.addCleanup(lambda: os.path.exists(sidecar) and os.remove(sidecar))
+
+		parallel = parallel_analyze_csv(self.path, workers=3, chunksize=64, sidecar=sidecar)
+		streamed = stream_analyze_csv(self.path, chunksize=64)
+
+		self.assertEqual(parallel.row_count, 500)
+		self.assertEqual(parallel.summary['type_distribution'], streamed.summary['type_distribution'])
+		for col, value in streamed.summary['averages'].items():
+			self.assertAlmostEqual(parallel.summary['averages'][col], value)
+
+		table = open_sidecar(sidecar)
+		self.assertEqual(table.num_rows, 500)
+		self.assertEqual(table.column('equipment_name').to_pylist()[:3], ['Unit 0', 'Unit 1', 'Unit 2'])
+		self.assertEqual(table.column('equipment_name').to_pylist()[-1], 'Unit 499')
+
+	def test_parses_of_one_blob_use_their_own_parts(self):
+		# Two ingestion jobs for the same content hash share the sidecar path;
+		# neither may stitch or remove the other's parts.
+		sidecar = f"{self.path}.arrow"
+		self.addCleanup(lambda: os.path.exists(sidecar) and os.remove(sidecar))
+
+		used = []
+		with mock.patch('api.analytics.concat_sidecars', side_effect=lambda parts, path: used.append(set(parts))):
+			for _ in range(2):
+				parallel_analyze_csv(self.path, workers=3, chunksize=64, sidecar=sidecar)
+		self.assertEqual(len(used[0]), 3)
+		self.assertFalse(used[0] & used[1])
+
+
+class SyntheticDataTests(SimpleTestCase):
+	def test_generated_csv_parses_with_requested_rows(self):
+		handle = tempfile.NamedTemporaryFile(suffix='.csv', delete=False)
+		handle.close()
+		self.addCleanup(os.remove, handle.name)
+
+		write_equipment_csv(handle.name, 2_500, seed=1)
+		parsed = stream_analyze_csv(handle.name, chunksize=1_000)
+
+		self.assertEqual(parsed.row_count, 2_500)
+		self.assertNotIn(' Pump ', parsed.summary['type_distribution'])
+		self.assertGreater(parsed.summary['statistics']['columns']['pressure']['null_count'], 0)
+
+
+QUERY_CSV = (
+	"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+	"Pump A,Pump,120.5,2.3,65.0\n"
+	"Reactor R1,Reactor,45.2,5.8,180.0\n"
+	"Reactor R2,Reactor,50.0,7.5,200.0\n"
+	"Reactor R3,Reactor,55.0,,210.0\n"
+	"Valve V1,Valve,10.0,6.1,40.0\n"
+	"Pump B,Pump,130.0,4.0,70.0\n"
+)
+
+
+class DatasetQueryTests(APITestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.user = User.objects.create_user(username='tester', password='tester12345')
+		self.client.force_authenticate(user=self.user)
+		upload = SimpleUploadedFile('query.csv', QUERY_CSV.encode('utf-8'), content_type='text/csv')
+		res = self.client.post('/api/datasets/', data={'file': upload}, format='multipart')
+		self.dataset_id = res.data['id']
+		self.addCleanup(lambda: Dataset.objects.get(id=self.dataset_id).delete())
+
+	def _get(self, query: str):
+		return self.client.get(f'/api/datasets/{self.dataset_id}/data/?{query}')
+
+	def _names(self, res):
+		return [row['equipment_name'] for row in res.data['rows']]
+
+	def test_selections_are_cached_until_delete(self):
+		query_cache.clear()
+		with mock.patch('api.query_cache.select_rows', wraps=select_rows) as select:
+			first = self._get('sort=type,-pressure&limit=2')
+			second = self._get('sort=type,-pressure&limit=2&offset=2')
+			self._get('sort=-type&limit=2')
+		self.assertEqual(select.call_count, 2)
+		self.assertEqual(self._names(first) + self._names(second), self._names(self._get('sort=type,-pressure&limit=4')))
+		stats = query_cache.stats()
+		self.assertGreaterEqual(stats['hits'], 2)
+		self.assertEqual(stats['entries'], 3)
+
+		other = SimpleUploadedFile('other.csv', SAMPLE_CSV.encode('utf-8'), content_type='text/csv')
+		other_id = self.client.post('/api/datasets/', data={'file': other}, format='multipart').data['id']
+		self.client.get(f'/api/datasets/{other_id}/data/?sort=type,-pressure')
+		self.client.delete(f'/api/datasets/{other_id}/')
+		self.assertEqual(query_cache.stats()['entries'], 3)
+
+	def test_cache_evicts_least_recently_used_bytes(self):
+		cache = ByteLRU(lambda: 10)
+		for key in 'abc':
+			cache.get_or_create(key, lambda: key, lambda value: 4)
+		cache.get_or_create('x', lambda: 'big', lambda value: 11)
+		self.assertEqual(cache.stats(), {'entries': 2, 'bytes': 8, 'hits': 0, 'misses': 4, 'evictions': 1})
+		self.assertEqual(cache.get_or_create('b', lambda: 'new', len), 'b')
+
+	def test_pages_are_gzipped_when_accepted(self):
+		res = self.client.get(f'/api/datasets/{self.dataset_id}/data/?limit=10', HTTP_ACCEPT_ENCODING='gzip')
+		self.assertEqual(res['Content-Encoding'], 'gzip')
+		self.assertEqual(json.loads(gzip.decompress(res.content))['total_rows'], 6)
+		etag = res['ETag']
+		res = self.client.get(f'/api/datasets/{self.dataset_id}/data/?limit=10', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+	def test_range_and_equality_filters(self):
+		res = self._get('type=Reactor&pressure__gt=5')
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		self.assertEqual(res.data['total_rows'], 2)
+		self.assertEqual(self._names(res), ['Reactor R1', 'Reactor R2'])
+
+		res = self._get('pressure__gte=4&pressure__lte=6.1&temperature__lt=100')
+		self.assertEqual(self._names(res), ['Valve V1', 'Pump B'])
+
+		res = self._get('equipment_name__prefix=Pump&equipment_name__prefix=Valve')
+		self.assertEqual(self._names(res), ['Pump A', 'Valve V1', 'Pump B'])
+
+	def test_sort_and_projection(self):
+		res = self._get('sort=-pressure&columns=equipment_name,pressure&limit=3')
+		self.assertEqual(res.data['columns'], ['equipment_name', 'pressure'])
+		self.assertEqual(res.data['total_rows'], 6)
+		self.assertEqual(res.data['rows'], [
+			{'equipment_name': 'Reactor R2', 'pressure': 7.5},
+			{'equipment_name': 'Valve V1', 'pressure': 6.1},
+			{'equipment_name': 'Reactor R1', 'pressure': 5.8},
+		])
+
+		res = self._get('sort=pressure&offset=5')
+		self.assertEqual(self._names(res), ['Reactor R3'])
+
+		res = self._get('type=Reactor&sort=-temperature')
+		self.assertEqual(self._names(res), ['Reactor R3', 'Reactor R2', 'Reactor R1'])
+
+	def test_invalid_queries_are_rejected(self):
+		for query in ('pressure=5', 'pressure__gt=high', 'type__gt=A', 'sort=nope', 'columns=x'):
+			res = self._get(query)
+			self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, query)
+
+	def test_parameters_naming_no_column_are_ignored(self):
+		res = self._get('_=1697600000&type=Reactor')
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		self.assertEqual(self._names(res), ['Reactor R1', 'Reactor R2', 'Reactor R3'])
+
+	def test_cursor_pagination_walks_sorted_results(self):
+		names = []
+		res = self._get('sort=-flowrate&limit=4')
+		self.assertIsNone(res.data['prev_cursor'])
+		names += self._names(res)
+		res = self._get(f"sort=-flowrate&limit=4&cursor={res.data['next_cursor']}")
+		names += self._names(res)
+		self.assertIsNone(res.data['next_cursor'])
+		self.assertEqual(names, ['Pump B', 'Pump A', 'Reactor R3', 'Reactor R2', 'Reactor R1', 'Valve V1'])
+
+		res = self._get(f"sort=-flowrate&limit=4&cursor={res.data['prev_cursor']}")
+		self.assertEqual(res.data['offset'], 0)
+
+	def test_cursor_is_tied_to_order_and_signed(self):
+		res = self._get('sort=pressure&limit=2')
+		cursor = res.data['next_cursor']
+		self.assertEqual(self._get(f'sort=temperature&cursor={cursor}').status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(self._get(f'sort=pressure&cursor={cursor}x').status_code, status.HTTP_400_BAD_REQUEST)
+
+	def _export(self, query: str):
+		res = self.client.get(f'/api/datasets/{self.dataset_id}/export/?{query}')
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		return res, b''.join(res.streaming_content)
+
+	def test_export_formats_stream_filtered_rows(self):
+		res, body = self._export('format=ndjson&type=Pump&columns=equipment_name,flowrate')
+		self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+		self.assertEqual(
+			[json.loads(line) for line in body.splitlines()],
+			[{'equipment_name': 'Pump A', 'flowrate': 120.5}, {'equipment_name': 'Pump B', 'flowrate': 130.0}],
+		)
+
+		res, body = self._export('format=csv&sort=-temperature&columns=equipment_name,pressure')
+		lines = body.decode('utf-8').splitlines()
+		self.assertEqual(lines[0], '"equipment_name","pressure"')
+		self.assertEqual(lines[1:3], ['"Reactor R3",', '"Reactor R2",7.5'])
+		self.assertEqual(len(lines), 7)
+
+		res, body = self._export('format=arrow&pressure__lt=5')
+		table = pa.ipc.open_stream(body).read_all()
+		self.assertEqual(table.column('equipment_name').to_pylist(), ['Pump A', 'Pump B'])
+
+	def test_export_rejects_unknown_format(self):
+		res = self.client.get(f'/api/datasets/{self.dataset_id}/export/?format=xml')
+		self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DatasetCompareTests(APITestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.user = User.objects.create_user(username='tester', password='tester12345')
+		self.client.force_authenticate(user=self.user)
+		self.ids = []
+		for name, content in (('week1.csv', SAMPLE_CSV), ('week2.csv', QUERY_CSV)):
+			upload = SimpleUploadedFile(name, content.encode('utf-8'), content_type='text/csv')
+			self.ids.append(self.client.post('/api/datasets/', data={'file': upload}, format='multipart').data['id'])
+
+	def tearDown(self):
+		for dataset in Dataset.objects.filter(id__in=self.ids):
+			dataset.delete()
+
+	def test_compare_merges_stored_summaries(self):
+		# Raw files are not needed: everything comes from the stored summaries.
+		for dataset in Dataset.objects.filter(id__in=self.ids):
+			os.remove(dataset.csv_file.path)
+
+		res = self.client.get(f'/api/datasets/compare/?ids={self.ids[0]},{self.ids[1]}')
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		self.assertEqual(res.data['baseline_id'], self.ids[0])
+
+		with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+			handle.write(SAMPLE_CSV + QUERY_CSV.split('\n', 1)[1])
+		self.addCleanup(os.remove, handle.name)
+		expected = parse_and_analyze_csv(handle.name).summary
+
+		combined = res.data['combined']
+		self.assertEqual(combined['total_count'], expected['total_count'])
+		self.assertEqual(combined['type_distribution'], expected['type_distribution'])
+		for col in ('flowrate', 'pressure', 'temperature'):
+			self.assertAlmostEqual(combined['averages'][col], expected['averages'][col])
+			self.assertAlmostEqual(
+				combined['statistics']['columns'][col]['std'],
+				expected['statistics']['columns'][col]['std'],
+			)
+		self.assertNotIn('sketch', combined['statistics']['columns']['pressure'])
+
+		week1, week2 = res.data['datasets']
+		self.assertEqual(week1['delta']['total_count'], 0)
+		self.assertEqual(week2['delta']['total_count'], 4)
+		self.assertEqual(week2['delta']['type_distribution'], {'Pump': 1, 'Reactor': 2, 'Valve': 1})
+		self.assertAlmostEqual(week2['delta']['type_means']['Pump']['pressure'], (2.3 + 4.0) / 2 - 2.3)
+		self.assertIsNone(week2['delta']['type_means']['Valve']['pressure'])
+
+	def test_compare_baseline_and_errors(self):
+		res = self.client.get(f'/api/datasets/compare/?ids={self.ids[0]},{self.ids[1]}&baseline={self.ids[1]}')
+		self.assertEqual(res.data['datasets'][0]['delta']['total_count'], -4)
+		self.assertEqual(
+			self.client.get(f'/api/datasets/compare/?ids={self.ids[0]}&baseline={self.ids[1]}').status_code,
+			status.HTTP_400_BAD_REQUEST,
+		)
+		self.assertEqual(self.client.get('/api/datasets/compare/?uploaded_from=nope').status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(self.client.get('/api/datasets/compare/?ids=999').status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RetentionTests(APITestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.user = User.objects.create_user(username='tester', password='tester12345')
+		self.client.force_authenticate(user=self.user)
+		self.ids = []
+		for i in range(7):
+			upload = SimpleUploadedFile(f'week{i}.csv', SAMPLE_CSV.encode('utf-8'), content_type='text/csv')
+			self.ids.append(self.client.post('/api/datasets/', data={'file': upload}, format='multipart').data['id'])
+		# Newest last: dataset i is 6.5 - i days old.
+		now = timezone.now()
+		for i, dataset_id in enumerate(self.ids):
+			Dataset.objects.filter(id=dataset_id).update(uploaded_at=now - timedelta(days=6 - i, hours=12))
+
+	def tearDown(self):
+		for dataset in Dataset.objects.all():
+			dataset.delete()
+
+	def test_uploads_are_kept_until_swept(self):
+		self.assertEqual(Dataset.objects.filter(user=self.user).count(), 7)
+		self.assertEqual(Dataset.objects.get(id=self.ids[0]).size_bytes, len(SAMPLE_CSV))
+
+		with override_settings(DATASET_RETENTION_MAX_COUNT=5):
+			self.assertEqual(sweep_retention(), 2)
+		self.assertEqual(list(Dataset.objects.order_by('uploaded_at').values_list('id', flat=True)), self.ids[2:])
+
+	def test_age_bytes_and_per_user_policy(self):
+		retention = Retention(max_age_days=3)
+		self.assertEqual(sorted(expired_dataset_ids(self.user, retention)), self.ids[:4])
+		retention = Retention(max_bytes=len(SAMPLE_CSV) * 2)
+		self.assertEqual(sorted(expired_dataset_ids(self.user, retention)), self.ids[:5])
+
+		RetentionPolicy.objects.create(user=self.user, max_count=1)
+		with override_settings(DATASET_RETENTION_MAX_COUNT=None):
+			call_command('sweep_datasets', '--once', stdout=StringIO())
+		self.assertEqual(list(Dataset.objects.values_list('id', flat=True)), [self.ids[-1]])
+
+	def test_list_is_paginated_with_headers(self):
+		res = self.client.get('/api/datasets/')
+		self.assertEqual([d['id'] for d in res.data], self.ids[::-1][:5])
+		self.assertEqual(res['X-Total-Count'], '7')
+		self.assertIn('offset=5', res['Link'])
+		self.assertIn('rel="next"', res['Link'])
+
+		res = self.client.get('/api/datasets/?limit=5&offset=5')
+		self.assertEqual([d['id'] for d in res.data], self.ids[1::-1])
+		self.assertNotIn('rel="next"', res['Link'])
+		self.assertIn('rel="prev"', res['Link'])
+
+	def test_malformed_paging_params_are_rejected(self):
+		for query in ('limit=abc', 'offset=1.5', 'limit='):
+			res = self.client.get(f'/api/datasets/?{query}')
+			self.assertEqual(res.status_code, 400, query)
+		res = self.client.get(f'/api/datasets/{self.ids[-1]}/data/?limit=ten')
+		self.assertEqual(res.status_code, 400)
+
+
+class ReportCacheTests(APITestCase):
+	def setUp(self):
+		cache_dir = tempfile.TemporaryDirectory()
+		self.addCleanup(cache_dir.cleanup)
+		self.cache_dir = cache_dir.name
+		override = override_settings(REPORT_CACHE_DIR=self.cache_dir)
+		override.enable()
+		self.addCleanup(override.disable)
+
+		User = get_user_model()
+		self.user = User.objects.create_user(username='tester', password='tester12345')
+		self.client.force_authenticate(user=self.user)
+		upload = SimpleUploadedFile('query.csv', QUERY_CSV.encode('utf-8'), content_type='text/csv')
+		self.dataset_id = self.client.post('/api/datasets/', data={'file': upload}, format='multipart').data['id']
+
+	def _report(self) -> bytes:
+		res = self.client.get(f'/api/datasets/{self.dataset_id}/report/')
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		return b''.join(res.streaming_content)
+
+	def test_report_rendered_once_and_invalidated_on_delete(self):
+		with mock.patch('api.reports.build_dataset_report_pdf', wraps=build_dataset_report_pdf) as build:
+			first = self._report()
+			second = self._report()
+		self.assertTrue(first.startswith(b'%PDF'))
+		self.assertEqual(first, second)
+		self.assertEqual(build.call_count, 1)
+		self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+		self.client.delete(f'/api/datasets/{self.dataset_id}/')
+		self.assertEqual(os.listdir(self.cache_dir), [])
+
+	def test_report_revalidates_without_rendering(self):
+		res = self.client.get(f'/api/datasets/{self.dataset_id}/report/')
+		etag = res['ETag']
+		body = b''.join(res.streaming_content)
+		self.assertEqual(res['Accept-Ranges'], 'bytes')
+
+		with mock.patch('api.reports.build_dataset_report_pdf') as build:
+			res = self.client.get(f'/api/datasets/{self.dataset_id}/report/', HTTP_IF_NONE_MATCH=etag)
+		build.assert_not_called()
+		self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+		self.assertEqual(res['ETag'], etag)
+
+		res = self.client.get(f'/api/datasets/{self.dataset_id}/report/', HTTP_RANGE='bytes=4-', HTTP_IF_RANGE=etag)
+		self.assertEqual(res.status_code, status.HTTP_206_PARTIAL_CONTENT)
+		self.assertEqual(b''.join(res.streaming_content), body[4:])
+		Dataset.objects.get(id=self.dataset_id).delete()
+
+	def test_eviction_drops_least_recently_used(self):
+		for i, name in enumerate(['1-a-v2.pdf', '2-b-v2.pdf', '3-c-v2.pdf']):
+			path = os.path.join(self.cache_dir, name)
+			with open(path, 'wb') as handle:
+				handle.write(b'x' * 100)
+			os.utime(path, (1000 + i, 1000 + i))
+
+		evict_reports(250)
+		self.assertEqual(sorted(os.listdir(self.cache_dir)), ['2-b-v2.pdf', '3-c-v2.pdf'])
+		Dataset.objects.get(id=self.dataset_id).delete()
+
+	def _upload_another(self) -> int:
+		upload = SimpleUploadedFile('query2.csv', QUERY_CSV.encode('utf-8'), content_type='text/csv')
+		return self.client.post('/api/datasets/', data={'file': upload}, format='multipart').data['id']
+
+	def test_batch_report_zip(self):
+		other_id = self._upload_another()
+		res = self.client.get(f'/api/datasets/reports/?ids={self.dataset_id},{other_id}')
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		self.assertEqual(res['X-Report-Count'], '2')
+		with zipfile.ZipFile(BytesIO(b''.join(res.streaming_content))) as archive:
+			self.assertEqual(
+				sorted(archive.namelist()),
+				sorted([f'dataset_{self.dataset_id}_report.pdf', f'dataset_{other_id}_report.pdf']),
+			)
+			self.assertTrue(archive.read(f'dataset_{other_id}_report.pdf').startswith(b'%PDF'))
+
+		today = Dataset.objects.get(id=self.dataset_id).uploaded_at.date().isoformat()
+		res = self.client.get(f'/api/datasets/reports/?uploaded_from={today}&uploaded_to={today}')
+		self.assertEqual(res['X-Report-Count'], '2')
+		self.assertEqual(self.client.get('/api/datasets/reports/').status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(self.client.get('/api/datasets/reports/?ids=999').status_code, status.HTTP_404_NOT_FOUND)
+		Dataset.objects.get(id=other_id).delete()
+		Dataset.objects.get(id=self.dataset_id).delete()
+
+	def test_batch_reports_command_renders_in_pool(self):
+		other_id = self._upload_another()
+		output = os.path.join(self.cache_dir, 'out.zip')
+		call_command('batch_reports', output, '--user', 'tester', '--workers', '2', stdout=StringIO())
+		with zipfile.ZipFile(output) as archive:
+			self.assertEqual(len(archive.namelist()), 2)
+			self.assertIsNone(archive.testzip())
+		self.assertEqual(len([n for n in os.listdir(self.cache_dir) if n.endswith('.pdf')]), 2)
+		Dataset.objects.get(id=other_id).delete()
+		Dataset.objects.get(id=self.dataset_id).delete()
+
+
+class HttpCachingTests(APITestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.user = User.objects.create_user(username='tester', password='tester12345')
+		self.client.force_authenticate(user=self.user)
+		self.content = QUERY_CSV.encode('utf-8')
+		upload = SimpleUploadedFile('query.csv', self.content, content_type='text/csv')
+		self.dataset_id = self.client.post('/api/datasets/', data={'file': upload}, format='multipart').data['id']
+
+	def tearDown(self):
+		for dataset in Dataset.objects.all():
+			dataset.delete()
+
+	def test_detail_and_data_answer_304_until_renamed(self):
+		url = f'/api/datasets/{self.dataset_id}/'
+		res = self.client.get(url)
+		etag = res['ETag']
+		self.assertIn('no-cache', res['Cache-Control'])
+		res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+		res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=res['Last-Modified'])
+		self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+		data_url = f'/api/datasets/{self.dataset_id}/data/?sort=-pressure'
+		data_etag = self.client.get(data_url)['ETag']
+		self.assertEqual(self.client.get(data_url, HTTP_IF_NONE_MATCH=data_etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+		res = self.client.patch(url, {'original_filename': 'renamed.csv'}, format='json', HTTP_IF_MATCH=etag)
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		self.assertNotEqual(res['ETag'], etag)
+		res = self.client.patch(url, {'original_filename': 'again.csv'}, format='json', HTTP_IF_MATCH=etag)
+		self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+		res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		self.assertEqual(res.data['original_filename'], 'renamed.csv')
+
+	def test_csv_download_ranges(self):
+		url = f'/api/datasets/{self.dataset_id}/csv/'
+		res = self.client.get(url)
+		etag = res['ETag']
+		self.assertEqual(res['Accept-Ranges'], 'bytes')
+		self.assertEqual(b''.join(res.streaming_content), self.content)
+
+		res = self.client.get(url, HTTP_RANGE='bytes=10-19')
+		self.assertEqual(res.status_code, status.HTTP_206_PARTIAL_CONTENT)
+		self.assertEqual(res['Content-Range'], f'bytes 10-19/{len(self.content)}')
+		self.assertEqual(b''.join(res.streaming_content), self.content[10:20])
+
+		res = self.client.get(url, HTTP_RANGE='bytes=-5', HTTP_IF_RANGE=etag)
+		self.assertEqual(b''.join(res.streaming_content), self.content[-5:])
+
+		res = self.client.get(url, HTTP_RANGE='bytes=-5', HTTP_IF_RANGE='"stale"')
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		self.assertEqual(b''.join(res.streaming_content), self.content)
+
+		res = self.client.get(url, HTTP_RANGE=f'bytes={len(self.content)}-')
+		self.assertEqual(res.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+		self.assertEqual(res['Content-Range'], f'bytes */{len(self.content)}')
+
+		self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class MetricsTests(APITestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.user = User.objects.create_user(username='tester', password='tester12345')
+		self.admin = User.objects.create_user(username='admin', password='admin12345', is_staff=True)
+		self.client.force_authenticate(user=self.user)
+
+	def test_histogram_buckets_are_cumulative(self):
+		histogram = Histogram('test_seconds', 'Test.', ('span',), buckets=(0.1, 1.0))
+		for seconds in (0.05, 0.1, 0.5, 3.0):
+			histogram.observe(seconds, 'a')
+		lines = list(histogram.samples())
+		self.assertEqual(lines[:3], [
+			'test_seconds_bucket{span="a",le="0.1"} 2',
+			'test_seconds_bucket{span="a",le="1.0"} 3',
+			'test_seconds_bucket{span="a",le="+Inf"} 4',
+		])
+		self.assertEqual(lines[-1], 'test_seconds_count{span="a"} 4')
+
+	@override_settings(METRICS_SERVER_TIMING=True)
+	def test_requests_and_spans_are_exported(self):
+		upload = SimpleUploadedFile('query.csv', QUERY_CSV.encode('utf-8'), content_type='text/csv')
+		res = self.client.post('/api/datasets/', data={'file': upload}, format='multipart')
+		dataset_id = res.data['id']
+		self.addCleanup(lambda: Dataset.objects.get(id=dataset_id).delete())
+		timing = res['Server-Timing']
+		for name in ('parse', 'summary', 'db', 'view', 'render', 'total'):
+			self.assertIn(f'{name};dur=', timing)
+
+		self.assertEqual(self.client.get('/api/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+		self.client.force_authenticate(user=self.admin)
+		res = self.client.get('/api/metrics/')
+		self.assertEqual(res.status_code, status.HTTP_200_OK)
+		self.assertTrue(res['Content-Type'].startswith('text/plain; version=0.0.4'))
+		body = res.content.decode()
+		self.assertIn(
+			'chemequip_http_request_duration_seconds_count{method="POST",route="api/datasets/",status="201"}', body,
+		)
+		self.assertIn('chemequip_span_duration_seconds_count{span="ingest"}', body)
+		self.assertIn('chemequip_query_cache_hits_total', body)
+		self.assertIn('chemequip_ingest_jobs{status="queued"} 0', body)
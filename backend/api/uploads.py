@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import hashlib
+
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+def hash_file(file_obj) -> str:
+	"""SHA-256 of a Django File, read in chunks."""
+	digest = hashlib.sha256()
+	for chunk in file_obj.chunks():
+		digest.update(chunk)
+	file_obj.seek(0)
+	return digest.hexdigest()
+
+
+def hash_path(path: str) -> str:
+	digest = hashlib.sha256()
+	with open(path, 'rb') as handle:
+		while chunk := handle.read(1 << 20):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+
+class ContentHashUploadHandler(FileUploadHandler):
+	"""Hashes each uploaded file as its bytes arrive, before the next handler
+	spools them to memory or disk, so deduplication needs no second read.
+
+	Must come first in FILE_UPLOAD_HANDLERS. Digests are recorded on the
+	request as ``upload_content_hashes[field_name]``.
+	"""
+
+	def new_file(self, *args, **kwargs):
+		super().new_file(*args, **kwargs)
+		self._digest = hashlib.sha256()
+
+	def receive_data_chunk(self, raw_data, start):
+		self._digest.update(raw_data)
+		return raw_data
+
+	def file_complete(self, file_size):
+		if not hasattr(self.request, 'upload_content_hashes'):
+			self.request.upload_content_hashes = {}
+		self.request.upload_content_hashes[self.field_name] = self._digest.hexdigest()
+		# Returning None lets the following handler build the file object.
+		return None
+
+
+def uploaded_content_hash(request, field_name: str, file_obj) -> str:
+	"""The digest recorded while ``field_name`` was received, or a fresh one."""
+	hashes = getattr(request, 'upload_content_hashes', None) or {}
+	return hashes.get(field_name) or hash_file(file_obj)
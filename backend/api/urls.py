@@ -1,23 +1,41 @@
 from django.urls import path
 
 from .views import (
+    DatasetCompareView,
     DatasetDataView,
     DatasetCsvDownloadView,
     DatasetDetailView,
+    DatasetExportView,
     DatasetListCreateView,
+    DatasetReportBatchView,
     DatasetReportView,
     HealthView,
+    MetricsView,
+    IngestionJobDetailView,
     RegisterView,
+    UploadSessionCreateView,
+    UploadSessionDetailView,
+    UploadSessionFinalizeView,
 )
 
 urlpatterns = [
     path('health/', HealthView.as_view(), name='health'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 
 	path('auth/register/', RegisterView.as_view(), name='auth-register'),
 
     path('datasets/', DatasetListCreateView.as_view(), name='dataset-list-create'),
+    path('datasets/compare/', DatasetCompareView.as_view(), name='dataset-compare'),
+    path('datasets/reports/', DatasetReportBatchView.as_view(), name='dataset-report-batch'),
     path('datasets/<int:dataset_id>/', DatasetDetailView.as_view(), name='dataset-detail'),
     path('datasets/<int:dataset_id>/data/', DatasetDataView.as_view(), name='dataset-data'),
+    path('datasets/<int:dataset_id>/export/', DatasetExportView.as_view(), name='dataset-export'),
     path('datasets/<int:dataset_id>/csv/', DatasetCsvDownloadView.as_view(), name='dataset-csv'),
     path('datasets/<int:dataset_id>/report/', DatasetReportView.as_view(), name='dataset-report'),
+
+    path('uploads/', UploadSessionCreateView.as_view(), name='upload-create'),
+    path('uploads/<int:upload_id>/', UploadSessionDetailView.as_view(), name='upload-detail'),
+    path('uploads/<int:upload_id>/finalize/', UploadSessionFinalizeView.as_view(), name='upload-finalize'),
+
+    path('ingest-jobs/<int:job_id>/', IngestionJobDetailView.as_view(), name='ingest-job-detail'),
 ]
@@ -1,22 +1,94 @@
 from __future__ import annotations
 
-from typing import Any
+import base64
+import binascii
+import os
+from io import BytesIO
+from urllib.parse import urlencode
 
-import pandas as pd
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
-from django.http import FileResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
+from django.utils.decorators import method_decorator
+from django.utils.cache import patch_vary_headers
+from django.utils.http import content_disposition_header
+from django.views.decorators.gzip import gzip_page
 from rest_framework import status
-from rest_framework.permissions import AllowAny
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .analytics import CsvValidationError, parse_and_analyze_csv
-from .models import Dataset
-from .pdf import build_dataset_report_pdf
-from .serializers import DatasetSerializer, DatasetUploadSerializer
+from .columnar import open_sidecar, sidecar_path, sidecar_version, write_sidecar
+from .comparison import combine_summaries, compare_summaries
+from .conditional import conditional_response, dataset_etag, ranged_file_response, set_validators
+from .compression import accepts_encoding, detect_encoding, iter_file, open_decompressed, strip_encoding_suffix
+from .export import EXPORT_FORMATS, iter_export
+from .ingestion import enqueue_upload, run_job
+from .metrics import render_metrics, span
+from .models import Dataset, IngestionJob, UploadSession
+from .pagination import Cursor, CursorError, page_cursors
+from .query import QueryError, parse_query
+from .query_cache import cached_selection
+from .reports import cached_report_path, iter_reports_zip, report_cache_key, report_filename
+from .resumable import (
+	UploadError,
+	UploadOffsetMismatch,
+	abort_session,
+	append_chunk,
+	create_session,
+	finalize_session,
+)
+from .serializers import (
+	DatasetSerializer,
+	DatasetUploadSerializer,
+	IngestionJobSerializer,
+	UploadSessionCreateSerializer,
+	UploadSessionSerializer,
+)
+from .stats import strip_sketches
+from .uploads import uploaded_content_hash
+
+
+def _ensure_sidecar(dataset: Dataset) -> str:
+	path = sidecar_path(dataset.csv_file.path)
+	if not os.path.exists(path):
+		# Datasets uploaded before the sidecar existed get one on first access.
+		parsed = parse_and_analyze_csv(dataset.csv_file.path)
+		write_sidecar(parsed.df, path)
+	return path
+
+
+def _wants_async(request) -> bool:
+	if settings.DATASET_INGEST_ASYNC:
+		return True
+	prefer = request.headers.get('Prefer', '')
+	return 'respond-async' in [token.strip() for token in prefer.split(',')]
+
+
+def _page_params(params, default_limit: int, max_limit: int) -> tuple[int, int]:
+	"""``limit`` and ``offset`` from the query string, clamped to range."""
+	try:
+		limit = int(params.get('limit', default_limit))
+		offset = int(params.get('offset', 0))
+	except ValueError:
+		raise QueryError('limit and offset must be integers.') from None
+	return max(1, min(limit, max_limit)), max(0, offset)
+
+
+class _IgnoreClientContentNegotiation(BaseContentNegotiation):
+	# Export and metrics bodies are not produced by a DRF renderer, so neither
+	# Accept headers nor ?format= should select one; errors still render as JSON.
+	def select_parser(self, request, parsers):
+		return parsers[0]
+
+	def select_renderer(self, request, renderers, format_suffix=None):
+		return renderers[0], renderers[0].media_type
 
 
 class HealthView(APIView):
@@ -26,6 +98,18 @@ class HealthView(APIView):
 		return Response({'status': 'ok'})
 
 
+class MetricsView(APIView):
+	content_negotiation_class = _IgnoreClientContentNegotiation
+
+	def get_permissions(self):
+		if settings.METRICS_PUBLIC:
+			return [AllowAny()]
+		return [IsAdminUser()]
+
+	def get(self, request):
+		return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 class RegisterView(APIView):
 	permission_classes = [AllowAny]
 	authentication_classes: list = []
@@ -56,51 +140,159 @@ class RegisterView(APIView):
 		return Response({'id': user.id, 'username': user.username}, status=status.HTTP_201_CREATED)
 
 
+# JSON pages of rows and summaries shrink several-fold, which matters more
+# than the CPU on slow links. Downloads are left alone: their stored
+# encoding is negotiated separately and they serve byte ranges.
+@method_decorator(gzip_page, name='dispatch')
 class DatasetListCreateView(APIView):
 	def get(self, request):
-		datasets = Dataset.objects.filter(user=request.user).order_by('-uploaded_at')[:5]
-		return Response(DatasetSerializer(datasets, many=True).data)
+		try:
+			limit, offset = _page_params(request.query_params, 5, 100)
+		except QueryError as exc:
+			return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+		datasets = Dataset.objects.filter(user=request.user).order_by('-uploaded_at', '-id')
+		total = datasets.count()
+		page = datasets[offset:offset + limit]
+
+		# The body stays a plain list; paging metadata travels in headers.
+		links = []
+		if offset + limit < total:
+			links.append((offset + limit, 'next'))
+		if offset > 0:
+			links.append((max(0, offset - limit), 'prev'))
+		headers = {'X-Total-Count': str(total)}
+		if links:
+			headers['Link'] = ', '.join(
+				f'<{request.build_absolute_uri(request.path)}?{urlencode({"limit": limit, "offset": start})}>; rel="{rel}"'
+				for start, rel in links
+			)
+		return Response(DatasetSerializer(page, many=True).data, headers=headers)
 
 	def post(self, request):
 		upload = DatasetUploadSerializer(data=request.data)
 		upload.is_valid(raise_exception=True)
 		file_obj = upload.validated_data['file']
-
-		dataset = Dataset.objects.create(
-			user=request.user,
-			original_filename=getattr(file_obj, 'name', 'upload.csv'),
-			csv_file=file_obj,
+		job = enqueue_upload(request.user, file_obj, uploaded_content_hash(request, 'file', file_obj))
+
+		if _wants_async(request):
+			return Response(
+				IngestionJobSerializer(job).data,
+				status=status.HTTP_202_ACCEPTED,
+				headers={'Location': f"/api/ingest-jobs/{job.id}/"},
+			)
+
+		job = run_job(job)
+		if job.status == IngestionJob.STATUS_FAILED:
+			return Response({'detail': job.error}, status=status.HTTP_400_BAD_REQUEST)
+		return Response(DatasetSerializer(job.dataset).data, status=status.HTTP_201_CREATED)
+
+
+def _parse_checksum(header: str | None) -> bytes | None:
+	# Same form as the tus protocol: "sha256 <base64 digest>".
+	if not header:
+		return None
+	algorithm, _, value = header.partition(' ')
+	if algorithm.lower() != 'sha256':
+		raise ValueError('Upload-Checksum must use sha256.')
+	try:
+		return base64.b64decode(value.strip(), validate=True)
+	except binascii.Error:
+		raise ValueError('Upload-Checksum is not valid base64.') from None
+
+
+class UploadSessionCreateView(APIView):
+	def post(self, request):
+		params = UploadSessionCreateSerializer(data=request.data)
+		params.is_valid(raise_exception=True)
+		session = create_session(
+			request.user,
+			params.validated_data['filename'],
+			size=params.validated_data['size'],
+			content_hash=params.validated_data['sha256'],
 		)
+		return Response(
+			UploadSessionSerializer(session).data,
+			status=status.HTTP_201_CREATED,
+			headers={'Location': f"/api/uploads/{session.id}/", 'Upload-Offset': str(session.bytes_received)},
+		)
+
 
+class UploadSessionDetailView(APIView):
+	"""GET reports the offset to resume from; PUT appends the raw request
+	body at ``Upload-Offset``; DELETE abandons the upload."""
+
+	def get(self, request, upload_id: int):
+		session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+		return Response(UploadSessionSerializer(session).data, headers={'Upload-Offset': str(session.bytes_received)})
+
+	def put(self, request, upload_id: int):
+		session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
 		try:
-			parsed = parse_and_analyze_csv(dataset.csv_file.path)
-		except CsvValidationError as exc:
-			dataset.delete()
+			offset = int(request.headers['Upload-Offset'])
+			checksum = _parse_checksum(request.headers.get('Upload-Checksum'))
+		except KeyError:
+			return Response({'detail': 'Upload-Offset header is required.'}, status=status.HTTP_400_BAD_REQUEST)
+		except ValueError as exc:
 			return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-		dataset.row_count = int(len(parsed.df))
-		dataset.summary = parsed.summary
-		dataset.save(update_fields=['row_count', 'summary'])
+		try:
+			session = append_chunk(session, offset, request.stream or BytesIO(), checksum)
+		except UploadOffsetMismatch as exc:
+			return Response(
+				{'detail': str(exc), 'offset': exc.offset},
+				status=status.HTTP_409_CONFLICT,
+				headers={'Upload-Offset': str(exc.offset)},
+			)
+		except UploadError as exc:
+			return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+		return Response(UploadSessionSerializer(session).data, headers={'Upload-Offset': str(session.bytes_received)})
 
-		# Keep only the most recent 5 datasets.
-		old_ids = list(
-			Dataset.objects.filter(user=request.user)
-			.order_by('-uploaded_at')
-			.values_list('id', flat=True)[5:]
-		)
-		if old_ids:
-			Dataset.objects.filter(id__in=old_ids).delete()
+	def delete(self, request, upload_id: int):
+		session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+		abort_session(session)
+		return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadSessionFinalizeView(APIView):
+	def post(self, request, upload_id: int):
+		session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+		try:
+			job = finalize_session(session, run=not _wants_async(request))
+		except UploadError as exc:
+			return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+		if job.status == IngestionJob.STATUS_QUEUED:
+			return Response(
+				IngestionJobSerializer(job).data,
+				status=status.HTTP_202_ACCEPTED,
+				headers={'Location': f"/api/ingest-jobs/{job.id}/"},
+			)
+		if job.status == IngestionJob.STATUS_FAILED:
+			return Response({'detail': job.error}, status=status.HTTP_400_BAD_REQUEST)
+		return Response(DatasetSerializer(job.dataset).data, status=status.HTTP_201_CREATED)
 
-		return Response(DatasetSerializer(dataset).data, status=status.HTTP_201_CREATED)
+
+class IngestionJobDetailView(APIView):
+	def get(self, request, job_id: int):
+		job = get_object_or_404(IngestionJob, id=job_id, user=request.user)
+		return Response(IngestionJobSerializer(job).data)
 
 
 class DatasetDetailView(APIView):
 	def get(self, request, dataset_id: int):
 		dataset = get_object_or_404(Dataset, id=dataset_id, user=request.user)
-		return Response(DatasetSerializer(dataset).data)
+		etag = dataset_etag(dataset)
+		cached = conditional_response(request, etag, dataset.updated_at)
+		if cached is not None:
+			return cached
+		return set_validators(Response(DatasetSerializer(dataset).data), etag, dataset.updated_at)
 
 	def patch(self, request, dataset_id: int):
 		dataset = get_object_or_404(Dataset, id=dataset_id, user=request.user)
+		# If-Match guards against overwriting a rename the client has not seen.
+		failed = conditional_response(request, dataset_etag(dataset), dataset.updated_at)
+		if failed is not None:
+			return failed
 		name = request.data.get('original_filename', None)
 		if name is None:
 			return Response({'detail': 'original_filename is required.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -111,8 +303,8 @@ class DatasetDetailView(APIView):
 			return Response({'detail': 'original_filename is too long.'}, status=status.HTTP_400_BAD_REQUEST)
 
 		dataset.original_filename = name
-		dataset.save(update_fields=['original_filename'])
-		return Response(DatasetSerializer(dataset).data)
+		dataset.save(update_fields=['original_filename', 'updated_at'])
+		return set_validators(Response(DatasetSerializer(dataset).data), dataset_etag(dataset), dataset.updated_at)
 
 	def delete(self, request, dataset_id: int):
 		dataset = get_object_or_404(Dataset, id=dataset_id, user=request.user)
@@ -120,64 +312,217 @@ class DatasetDetailView(APIView):
 		return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+@method_decorator(gzip_page, name='dispatch')
 class DatasetDataView(APIView):
 	def get(self, request, dataset_id: int):
 		dataset = get_object_or_404(Dataset, id=dataset_id, user=request.user)
 
 		try:
-			parsed = parse_and_analyze_csv(dataset.csv_file.path)
-		except CsvValidationError as exc:
+			query = parse_query(request.query_params)
+			limit, offset = _page_params(request.query_params, 200, 2000)
+			path = _ensure_sidecar(dataset)
+		except (CsvValidationError, QueryError) as exc:
 			return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-		limit = int(request.query_params.get('limit', 200))
-		offset = int(request.query_params.get('offset', 0))
-		limit = max(1, min(limit, 2000))
-		offset = max(0, offset)
-
-		df = parsed.df
-		total_rows = int(len(df))
-		window = df.iloc[offset: offset + limit]
-		window = window.where(pd.notnull(window), None)
-
-		rows: list[dict[str, Any]] = window.to_dict(orient='records')
-		return Response({
+		version = sidecar_version(path)
+		etag = dataset_etag(dataset, version)
+		cached = conditional_response(request, etag, dataset.updated_at)
+		if cached is not None:
+			return cached
+
+		order = query.fingerprint()
+		token = request.query_params.get('cursor')
+		if token:
+			try:
+				cursor = Cursor.decode(token)
+				cursor.check(dataset.id, version, order)
+			except CursorError as exc:
+				return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+			offset = cursor.position
+
+		with span('query'):
+			table = open_sidecar(path)
+			selection = cached_selection(table, path, version, query)
+			window = selection.window(table, offset, limit, query.columns)
+		next_cursor, prev_cursor = page_cursors(dataset.id, version, order, offset, limit, selection.total)
+
+		response = Response({
 			'dataset_id': dataset.id,
-			'columns': list(df.columns),
-			'total_rows': total_rows,
+			'columns': list(query.columns),
+			'total_rows': selection.total,
 			'offset': offset,
 			'limit': limit,
-			'rows': rows,
+			'next_cursor': next_cursor,
+			'prev_cursor': prev_cursor,
+			'rows': window.to_pylist(),
 		})
+		return set_validators(response, etag, dataset.updated_at)
 
 
-class DatasetReportView(APIView):
+class DatasetExportView(APIView):
+	content_negotiation_class = _IgnoreClientContentNegotiation
+
 	def get(self, request, dataset_id: int):
 		dataset = get_object_or_404(Dataset, id=dataset_id, user=request.user)
-		pdf_bytes = build_dataset_report_pdf(
-			title=f"Equipment Dataset Report (#{dataset.id})",
-			summary=dataset.summary or {},
+
+		fmt = request.query_params.get('format', 'ndjson')
+		if fmt not in EXPORT_FORMATS:
+			return Response(
+				{'detail': f"format must be one of: {', '.join(EXPORT_FORMATS)}."},
+				status=status.HTTP_400_BAD_REQUEST,
+			)
+
+		try:
+			query = parse_query(request.query_params)
+			path = _ensure_sidecar(dataset)
+		except (CsvValidationError, QueryError) as exc:
+			return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+		with span('query'):
+			table = open_sidecar(path)
+			selection = cached_selection(table, path, sidecar_version(path), query)
+		content_type, extension = EXPORT_FORMATS[fmt]
+		response = StreamingHttpResponse(
+			iter_export(table, selection, query.columns, fmt),
+			content_type=content_type,
 		)
+		response['Content-Disposition'] = f'attachment; filename="dataset_{dataset.id}.{extension}"'
+		response['X-Total-Rows'] = str(selection.total)
+		return response
 
-		from io import BytesIO
-		buffer = BytesIO(pdf_bytes)
-		return FileResponse(
-			buffer,
-			as_attachment=True,
-			filename=f"dataset_{dataset.id}_report.pdf",
+
+class DatasetReportView(APIView):
+	def get(self, request, dataset_id: int):
+		dataset = get_object_or_404(Dataset, id=dataset_id, user=request.user)
+		# The cache key covers the summary and template version, so the ETag
+		# is known without rendering. No Last-Modified: a template change
+		# alters the report without touching the dataset.
+		etag = dataset_etag(dataset, report_cache_key(dataset).removesuffix('.pdf'))
+		cached = conditional_response(request, etag)
+		if cached is not None:
+			return cached
+		return ranged_file_response(
+			request,
+			cached_report_path(dataset),
+			filename=report_filename(dataset),
 			content_type='application/pdf',
+			etag=etag,
 		)
 
 
+def _select_datasets(request, max_datasets: int) -> list[Dataset]:
+	"""The caller's datasets named by ``ids=1,2,3`` and/or an inclusive
+	``uploaded_from`` / ``uploaded_to`` date range, oldest first."""
+	params = request.query_params
+	if not any(params.get(key) for key in ('ids', 'uploaded_from', 'uploaded_to')):
+		raise QueryError('Pass ids or an uploaded_from/uploaded_to date range.')
+
+	datasets = Dataset.objects.filter(user=request.user)
+	if params.get('ids'):
+		try:
+			ids = [int(part) for part in params['ids'].split(',') if part.strip()]
+		except ValueError:
+			raise QueryError('ids must be a comma-separated list of integers.') from None
+		datasets = datasets.filter(id__in=ids)
+	for key, lookup in (('uploaded_from', 'uploaded_at__date__gte'), ('uploaded_to', 'uploaded_at__date__lte')):
+		if params.get(key):
+			day = parse_date(params[key])
+			if day is None:
+				raise QueryError(f"{key} must be a date (YYYY-MM-DD).")
+			datasets = datasets.filter(**{lookup: day})
+
+	datasets = list(datasets.order_by('uploaded_at', 'id')[:max_datasets + 1])
+	if len(datasets) > max_datasets:
+		raise QueryError(f"At most {max_datasets} datasets per request.")
+	return datasets
+
+
+class DatasetReportBatchView(APIView):
+	def get(self, request):
+		try:
+			datasets = _select_datasets(request, settings.REPORT_BATCH_MAX_DATASETS)
+		except QueryError as exc:
+			return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+		if not datasets:
+			return Response({'detail': 'No datasets match.'}, status=status.HTTP_404_NOT_FOUND)
+
+		response = StreamingHttpResponse(
+			iter_reports_zip(datasets, workers=settings.REPORT_BATCH_WORKERS),
+			content_type='application/zip',
+		)
+		response['Content-Disposition'] = 'attachment; filename="dataset_reports.zip"'
+		response['X-Report-Count'] = str(len(datasets))
+		return response
+
+
+class DatasetCompareView(APIView):
+	"""Merged and side-by-side statistics for several datasets, answered from
+	their stored summaries alone; the CSVs are never read."""
+
+	def get(self, request):
+		try:
+			datasets = _select_datasets(request, settings.DATASET_COMPARE_MAX_DATASETS)
+		except QueryError as exc:
+			return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+		if not datasets:
+			return Response({'detail': 'No datasets match.'}, status=status.HTTP_404_NOT_FOUND)
+
+		ids = [dataset.id for dataset in datasets]
+		baseline_id = request.query_params.get('baseline')
+		if baseline_id is None:
+			baseline_id = ids[0]
+		try:
+			baseline = ids.index(int(baseline_id))
+		except ValueError:
+			return Response({'detail': 'baseline must be one of the selected dataset ids.'}, status=status.HTTP_400_BAD_REQUEST)
+
+		summaries = [dataset.summary or {} for dataset in datasets]
+		combined = combine_summaries(summaries)
+		combined['statistics'] = strip_sketches(combined['statistics'])
+		entries = compare_summaries(summaries, baseline)
+		return Response({
+			'baseline_id': ids[baseline],
+			'combined': combined,
+			'datasets': [
+				{'id': dataset.id, 'original_filename': dataset.original_filename, 'uploaded_at': dataset.uploaded_at, **entry}
+				for dataset, entry in zip(datasets, entries)
+			],
+		})
+
+
 class DatasetCsvDownloadView(APIView):
 	def get(self, request, dataset_id: int):
 		dataset = get_object_or_404(Dataset, id=dataset_id, user=request.user)
 		name = (dataset.original_filename or f"dataset_{dataset.id}.csv").strip() or f"dataset_{dataset.id}.csv"
+		name = strip_encoding_suffix(name)
 		if not name.lower().endswith('.csv'):
 			name = f"{name}.csv"
-		file_handle = dataset.csv_file.open('rb')
-		return FileResponse(
-			file_handle,
-			as_attachment=True,
-			filename=name,
-			content_type='text/csv',
-		)
+
+		path = dataset.csv_file.path
+		stored = detect_encoding(path)
+		accepted = stored and accepts_encoding(request.headers.get('Accept-Encoding', ''), stored)
+		encoding = stored if accepted else None
+		# Each encoding is its own representation with its own ETag.
+		etag = dataset_etag(dataset, *([encoding] if encoding else []))
+
+		response = conditional_response(request, etag, dataset.updated_at)
+		if response is None and stored and not encoding:
+			# Decompressed on the fly, so the length is unknown and ranges
+			# are not offered.
+			response = StreamingHttpResponse(iter_file(open_decompressed(path)), content_type='text/csv')
+			response['Content-Disposition'] = content_disposition_header(True, name)
+			set_validators(response, etag, dataset.updated_at)
+		elif response is None:
+			# Stored bytes go out as they are, so byte ranges map onto the file.
+			response = ranged_file_response(
+				request,
+				path,
+				filename=name,
+				content_type='text/csv',
+				etag=etag,
+				last_modified=dataset.updated_at,
+			)
+			if encoding:
+				response['Content-Encoding'] = encoding
+		patch_vary_headers(response, ['Accept-Encoding'])
+		return response
@@ -0,0 +1,227 @@
+"""Benchmarks for ingestion, paging and report generation.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.run --rows 10000 1000000
+    python -m benchmarks.run --rows 10000 --json bench.json
+    python -m benchmarks.run --rows 10000 --compare bench.json
+
+Every case runs in a fresh interpreter so its peak RSS is its own. Upload and
+paging cases run against a throwaway test database and media directory.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable
+
+from .synthetic import write_equipment_csv
+
+
+CASES = ['parse', 'stream', 'upload', 'page', 'report']
+PAGE_OFFSETS = (0.0, 0.5, 0.99)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _timed(fn: Callable[[], Any]) -> tuple[float, Any]:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def _setup_django(media_root: str) -> None:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.MEDIA_ROOT = media_root
+    settings.DATASET_INGEST_ASYNC = False
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+
+def _api_client():
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIClient
+
+    user = get_user_model().objects.create_user(username='bench', password='bench12345')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def _upload(client, csv_path: str) -> dict[str, Any]:
+    with open(csv_path, 'rb') as handle:
+        res = client.post('/api/datasets/', data={'file': handle}, format='multipart')
+    if res.status_code != 201:
+        raise RuntimeError(f"Upload failed with {res.status_code}: {res.content[:200]!r}")
+    return res.json()
+
+
+def run_case(case: str, csv_path: str, rows: int) -> list[dict[str, Any]]:
+    size_mb = os.path.getsize(csv_path) / (1024 * 1024)
+
+    def record(name: str, seconds: float, *, throughput: bool = True) -> dict[str, Any]:
+        # Throughput only makes sense for cases that touch every row.
+        return {
+            'case': name,
+            'rows': rows,
+            'seconds': seconds,
+            'rows_per_s': rows / seconds if throughput and seconds else None,
+            'mb_per_s': size_mb / seconds if throughput and seconds else None,
+            'peak_rss_mb': _peak_rss_mb(),
+        }
+
+    if case == 'parse':
+        from api.analytics import parse_and_analyze_csv
+
+        seconds, _ = _timed(lambda: parse_and_analyze_csv(csv_path))
+        return [record('parse', seconds)]
+
+    if case == 'stream':
+        from api.analytics import stream_analyze_csv
+
+        seconds, _ = _timed(lambda: stream_analyze_csv(csv_path))
+        return [record('stream', seconds)]
+
+    with tempfile.TemporaryDirectory() as media_root:
+        _setup_django(media_root)
+        client = _api_client()
+
+        if case == 'upload':
+            seconds, _ = _timed(lambda: _upload(client, csv_path))
+            return [record('upload', seconds)]
+
+        if case == 'page':
+            dataset = _upload(client, csv_path)
+            results = []
+            for fraction in PAGE_OFFSETS:
+                offset = int(rows * fraction)
+                url = f"/api/datasets/{dataset['id']}/data/?limit=200&offset={offset}"
+                seconds, res = _timed(lambda: client.get(url))
+                if res.status_code != 200:
+                    raise RuntimeError(f"Paging failed with {res.status_code}")
+                results.append(record(f"page@{fraction:.0%}", seconds, throughput=False))
+            # A multi-key sort is resolved on the first page and served from
+            # the query cache afterwards.
+            for fraction in PAGE_OFFSETS:
+                offset = int(rows * fraction)
+                url = f"/api/datasets/{dataset['id']}/data/?limit=200&offset={offset}&sort=type,-pressure"
+                seconds, res = _timed(lambda: client.get(url))
+                if res.status_code != 200:
+                    raise RuntimeError(f"Paging failed with {res.status_code}")
+                results.append(record(f"sorted@{fraction:.0%}", seconds, throughput=False))
+            return results
+
+        if case == 'report':
+            from api.pdf import build_dataset_report_pdf
+
+            dataset = _upload(client, csv_path)
+            seconds, _ = _timed(lambda: build_dataset_report_pdf(
+                title=f"Benchmark ({rows} rows)",
+                summary=dataset['summary'],
+            ))
+            return [record('report', seconds, throughput=False)]
+
+    raise ValueError(f"Unknown case: {case}")
+
+
+def _run_isolated(case: str, csv_path: str, rows: int) -> list[dict[str, Any]]:
+    proc = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.run', '--child', case, csv_path, str(rows)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Case {case} ({rows} rows) failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _format(results: list[dict[str, Any]]) -> str:
+    lines = [f"{'case':<12} {'rows':>10} {'seconds':>9} {'rows/s':>12} {'MB/s':>8} {'peak RSS MB':>12}"]
+    for r in results:
+        rows_per_s = f"{r['rows_per_s']:,.0f}" if r['rows_per_s'] else '-'
+        mb_per_s = f"{r['mb_per_s']:.1f}" if r['mb_per_s'] else '-'
+        lines.append(
+            f"{r['case']:<12} {r['rows']:>10,} {r['seconds']:>9.3f} {rows_per_s:>12} {mb_per_s:>8} {r['peak_rss_mb']:>12.1f}"
+        )
+    return '\n'.join(lines)
+
+
+def _regressions(results: list[dict[str, Any]], baseline_path: str, tolerance: float) -> list[str]:
+    with open(baseline_path) as handle:
+        baseline = {(r['case'], r['rows']): r for r in json.load(handle)}
+
+    problems = []
+    for r in results:
+        base = baseline.get((r['case'], r['rows']))
+        if base is None:
+            continue
+        for key in ('seconds', 'peak_rss_mb'):
+            if r[key] > base[key] * (1 + tolerance):
+                problems.append(
+                    f"{r['case']} ({r['rows']:,} rows): {key} {r[key]:.3f} vs baseline {base[key]:.3f}"
+                )
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=CASES)
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'chemequip-bench'),
+                        help="Where generated CSVs are cached between runs.")
+    parser.add_argument('--json', dest='json_path', help="Write results to this file.")
+    parser.add_argument('--compare', help="Baseline JSON; exit 1 on regressions beyond --tolerance.")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--child', nargs=3, metavar=('CASE', 'CSV', 'ROWS'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        case, csv_path, rows = args.child
+        print(json.dumps(run_case(case, csv_path, int(rows))))
+        return 0
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results: list[dict[str, Any]] = []
+    for rows in args.rows:
+        csv_path = os.path.join(args.data_dir, f"equipment_{rows}.csv")
+        if not os.path.exists(csv_path):
+            print(f"Generating {csv_path} ...", file=sys.stderr)
+            write_equipment_csv(csv_path, rows)
+        for case in args.cases:
+            results.extend(_run_isolated(case, csv_path, rows))
+
+    print(_format(results))
+
+    if args.json_path:
+        with open(args.json_path, 'w') as handle:
+            json.dump(results, handle, indent=2)
+
+    if args.compare:
+        problems = _regressions(results, args.compare, args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION: {problem}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+EQUIPMENT_TYPES = [
+    'Pump', 'Reactor', 'Valve', 'HeatExchanger', 'Compressor', 'Condenser',
+    'Column', 'Tank', 'Mixer', 'Separator', 'Boiler', 'Filter',
+]
+
+BLOCK_ROWS = 100_000
+
+
+def write_equipment_csv(path: str, rows: int, *, seed: int = 0) -> None:
+    """Write ``rows`` of plausible equipment data to ``path``.
+
+    Rows are generated in fixed-size blocks so even 10M-row files are written
+    with flat memory. About 1% of types carry stray whitespace or are blank and
+    about 1% of readings are missing, to exercise the cleaning paths.
+    """
+    rng = np.random.default_rng(seed)
+    types = np.array(EQUIPMENT_TYPES + [' Pump ', 'Valve  ', ''], dtype=object)
+    weights = np.array([0.99 / len(EQUIPMENT_TYPES)] * len(EQUIPMENT_TYPES) + [0.004, 0.003, 0.003])
+
+    with open(path, 'w', newline='') as handle:
+        handle.write("Equipment Name,Type,Flowrate,Pressure,Temperature\n")
+        for start in range(0, rows, BLOCK_ROWS):
+            n = min(BLOCK_ROWS, rows - start)
+            block = pd.DataFrame({
+                'name': [f"Unit {i}" for i in range(start, start + n)],
+                'type': rng.choice(types, size=n, p=weights),
+                'flowrate': rng.gamma(4.0, 30.0, n).round(2),
+                'pressure': rng.normal(6.0, 2.0, n).clip(0.1).round(2),
+                'temperature': rng.normal(150.0, 60.0, n).round(1),
+            })
+            for col in ('flowrate', 'pressure', 'temperature'):
+                block.loc[rng.random(n) < 0.01, col] = np.nan
+            block.to_csv(handle, header=False, index=False)
@@ -0,0 +1,70 @@
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from api.metrics import REQUEST_SECONDS, SPAN_SECONDS, RequestTimings, current_timings
+
+
+class MetricsMiddleware:
+    """Times each request into the request histogram and splits it into
+    ``view`` (the handler), ``render`` (DRF serialization) and ``db`` spans.
+
+    Place it last in MIDDLEWARE so the inner timings cover only the view and
+    its rendering. With METRICS_SERVER_TIMING the spans, including those the
+    handler opened (parse, summary, pdf_render, ...), are sent back in a
+    ``Server-Timing`` header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self._time_query):
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        end = time.perf_counter()
+
+        view_start = getattr(request, '_metrics_view_start', None)
+        if view_start is not None:
+            view_end = getattr(request, '_metrics_view_end', end)
+            timings.add('view', view_end - view_start)
+            if view_end < end:
+                timings.add('render', end - view_end)
+        # Nested spans were observed as they closed; these are per request.
+        for name in ('view', 'render', 'db'):
+            if name in timings.durations:
+                SPAN_SECONDS.observe(timings.durations[name], name)
+
+        match = request.resolver_match
+        route = match.route if match is not None else 'unmatched'
+        REQUEST_SECONDS.observe(end - start, request.method, route, str(response.status_code))
+
+        if settings.METRICS_SERVER_TIMING:
+            timings.add('total', end - start)
+            response['Server-Timing'] = timings.header()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; mark the boundary.
+        request._metrics_view_end = time.perf_counter()
+        return response
+
+    @staticmethod
+    def _time_query(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            seconds = time.perf_counter() - start
+            timings = current_timings.get()
+            if timings is not None:
+                timings.add('db', seconds)
@@ -58,6 +58,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'config.middleware.MetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -130,6 +131,13 @@ STATIC_URL = 'static/'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Hash uploads while they stream in, ahead of Django's default handlers.
+FILE_UPLOAD_HANDLERS = [
+    'api.uploads.ContentHashUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 CORS_ALLOW_ALL_ORIGINS = True
 
 REST_FRAMEWORK = {
@@ -142,6 +150,59 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Dataset ingestion
+# Rows per chunk when streaming uploaded CSVs; bounds peak memory per upload.
+DATASET_INGEST_CHUNKSIZE = 100_000
+# Processes used to parse one large upload; files smaller than the threshold
+# are always parsed in-process.
+DATASET_INGEST_PARSE_WORKERS = 1
+DATASET_INGEST_PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+# When True every upload is queued for `manage.py ingest_worker` and answered
+# with 202; otherwise only requests sending `Prefer: respond-async` are.
+DATASET_INGEST_ASYNC = False
+# Seconds an idle ingest worker sleeps between polls of the job table.
+DATASET_INGEST_POLL_INTERVAL = 1.0
+# Request and stage timings are exported at /api/metrics/ in Prometheus
+# text format (staff users only unless METRICS_PUBLIC). Metrics are kept per
+# process: scrape each worker, or run one process per port. With
+# METRICS_SERVER_TIMING responses carry a Server-Timing header for browser
+# devtools.
+METRICS_PUBLIC = False
+METRICS_SERVER_TIMING = DEBUG
+# Per-process LRU of column indexes and resolved filter/sort selections
+# used by /data/ and /export/, bounded by their total size. Sidecar columns
+# themselves are memory-mapped, so worker processes already share them
+# through the page cache.
+DATASET_QUERY_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Uploads sent gzip/zstd-compressed (detected by magic bytes) are stored as
+# sent. Set to 'gzip' (or 'zstd', needs the zstandard package) to compress
+# plain uploads at rest as well; compressed files are always parsed by one
+# streaming reader, never split across DATASET_INGEST_PARSE_WORKERS.
+DATASET_STORAGE_COMPRESSION = None
+DATASET_STORAGE_COMPRESSION_LEVEL = 1
+# Resumable uploads (/api/uploads/): largest accepted chunk, and hours after
+# which an untouched upload session is discarded by `sweep_datasets`.
+DATASET_UPLOAD_MAX_CHUNK_BYTES = 64 * 1024 * 1024
+DATASET_UPLOAD_SESSION_TTL_HOURS = 24
+# Per-user dataset retention (None = no limit), enforced by
+# `manage.py sweep_datasets`. RetentionPolicy rows override these per user.
+DATASET_RETENTION_MAX_COUNT = 5
+DATASET_RETENTION_MAX_AGE_DAYS = None
+DATASET_RETENTION_MAX_BYTES = None
+# Seconds between sweeps when `sweep_datasets` runs as a long-lived process.
+DATASET_RETENTION_SWEEP_INTERVAL = 3600
+# Largest number of datasets one comparison request may merge.
+DATASET_COMPARE_MAX_DATASETS = 100
+
+# Rendered PDF reports, reused until a dataset's summary or the report template
+# changes. Least recently used reports are evicted beyond the size limit.
+REPORT_CACHE_DIR = BASE_DIR / 'cache' / 'reports'
+REPORT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Processes rendering uncached reports for a batch download, and the largest
+# batch one request may ask for. `manage.py batch_reports` has no limit.
+REPORT_BATCH_WORKERS = 1
+REPORT_BATCH_MAX_DATASETS = 500
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,12 +1,30 @@
 import sys
 import os
+import base64
+import gzip
+import hashlib
+import io
+import json
+import logging
+import math
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from dataclasses import dataclass
 
 import requests
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QObject, QRunnable, Qt, QThreadPool, pyqtSignal
+from requests.adapters import HTTPAdapter
+from urllib3 import encode_multipart_formdata
+from urllib3.util.retry import Retry
 from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import (
     QApplication,
+    QComboBox,
     QDialog,
     QDialogButtonBox,
     QFileDialog,
@@ -14,6 +32,7 @@ from PyQt5.QtWidgets import (
     QGridLayout,
     QGroupBox,
     QHBoxLayout,
+    QHeaderView,
     QLabel,
     QLineEdit,
     QListWidget,
@@ -21,16 +40,19 @@ from PyQt5.QtWidgets import (
     QMainWindow,
     QMessageBox,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QVBoxLayout,
     QWidget,
 )
 
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+from matplotlib.ticker import MaxNLocator, ScalarFormatter
 
 
+logger = logging.getLogger("chemequip.desktop")
+
 APP_QSS = """
 QWidget {
     font-family: Segoe UI, Arial;
@@ -115,7 +137,7 @@ QListWidget::item:selected {
     background: rgba(59, 130, 246, 24);
 }
 
-QTableWidget {
+QTableView {
     border: 1px solid #e5e7eb;
     border-radius: 12px;
     background: #ffffff;
@@ -160,10 +182,313 @@ class Auth:
     password: str
 
 
+@contextmanager
+def _gzipped_copy(file_path: str):
+    """Yield a gzip-compressed temporary copy of ``file_path``, or the path
+    itself when it is already gzip/zstd-compressed."""
+    with open(file_path, "rb") as f:
+        head = f.read(4)
+    if head.startswith(b"\x1f\x8b") or head.startswith(b"\x28\xb5\x2f\xfd"):
+        yield file_path
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Same basename, so the dataset keeps the name the user picked.
+        target = os.path.join(tmp_dir, os.path.basename(file_path))
+        # Fixed header (no name, mtime 0): the same CSV always gives the same
+        # bytes, so the server still deduplicates repeated uploads.
+        with open(file_path, "rb") as src, open(target, "wb") as raw:
+            with gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=1, mtime=0) as out:
+                shutil.copyfileobj(src, out, 1024 * 1024)
+        yield target
+
+
+def _log_timing(response, *args, **kwargs):
+    request = response.request
+    logger.info(
+        "%s %s -> %s in %.0f ms (%s bytes)",
+        request.method,
+        request.path_url,
+        response.status_code,
+        response.elapsed.total_seconds() * 1000,
+        response.headers.get("Content-Length", "?"),
+    )
+
+
+def _make_session(auth, pool_size: int, retries: int, backoff: float) -> requests.Session:
+    """A keep-alive session: one TCP/TLS connection per worker is reused for
+    every call instead of a new handshake each time."""
+    session = requests.Session()
+    session.auth = auth
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS", "DELETE"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(_log_timing)
+    return session
+
+
+class _ProgressReader(io.BytesIO):
+    """Request body that reports how much of it has been sent. requests
+    streams file-like bodies in blocks, so ``on_progress`` runs as the upload
+    proceeds and can abort it by raising."""
+
+    REPORT_EVERY = 256 * 1024
+
+    def __init__(self, data: bytes, on_progress=None):
+        super().__init__(data)
+        self.total = len(data)
+        self.on_progress = on_progress
+        self._reported = 0
+
+    def read(self, size=-1):
+        block = super().read(size)
+        done = self.tell()
+        if self.on_progress is not None and (done - self._reported >= self.REPORT_EVERY or done == self.total):
+            self._reported = done
+            self.on_progress(done, self.total)
+        return block
+
+
+class LocalCache:
+    """Responses kept on disk between runs: an SQLite index of entries and
+    one blob file per body, bounded to ``max_bytes`` by evicting the least
+    recently used.
+
+    Entries that belong to a dataset record its id and server version (its
+    ``uploaded_at``), so a dataset that was deleted or replaced never serves
+    stale rows. Methods may be called from worker threads; any disk or
+    database failure is logged and treated as a miss.
+    """
+
+    MAX_BYTES = 512 * 1024 * 1024
+
+    def __init__(self, directory: str, max_bytes: int = MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, dataset_id INTEGER, version TEXT, etag TEXT,"
+            " size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    @classmethod
+    def for_account(cls, base_url: str, username: str, **kwargs):
+        """The cache of one user on one server, under ``CHEMEQUIP_CACHE_DIR``
+        (default ``~/.chemequip/cache``); accounts never see each other's data."""
+        root = os.environ.get("CHEMEQUIP_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".chemequip", "cache")
+        account = hashlib.sha256(f"{base_url.rstrip('/')}\0{username}".encode()).hexdigest()[:16]
+        return cls(os.path.join(root, account), **kwargs)
+
+    @staticmethod
+    def key(path: str, params=None) -> str:
+        if not params:
+            return path
+        return path + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+
+    def _blob_path(self, key: str) -> str:
+        return os.path.join(self.directory, "blobs", hashlib.sha256(key.encode()).hexdigest())
+
+    def get(self, key: str, version: str = None):
+        """``(etag, body)`` of a fresh entry, or None. An entry stored for
+        another version of its dataset is dropped."""
+        try:
+            with self._lock:
+                row = self._db.execute("SELECT version, etag FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if version is not None and row[0] != version:
+                    self._remove([key])
+                    return None
+                self._db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                self._db.commit()
+            with open(self._blob_path(key), "rb") as f:
+                return row[1], f.read()
+        except (sqlite3.Error, OSError) as exc:
+            logger.warning("cache read of %s failed: %s", key, exc)
+            return None
+
+    def put(self, key: str, body: bytes, etag: str = None, dataset_id: int = None, version: str = None):
+        if len(body) > self.max_bytes:
+            return
+        path = self._blob_path(key)
+        try:
+            # Written aside and renamed, so a reader never sees half a body.
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            with self._lock:
+                os.replace(tmp, path)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (key, dataset_id, version, etag, size, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, dataset_id, version, etag, len(body), time.time()),
+                )
+                self._evict()
+                self._db.commit()
+        except (sqlite3.Error, OSError) as exc:
+            logger.warning("cache write of %s failed: %s", key, exc)
+
+    def retain_datasets(self, versions: dict):
+        """Drop entries of datasets missing from ``versions`` (id -> version)
+        or stored for an older version of them."""
+        try:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT key, dataset_id, version FROM entries WHERE dataset_id IS NOT NULL"
+                ).fetchall()
+                self._remove([key for key, dataset_id, version in rows if versions.get(dataset_id) != version])
+                self._db.commit()
+        except (sqlite3.Error, OSError) as exc:
+            logger.warning("cache prune failed: %s", exc)
+
+    def drop_dataset(self, dataset_id: int):
+        try:
+            with self._lock:
+                rows = self._db.execute("SELECT key FROM entries WHERE dataset_id = ?", (dataset_id,)).fetchall()
+                self._remove([key for (key,) in rows])
+                self._db.commit()
+        except (sqlite3.Error, OSError) as exc:
+            logger.warning("cache drop of dataset %s failed: %s", dataset_id, exc)
+
+    def size(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            stale.append(key)
+            total -= size
+        self._remove(stale)
+
+    def _remove(self, keys):
+        for key in keys:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            try:
+                os.remove(self._blob_path(key))
+            except FileNotFoundError:
+                pass
+
+
 class ApiClient:
-    def __init__(self, base_url: str, auth: Auth):
+    # Connections kept open to the server; matches the window's worker threads.
+    POOL_SIZE = 4
+    # Retries of idempotent calls on connection errors and 502/503/504,
+    # backing off 0.5 s, 1 s, 2 s, ... (Retry-After is honoured).
+    RETRIES = 3
+    RETRY_BACKOFF = 0.5
+    # Datasets fetched per request when listing; the server's maximum.
+    DATASETS_PAGE = 100
+
+    def __init__(
+        self,
+        base_url: str,
+        auth: Auth,
+        pool_size: int = POOL_SIZE,
+        retries: int = RETRIES,
+        cache: LocalCache = None,
+    ):
         self.base_url = base_url.rstrip('/')
         self.auth = (auth.username, auth.password)
+        self.session = _make_session(self.auth, pool_size, retries, self.RETRY_BACKOFF)
+        self.cache = cache
+        # Set when the last cached call could not reach the server and was
+        # answered from the cache instead.
+        self.offline = False
+        # Dataset id -> server version (``uploaded_at``) from the last list.
+        self._versions = {}
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def _cached_get(self, path: str, params=None, timeout=20, dataset_id=None, revalidate=True, on_progress=None):
+        """GET ``path`` through the local cache and return the body.
+
+        A cached body is revalidated with ``If-None-Match`` (a 304 costs no
+        transfer), or returned without asking when ``revalidate`` is false and
+        it was stored for the dataset's current version. When the server
+        cannot be reached, any cached body is returned and ``offline`` is set.
+        """
+        key = LocalCache.key(path, params)
+        version = self._versions.get(dataset_id)
+        entry = self.cache.get(key, version) if self.cache is not None else None
+        if entry is not None and not revalidate and version is not None:
+            return entry[1]
+
+        headers = {"If-None-Match": entry[0]} if entry is not None and entry[0] else {}
+        try:
+            with self.session.get(
+                f"{self.base_url}{path}",
+                params=params,
+                headers=headers,
+                timeout=timeout,
+                stream=True,
+            ) as r:
+                if r.status_code == 304 and entry is not None:
+                    self.offline = False
+                    return entry[1]
+                r.raise_for_status()
+                total = int(r.headers.get("Content-Length") or 0) or None
+                content = bytearray()
+                for block in r.iter_content(64 * 1024):
+                    content += block
+                    if on_progress is not None:
+                        on_progress(len(content), total)
+                etag = r.headers.get("ETag")
+        except (requests.ConnectionError, requests.Timeout):
+            if entry is None:
+                raise
+            logger.info("server unreachable; %s served from cache", path)
+            self.offline = True
+            return entry[1]
+
+        self.offline = False
+        body = bytes(content)
+        if self.cache is not None:
+            self.cache.put(key, body, etag=etag, dataset_id=dataset_id, version=version)
+        return body
+
+    def cached_datasets(self):
+        """The dataset list from the last run, or None."""
+        if self.cache is None:
+            return None
+        datasets = []
+        offset = 0
+        while True:
+            entry = self.cache.get(LocalCache.key("/datasets/", self._datasets_page(offset)))
+            if entry is None:
+                if offset == 0:
+                    return None
+                break
+            page = json.loads(entry[1])
+            datasets.extend(page)
+            if len(page) < self.DATASETS_PAGE:
+                break
+            offset += len(page)
+        self._versions = {d["id"]: d.get("uploaded_at") for d in datasets}
+        return datasets
 
     @staticmethod
     def register_user(base_url: str, username: str, password: str, password2: str):
@@ -177,50 +502,549 @@ class ApiClient:
         return r.json()
 
     def health(self):
-        return requests.get(f"{self.base_url}/health/", timeout=10).json()
+        return self.session.get(f"{self.base_url}/health/", timeout=10).json()
 
     def list_datasets(self):
-        r = requests.get(f"{self.base_url}/datasets/", auth=self.auth, timeout=20)
+        """Every dataset of the user, newest first, fetched page by page."""
+        datasets = []
+        offline = False
+        offset = 0
+        while True:
+            page = json.loads(self._cached_get("/datasets/", self._datasets_page(offset)))
+            offline = offline or self.offline
+            datasets.extend(page)
+            if len(page) < self.DATASETS_PAGE:
+                break
+            offset += len(page)
+        self.offline = offline
+        self._versions = {d["id"]: d.get("uploaded_at") for d in datasets}
+        # Only a complete list from the server may drop other datasets' entries.
+        if self.cache is not None and not offline:
+            self.cache.retain_datasets(self._versions)
+        return datasets
+
+    def _datasets_page(self, offset: int) -> dict:
+        return {"limit": self.DATASETS_PAGE, "offset": offset}
+
+    # Files at least this large go through the resumable upload API.
+    RESUMABLE_MIN_BYTES = 64 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES = 16 * 1024 * 1024
+    # CSVs shrink several-fold under gzip; the server detects the encoding.
+    # Only single-request uploads are compressed: the server parses plain
+    # resumable chunks as they arrive, but a compressed file in one pass at
+    # the end.
+    COMPRESS_UPLOADS = True
+    # Polling interval while a finalized upload waits for the ingest worker.
+    JOB_POLL_SECONDS = 2
+
+    def dataset(self, dataset_id: int):
+        r = self.session.get(f"{self.base_url}/datasets/{dataset_id}/", timeout=20)
         r.raise_for_status()
         return r.json()
 
-    def upload_csv(self, file_path: str):
+    def upload_csv(self, file_path: str, on_progress=None):
+        """Upload a CSV; ``on_progress(sent, total)`` is called as bytes go out
+        and may raise to abort the upload."""
+        if os.path.getsize(file_path) >= self.RESUMABLE_MIN_BYTES:
+            return self.upload_csv_resumable(file_path, on_progress=on_progress)
+        if self.COMPRESS_UPLOADS:
+            with _gzipped_copy(file_path) as upload_path:
+                return self._post_file(upload_path, on_progress)
+        return self._post_file(file_path, on_progress)
+
+    def _post_file(self, file_path: str, on_progress=None):
         with open(file_path, "rb") as f:
-            filename = os.path.basename(file_path)
-            files = {"file": (filename, f, "text/csv")}
-            r = requests.post(f"{self.base_url}/datasets/", files=files, auth=self.auth, timeout=60)
-            r.raise_for_status()
-            return r.json()
-
-    def dataset_data(self, dataset_id: int, limit: int = 200, offset: int = 0):
-        r = requests.get(
-            f"{self.base_url}/datasets/{dataset_id}/data/",
-            params={"limit": limit, "offset": offset},
-            auth=self.auth,
-            timeout=30,
+            body, content_type = encode_multipart_formdata(
+                {"file": (os.path.basename(file_path), f.read(), "text/csv")}
+            )
+        r = self.session.post(
+            f"{self.base_url}/datasets/",
+            data=_ProgressReader(body, on_progress),
+            headers={"Content-Type": content_type},
+            timeout=60,
         )
         r.raise_for_status()
         return r.json()
 
-    def download_report(self, dataset_id: int):
-        r = requests.get(
-            f"{self.base_url}/datasets/{dataset_id}/report/",
-            auth=self.auth,
+    def upload_csv_resumable(self, file_path: str, chunk_size: int = UPLOAD_CHUNK_BYTES, retries: int = 5, on_progress=None):
+        """Upload in checksummed chunks, resuming from the server's offset after
+        a dropped connection. The server parses plain CSV chunks as they arrive,
+        so finalizing does not re-read the file; compressed ones at the end."""
+        size = os.path.getsize(file_path)
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+
+        r = self.session.post(
+            f"{self.base_url}/uploads/",
+            json={"filename": os.path.basename(file_path), "size": size, "sha256": digest.hexdigest()},
             timeout=60,
         )
         r.raise_for_status()
-        return r.content
+        session = r.json()
+        if session["status"] == "complete":
+            # The server already has these bytes; nothing to send.
+            return self.dataset(session["dataset_id"])
+
+        url = f"{self.base_url}/uploads/{session['id']}/"
+        offset = session["offset"]
+        failures = 0
+        with open(file_path, "rb") as f:
+            while offset < size:
+                f.seek(offset)
+                chunk = f.read(chunk_size)
+                headers = {
+                    "Content-Type": "application/octet-stream",
+                    "Upload-Offset": str(offset),
+                    "Upload-Checksum": "sha256 " + base64.b64encode(hashlib.sha256(chunk).digest()).decode(),
+                }
+                try:
+                    r = self.session.put(url, data=chunk, headers=headers, timeout=300)
+                    if r.status_code != 409:
+                        r.raise_for_status()
+                    offset = r.json()["offset"]
+                    failures = 0
+                except (requests.ConnectionError, requests.Timeout):
+                    failures += 1
+                    if failures > retries:
+                        raise
+                    time.sleep(min(2 ** failures, 30))
+                    try:
+                        offset = self.session.get(url, timeout=20).json()["offset"]
+                    except (requests.ConnectionError, requests.Timeout):
+                        pass
+                    continue
+                if on_progress is not None:
+                    on_progress(offset, size)
+
+        # A compressed file still needs a full parse; let the server queue it
+        # rather than hold the request open.
+        r = self.session.post(f"{url}finalize/", headers={"Prefer": "respond-async"}, timeout=300)
+        r.raise_for_status()
+        if r.status_code == 202:
+            return self._wait_for_job(r.json(), on_progress)
+        return r.json()
+
+    def _wait_for_job(self, job: dict, on_progress=None):
+        """Poll an ingestion job until it finishes; return its dataset."""
+        while job["status"] in ("queued", "running"):
+            time.sleep(self.JOB_POLL_SECONDS)
+            r = self.session.get(f"{self.base_url}/ingest-jobs/{job['id']}/", timeout=20)
+            r.raise_for_status()
+            job = r.json()
+            if on_progress is not None and job.get("bytes_total"):
+                on_progress(job.get("bytes_processed") or 0, job["bytes_total"])
+        if job["status"] != "succeeded":
+            raise RuntimeError(job.get("error") or "Ingestion failed")
+        return self.dataset(job["dataset_id"])
+
+    def dataset_data(self, dataset_id: int, limit: int = 200, offset: int = 0, cursor: str = None, **query):
+        params = {"limit": limit, "offset": offset, **query}
+        if cursor:
+            params["cursor"] = cursor
+        # Rows never change after upload, so a page cached for the dataset's
+        # current version is served without a round trip.
+        body = self._cached_get(
+            f"/datasets/{dataset_id}/data/",
+            params=params,
+            timeout=30,
+            dataset_id=dataset_id,
+            revalidate=False,
+        )
+        return json.loads(body)
+
+    def iter_dataset_rows(self, dataset_id: int, page_size: int = 2000, **query):
+        """Yield every row of a dataset, following the server's page cursors."""
+        cursor = None
+        while True:
+            page = self.dataset_data(dataset_id, limit=page_size, cursor=cursor, **query)
+            yield from page.get('rows') or []
+            cursor = page.get('next_cursor')
+            if not cursor:
+                return
+
+    def download_report(self, dataset_id: int, on_progress=None):
+        # The report layout can change on the server, so it is revalidated.
+        return self._cached_get(
+            f"/datasets/{dataset_id}/report/",
+            timeout=60,
+            dataset_id=dataset_id,
+            on_progress=on_progress,
+        )
 
     def delete_dataset(self, dataset_id: int):
-        r = requests.delete(
+        r = self.session.delete(
             f"{self.base_url}/datasets/{dataset_id}/",
-            auth=self.auth,
             timeout=20,
         )
         r.raise_for_status()
+        if self.cache is not None:
+            self.cache.drop_dataset(dataset_id)
         return True
 
 
+class RequestCancelled(Exception):
+    """Raised inside a worker whose request was cancelled or superseded."""
+
+
+class _TaskSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+    progress = pyqtSignal(object, object)
+
+
+class ApiTask(QRunnable):
+    """One ApiClient call run on the executor's pool.
+
+    ``fn`` receives a progress callback to pass to ApiClient methods; it
+    emits progress and raises RequestCancelled once the task is cancelled,
+    which aborts uploads and downloads between blocks.
+    """
+
+    def __init__(self, fn, signals: _TaskSignals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.signals = signals
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _progress(self, done, total):
+        if self.cancelled.is_set():
+            raise RequestCancelled()
+        self.signals.progress.emit(done, total)
+
+    def run(self):
+        if self.cancelled.is_set():
+            self.signals.failed.emit(RequestCancelled())
+            return
+        try:
+            result = self.fn(self._progress)
+        except Exception as exc:
+            self.signals.failed.emit(exc)
+        else:
+            self.signals.finished.emit(result)
+
+
+class RequestExecutor(QObject):
+    """Runs blocking ApiClient calls on a thread pool and delivers results,
+    errors and progress back on the GUI thread.
+
+    Tasks submitted under a ``key`` supersede the previous task with that
+    key: it is dropped if still queued, cancelled if running, and its result
+    is discarded, so rapid selection changes only render the last one.
+    """
+
+    def __init__(self, parent=None, max_threads: int = 4):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._tasks = set()
+        self._latest = {}
+
+    def submit(self, fn, on_done, on_error=None, on_progress=None, key=None) -> ApiTask:
+        # Signals are created here, on the GUI thread, so their handlers run
+        # there even though the task emits them from a worker thread.
+        task = ApiTask(fn, _TaskSignals())
+        if key is not None:
+            self.cancel(key)
+            self._latest[key] = task
+
+        def deliver(handler, *args):
+            if task.cancelled.is_set() or (key is not None and self._latest.get(key) is not task):
+                return
+            if handler is not None:
+                handler(*args)
+
+        def finish(handler, value):
+            self._tasks.discard(task)
+            deliver(handler, value)
+            if key is not None and self._latest.get(key) is task:
+                del self._latest[key]
+
+        task.signals.finished.connect(lambda result: finish(on_done, result))
+        task.signals.failed.connect(lambda exc: finish(on_error, exc))
+        if on_progress is not None:
+            task.signals.progress.connect(lambda done, total: deliver(on_progress, done, total))
+        self._tasks.add(task)
+        self.pool.start(task)
+        return task
+
+    def cancel(self, target):
+        """Cancel a task, or the latest task submitted under a key."""
+        task = target if isinstance(target, ApiTask) else self._latest.get(target)
+        if task is None:
+            return
+        task.cancel()
+        for key, latest in list(self._latest.items()):
+            if latest is task:
+                del self._latest[key]
+        if self.pool.tryTake(task):
+            self._tasks.discard(task)
+
+    def cancel_all(self):
+        for task in list(self._tasks):
+            self.cancel(task)
+
+    def shutdown(self, timeout_ms: int = 2000):
+        self.cancel_all()
+        self.pool.waitForDone(timeout_ms)
+
+
+class DatasetTableModel(QAbstractTableModel):
+    """Rows of one dataset, fetched a page at a time as the view asks for them.
+
+    Only a bounded LRU of pages is held, so scrolling a million-row dataset
+    never materialises it. Touching a page prefetches the next one in the
+    background; requests for pages scrolled past are dropped before they run.
+    """
+
+    PAGE_SIZE = 500
+    MAX_PAGES = 40
+    MAX_PENDING = 4
+    RETRY_AFTER = 5.0
+    PLACEHOLDER = "…"
+
+    error = pyqtSignal(object)
+
+    def __init__(self, executor, api, dataset_id: int, first_page: dict, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.api = api
+        self.dataset_id = dataset_id
+        self.columns = list(first_page.get('columns') or [])
+        self.total_rows = int(first_page.get('total_rows') or 0)
+        self._pages = OrderedDict()
+        self._pending = OrderedDict()
+        self._failed = {}
+        self._store(0, first_page.get('rows') or [])
+
+    # Qt model interface
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.total_rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        page_no, offset = divmod(index.row(), self.PAGE_SIZE)
+        page = self._page(page_no)
+        if page is None:
+            return self.PLACEHOLDER
+        return page[offset][index.column()] if offset < len(page) else ""
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section] if section < len(self.columns) else None
+        return str(section + 1)
+
+    # Paging
+
+    def _page(self, page_no: int):
+        page = self._pages.get(page_no)
+        if page is None:
+            self._fetch(page_no)
+            return None
+        self._pages.move_to_end(page_no)
+        self._fetch(page_no + 1)
+        return page
+
+    def _fetch(self, page_no: int):
+        if page_no * self.PAGE_SIZE >= self.total_rows:
+            return
+        if page_no in self._pages or page_no in self._pending:
+            return
+        if time.monotonic() - self._failed.get(page_no, -self.RETRY_AFTER) < self.RETRY_AFTER:
+            return
+        # The oldest request is for a page the user has scrolled past.
+        while len(self._pending) >= self.MAX_PENDING:
+            _, stale = self._pending.popitem(last=False)
+            self.executor.cancel(stale)
+
+        api, dataset_id, size = self.api, self.dataset_id, self.PAGE_SIZE
+        self._pending[page_no] = self.executor.submit(
+            lambda progress: api.dataset_data(dataset_id, limit=size, offset=page_no * size),
+            lambda data: self._loaded(page_no, data),
+            lambda exc: self._load_failed(page_no, exc),
+        )
+
+    def _store(self, page_no: int, rows):
+        self._pages[page_no] = [
+            tuple("" if row.get(col) is None else str(row.get(col)) for col in self.columns)
+            for row in rows
+        ]
+        while len(self._pages) > self.MAX_PAGES:
+            self._pages.popitem(last=False)
+
+    def _loaded(self, page_no: int, data: dict):
+        self._pending.pop(page_no, None)
+        self._failed.pop(page_no, None)
+        self._store(page_no, data.get('rows') or [])
+        first = page_no * self.PAGE_SIZE
+        last = min(first + self.PAGE_SIZE, self.total_rows) - 1
+        self.dataChanged.emit(self.index(first, 0), self.index(last, len(self.columns) - 1))
+
+    def _load_failed(self, page_no: int, exc):
+        self._pending.pop(page_no, None)
+        self._failed[page_no] = time.monotonic()
+        self.error.emit(exc)
+
+    def dispose(self):
+        """Cancel outstanding page requests; call before replacing the model."""
+        for task in self._pending.values():
+            self.executor.cancel(task)
+        self._pending.clear()
+
+
+def _nice_ceiling(value: float) -> float:
+    """The next 1/2/5 x 10^k at or above ``value``, plus a little headroom."""
+    if value <= 0:
+        return 1
+    value *= 1.05
+    scale = 10 ** math.floor(math.log10(value))
+    for step in (1, 2, 5, 10):
+        if step * scale >= value:
+            return step * scale
+
+
+class ChartPanel:
+    """The summary chart: the type distribution (top types plus "Other") or a
+    numeric column's histogram, on one axes that is built once.
+
+    Showing another dataset only moves and resizes the existing bars. They are
+    animated artists drawn over a rendered background of everything else, and
+    text dominates the cost of rendering that, so backgrounds are kept per
+    frame (title, categories or bin edges, y-limit): a frame seen recently is
+    restored and the bars blitted on top, and only a new one is redrawn.
+    """
+
+    TOP_N = 10
+    # Rendered backgrounds kept; each is a full canvas bitmap.
+    MAX_BACKGROUNDS = 8
+    MAX_LABEL = 14
+    COLOR = '#3b82f6'
+    TEXT = '#111827'
+
+    def __init__(self, figure: Figure, canvas: FigureCanvas):
+        self.figure = figure
+        self.canvas = canvas
+        figure.patch.set_facecolor('#ffffff')
+        # Fixed margins: tight_layout measures every label on each call.
+        figure.subplots_adjust(left=0.1, right=0.98, top=0.88, bottom=0.28)
+        self.ax = ax = figure.add_subplot(111)
+        ax.set_facecolor('#ffffff')
+        ax.set_ylabel("Count", color=self.TEXT)
+        ax.tick_params(axis='both', colors=self.TEXT)
+        ax.grid(axis='y', color='#9ca3af', alpha=0.35, linestyle='-')
+        ax.set_axisbelow(True)
+        for spine in ax.spines.values():
+            spine.set_color((17/255, 24/255, 39/255, 0.18))
+        self.title = ax.set_title("Type Distribution", color=self.TEXT)
+        self.bars = []
+        self._frame = None
+        self._backgrounds = OrderedDict()
+        self._size = None
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def show_distribution(self, dist: dict):
+        items = sorted(dist.items(), key=lambda item: item[1], reverse=True)
+        if len(items) > self.TOP_N + 1:
+            rest = items[self.TOP_N:]
+            items = items[:self.TOP_N] + [(f"Other ({len(rest)})", sum(count for _, count in rest))]
+        labels = [self._short(str(label)) for label, _ in items]
+        heights = [count for _, count in items]
+        lefts = [i - 0.4 for i in range(len(items))]
+        self._update("Type Distribution", lefts, [0.8] * len(items), heights, labels)
+
+    def show_histogram(self, column: str, histogram: dict):
+        edges = histogram.get('edges') or []
+        counts = histogram.get('counts') or []
+        lefts = edges[:-1]
+        widths = [right - left for left, right in zip(edges, edges[1:])]
+        if len(widths) == 1 and not widths[0]:
+            # Every value is the same; give the single bar a visible width.
+            half = max(abs(lefts[0]) * 0.05, 0.5)
+            lefts, widths = [lefts[0] - half], [2 * half]
+        self._update(f"{column.title()} Histogram", lefts, widths, counts, None)
+
+    def _update(self, title: str, lefts, widths, heights, labels):
+        n = len(heights)
+        ylim = _nice_ceiling(max(heights, default=0))
+        frame = (title, tuple(labels) if labels is not None else (tuple(lefts), tuple(widths)), ylim)
+
+        while len(self.bars) < n:
+            patch = Rectangle((0, 0), 0, 0, facecolor=self.COLOR, edgecolor='#ffffff', linewidth=0.5, animated=True)
+            self.ax.add_patch(patch)
+            self.bars.append(patch)
+        for i, patch in enumerate(self.bars):
+            if i < n:
+                patch.set_bounds(lefts[i], 0, widths[i], heights[i])
+            patch.set_visible(i < n)
+
+        if frame == self._frame and frame in self._backgrounds:
+            self._blit()
+            return
+
+        # The axes always follow the frame, so a later full draw (a resize)
+        # renders it even when a cached background is shown now.
+        self._frame = frame
+        self.title.set_text(title if n else f"{title} (no data)")
+        self.ax.set_ylim(0, ylim)
+        if labels is not None:
+            self.ax.set_xlim(-0.6, max(n, 1) - 0.4)
+            self.ax.set_xticks(range(n))
+            # Anchored at their end, so rotated labels sit under their bars.
+            self.ax.set_xticklabels(labels, ha='right', rotation_mode='anchor')
+            self.ax.tick_params(axis='x', labelrotation=30)
+        elif n:
+            self.ax.set_xlim(lefts[0], lefts[-1] + widths[-1])
+            self.ax.xaxis.set_major_locator(MaxNLocator(6))
+            self.ax.xaxis.set_major_formatter(ScalarFormatter())
+            self.ax.tick_params(axis='x', labelrotation=0)
+            # New ticks copy the first one's style; undo the category anchor.
+            for label in self.ax.get_xticklabels():
+                label.set(ha='center', rotation_mode='default')
+        if frame in self._backgrounds:
+            self._backgrounds.move_to_end(frame)
+            self._blit()
+        else:
+            self.canvas.draw_idle()
+
+    def _short(self, label: str) -> str:
+        return label if len(label) <= self.MAX_LABEL else label[:self.MAX_LABEL - 1] + "…"
+
+    def _on_draw(self, event):
+        # A full draw leaves the animated bars out: keep that as the frame's
+        # background, then paint the bars on top.
+        size = tuple(self.figure.bbox.size)
+        if size != self._size:
+            self._backgrounds.clear()
+            self._size = size
+        self._backgrounds[self._frame] = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._backgrounds.move_to_end(self._frame)
+        while len(self._backgrounds) > self.MAX_BACKGROUNDS:
+            self._backgrounds.popitem(last=False)
+        self._draw_bars()
+
+    def _draw_bars(self):
+        for patch in self.bars:
+            if patch.get_visible():
+                self.ax.draw_artist(patch)
+
+    def _blit(self):
+        self.canvas.restore_region(self._backgrounds[self._frame])
+        self._draw_bars()
+        self.canvas.blit(self.figure.bbox)
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -236,6 +1060,8 @@ class MainWindow(QMainWindow):
         self.api = None
         self.datasets = []
         self.selected = None
+        self.executor = RequestExecutor(self)
+        self.transfer = None
 
         root = QWidget()
         self.setCentralWidget(root)
@@ -261,15 +1087,26 @@ class MainWindow(QMainWindow):
         self.summary_group = self._build_summary_group()
         right.addWidget(self.summary_group)
 
+        self.chart_pick = QComboBox()
+        self.chart_pick.addItem("Type distribution", None)
+        self.chart_pick.currentIndexChanged.connect(self._draw_chart)
+        right.addWidget(self.chart_pick)
+
         self.figure = Figure(figsize=(5, 3))
         self.canvas = FigureCanvas(self.figure)
+        self.chart = ChartPanel(self.figure, self.canvas)
         right.addWidget(self.canvas, 2)
 
-        self.table = QTableWidget()
+        self.table = QTableView()
         right.addWidget(self.table, 3)
 
         self.table.setAlternatingRowColors(True)
         self.table.setShowGrid(False)
+        # Fixed row heights let the view lay out millions of rows without
+        # measuring them.
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(28)
+        self.table_model = None
 
         self._set_status("Enter credentials and click Connect")
 
@@ -307,6 +1144,10 @@ class MainWindow(QMainWindow):
         self.delete_btn.clicked.connect(self._delete_selected)
         self.delete_btn.setEnabled(False)
 
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self._cancel_transfer)
+        self.cancel_btn.setEnabled(False)
+
         grid.addWidget(QLabel("API Base URL"), 0, 0)
         grid.addWidget(self.base_url, 0, 1, 1, 3)
 
@@ -322,6 +1163,7 @@ class MainWindow(QMainWindow):
         buttons.addWidget(self.upload_btn)
         buttons.addWidget(self.pdf_btn)
         buttons.addWidget(self.delete_btn)
+        buttons.addWidget(self.cancel_btn)
         buttons.addStretch(1)
         grid.addLayout(buttons, 2, 0, 1, 4)
 
@@ -369,22 +1211,17 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Missing", "Please fill all fields")
             return
 
-        try:
-            ApiClient.register_user(self.base_url.text().strip(), u, p1, p2)
-        except requests.HTTPError as exc:
-            try:
-                detail = exc.response.json().get('detail')
-            except Exception:
-                detail = None
-            QMessageBox.critical(self, "Registration failed", detail or str(exc))
-            return
-        except Exception as exc:
-            QMessageBox.critical(self, "Registration failed", str(exc))
-            return
+        def created(_):
+            QMessageBox.information(self, "Success", "User created. You can now log in.")
+            self.username.setText(u)
+            self.password.setText(p1)
 
-        QMessageBox.information(self, "Success", "User created. You can now log in.")
-        self.username.setText(u)
-        self.password.setText(p1)
+        base_url = self.base_url.text().strip()
+        self.executor.submit(
+            lambda progress: ApiClient.register_user(base_url, u, p1, p2),
+            created,
+            lambda exc: self._show_error("Registration failed", exc),
+        )
 
     def _build_summary_group(self):
         box = QGroupBox("Summary")
@@ -413,6 +1250,56 @@ class MainWindow(QMainWindow):
     def _set_status(self, text: str):
         self.status.setText(text)
 
+    def _show_error(self, title: str, exc: Exception):
+        detail = None
+        if isinstance(exc, requests.HTTPError) and exc.response is not None:
+            try:
+                detail = exc.response.json().get('detail')
+            except Exception:
+                detail = None
+        QMessageBox.critical(self, title, detail or str(exc))
+
+    def _start_transfer(self, label: str, fn, on_done, error_title: str):
+        """Run a cancellable upload/download, showing its progress."""
+        def progress(done, total):
+            mb = done / (1024 * 1024)
+            if total:
+                self._set_status(f"{label}… {mb:.1f} / {total / (1024 * 1024):.1f} MB")
+            else:
+                self._set_status(f"{label}… {mb:.1f} MB")
+
+        def finished(result):
+            self._end_transfer()
+            on_done(result)
+
+        def failed(exc):
+            self._end_transfer()
+            self._show_error(error_title, exc)
+
+        self._set_status(f"{label}…")
+        self.transfer = self.executor.submit(fn, finished, failed, progress)
+        self.cancel_btn.setEnabled(True)
+        self.upload_btn.setEnabled(False)
+        self.pdf_btn.setEnabled(False)
+
+    def _end_transfer(self):
+        self.transfer = None
+        self.cancel_btn.setEnabled(False)
+        self.upload_btn.setEnabled(self.api is not None)
+        self.pdf_btn.setEnabled(self.selected is not None)
+
+    def _cancel_transfer(self):
+        if self.transfer is not None:
+            self.executor.cancel(self.transfer)
+            self._end_transfer()
+            self._set_status("Cancelled")
+
+    def closeEvent(self, event):
+        self.executor.shutdown()
+        if self.api is not None:
+            self.api.close()
+        super().closeEvent(event)
+
     def _connect(self):
         u = self.username.text().strip()
         p = self.password.text().strip()
@@ -420,37 +1307,72 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Missing", "Enter username and password")
             return
 
-        self.api = ApiClient(self.base_url.text().strip(), Auth(u, p))
+        base_url = self.base_url.text().strip()
         try:
-            h = self.api.health()
+            cache = LocalCache.for_account(base_url, u)
+        except (sqlite3.Error, OSError) as exc:
+            logger.warning("local cache unavailable: %s", exc)
+            cache = None
+        api = ApiClient(base_url, Auth(u, p), cache=cache)
+
+        def use(api):
+            if self.api is not None and self.api is not api:
+                self.api.close()
+            self.api = api
+            self.refresh_btn.setEnabled(True)
+            # Show what was cached last time while the fresh list loads.
+            cached = api.cached_datasets()
+            if cached is not None:
+                self._show_datasets(cached)
+            return cached
+
+        def connected(h):
+            use(api)
+            self.upload_btn.setEnabled(True)
             self._set_status(f"Connected. Health: {h.get('status', h)}")
-        except Exception as exc:
-            self.api = None
+            self._refresh()
+
+        def failed(exc):
+            # Without the server, datasets cached on an earlier run can still
+            # be browsed.
+            if isinstance(exc, (requests.ConnectionError, requests.Timeout)) and api.cached_datasets() is not None:
+                api.offline = True
+                use(api)
+                return
+            api.close()
+            self._set_status("Enter credentials and click Connect")
             QMessageBox.critical(self, "Error", f"Cannot reach backend: {exc}")
-            return
 
-        self.refresh_btn.setEnabled(True)
-        self.upload_btn.setEnabled(True)
-        self._refresh()
+        self._set_status("Connecting…")
+        self.executor.submit(lambda progress: api.health(), connected, failed, key='connect')
 
-    def _refresh(self):
+    def _refresh(self, select_first: bool = False):
         if not self.api:
             return
-        try:
-            self.datasets = self.api.list_datasets()
-        except Exception as exc:
-            QMessageBox.critical(self, "Error", str(exc))
-            return
+        self.executor.submit(
+            lambda progress: self.api.list_datasets(),
+            lambda datasets: self._show_datasets(datasets, select_first),
+            lambda exc: self._show_error("Error", exc),
+            key='datasets',
+        )
 
+    def _show_datasets(self, datasets, select_first: bool = False):
+        self.datasets = datasets
         self.list_widget.clear()
         for d in self.datasets:
             item = QListWidgetItem(f"#{d['id']} — {d['original_filename']} (rows: {d['row_count']})")
             item.setData(Qt.UserRole, d)
             self.list_widget.addItem(item)
 
-        self._set_status(f"Loaded {len(self.datasets)} dataset(s)")
+        if self.api is not None and self.api.offline:
+            self._set_status(f"Offline — showing {len(self.datasets)} cached dataset(s)")
+        else:
+            self._set_status(f"Loaded {len(self.datasets)} dataset(s)")
         self.pdf_btn.setEnabled(False)
         self.delete_btn.setEnabled(False)
+        # auto-select newest
+        if select_first and self.list_widget.count() > 0:
+            self.list_widget.setCurrentRow(0)
 
     def _upload(self):
         if not self.api:
@@ -458,15 +1380,13 @@ class MainWindow(QMainWindow):
         path, _ = QFileDialog.getOpenFileName(self, "Select CSV", "", "CSV Files (*.csv)")
         if not path:
             return
-        try:
-            created = self.api.upload_csv(path)
+
+        def uploaded(created):
             self._set_status(f"Uploaded dataset #{created['id']}")
-            self._refresh()
-            # auto-select newest
-            if self.list_widget.count() > 0:
-                self.list_widget.setCurrentRow(0)
-        except Exception as exc:
-            QMessageBox.critical(self, "Upload failed", str(exc))
+            self._refresh(select_first=True)
+
+        api = self.api
+        self._start_transfer("Uploading", lambda progress: api.upload_csv(path, progress), uploaded, "Upload failed")
 
     def _on_select_dataset(self):
         items = self.list_widget.selectedItems()
@@ -481,7 +1401,8 @@ class MainWindow(QMainWindow):
         self.press_lbl.setText(str(averages.get('pressure', '-')))
         self.temp_lbl.setText(str(averages.get('temperature', '-')))
 
-        self._draw_chart(summary.get('type_distribution') or {})
+        self._fill_chart_pick(summary.get('histograms') or {})
+        self._draw_chart()
         self._load_table(self.selected['id'])
         self.pdf_btn.setEnabled(True)
         self.delete_btn.setEnabled(True)
@@ -502,58 +1423,63 @@ class MainWindow(QMainWindow):
         if reply != QMessageBox.Yes:
             return
 
-        try:
-            self.api.delete_dataset(int(dataset_id))
+        def deleted(_):
             self._set_status(f"Deleted dataset #{dataset_id}")
             self.selected = None
             self._refresh()
-        except Exception as exc:
-            QMessageBox.critical(self, "Delete failed", str(exc))
-
-    def _draw_chart(self, dist: dict):
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        labels = list(dist.keys())
-        values = [dist[k] for k in labels]
-        self.figure.patch.set_facecolor('#ffffff')
-        ax.set_facecolor('#ffffff')
 
-        ax.bar(labels, values, color='#3b82f6')
-        ax.set_title("Type Distribution", color='#111827')
-        ax.set_ylabel("Count", color='#111827')
-        ax.tick_params(axis='y', colors='#111827')
-        ax.tick_params(axis='x', rotation=30)
-        ax.tick_params(axis='x', colors='#111827')
-        ax.grid(axis='y', color='#9ca3af', alpha=0.35, linestyle='-')
+        api = self.api
+        self.executor.submit(
+            lambda progress: api.delete_dataset(int(dataset_id)),
+            deleted,
+            lambda exc: self._show_error("Delete failed", exc),
+        )
 
-        for spine in ax.spines.values():
-            spine.set_color((17/255, 24/255, 39/255, 0.18))
-        self.figure.tight_layout()
-        self.canvas.draw()
+    def _fill_chart_pick(self, histograms: dict):
+        """Offer the histograms this dataset has, keeping the current choice."""
+        current = self.chart_pick.currentData()
+        self.chart_pick.blockSignals(True)
+        while self.chart_pick.count() > 1:
+            self.chart_pick.removeItem(1)
+        for column in histograms:
+            self.chart_pick.addItem(f"{column.title()} histogram", column)
+        index = self.chart_pick.findData(current) if current is not None else 0
+        self.chart_pick.setCurrentIndex(max(index, 0))
+        self.chart_pick.blockSignals(False)
+
+    def _draw_chart(self):
+        if not self.selected:
+            return
+        summary = self.selected.get('summary') or {}
+        column = self.chart_pick.currentData()
+        histogram = (summary.get('histograms') or {}).get(column) if column else None
+        if histogram is not None:
+            self.chart.show_histogram(column, histogram)
+        else:
+            self.chart.show_distribution(summary.get('type_distribution') or {})
 
     def _load_table(self, dataset_id: int):
         if not self.api:
             return
-        try:
-            data = self.api.dataset_data(dataset_id, limit=200, offset=0)
-        except Exception as exc:
-            QMessageBox.critical(self, "Error", str(exc))
-            return
-
-        columns = data.get('columns') or []
-        rows = data.get('rows') or []
-
-        self.table.clear()
-        self.table.setColumnCount(len(columns))
-        self.table.setRowCount(len(rows))
-        self.table.setHorizontalHeaderLabels(columns)
-
-        for r_idx, row in enumerate(rows):
-            for c_idx, col in enumerate(columns):
-                value = row.get(col)
-                item = QTableWidgetItem("" if value is None else str(value))
-                self.table.setItem(r_idx, c_idx, item)
+        api = self.api
+        # Keyed, so switching datasets quickly only renders the last choice.
+        self.executor.submit(
+            lambda progress: api.dataset_data(dataset_id, limit=DatasetTableModel.PAGE_SIZE, offset=0),
+            lambda data: self._show_table(api, dataset_id, data),
+            lambda exc: self._show_error("Error", exc),
+            key='table',
+        )
 
+    def _show_table(self, api, dataset_id: int, first_page: dict):
+        if self.table_model is not None:
+            self.table_model.dispose()
+            self.table_model.deleteLater()
+        model = DatasetTableModel(self.executor, api, dataset_id, first_page, self)
+        model.error.connect(lambda exc: self._set_status(f"Could not load rows: {exc}"))
+        self.table.setModel(model)
+        self.table_model = model
+        # Size columns from the rows already loaded, not the whole dataset.
+        self.table.horizontalHeader().setResizeContentsPrecision(DatasetTableModel.PAGE_SIZE)
         self.table.resizeColumnsToContents()
 
     def _save_pdf(self):
@@ -568,16 +1494,28 @@ class MainWindow(QMainWindow):
         )
         if not out_path:
             return
-        try:
-            content = self.api.download_report(dataset_id)
-            with open(out_path, "wb") as f:
-                f.write(content)
+
+        def downloaded(content):
+            try:
+                with open(out_path, "wb") as f:
+                    f.write(content)
+            except OSError as exc:
+                QMessageBox.critical(self, "Error", str(exc))
+                return
             self._set_status(f"Saved report to {out_path}")
-        except Exception as exc:
-            QMessageBox.critical(self, "Error", str(exc))
+
+        api = self.api
+        self._start_transfer(
+            "Downloading report",
+            lambda progress: api.download_report(dataset_id, progress),
+            downloaded,
+            "Error",
+        )
 
 
 def main():
+    # Request timings from ApiClient go to stderr.
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
     app = QApplication(sys.argv)
     win = MainWindow()
     win.show()
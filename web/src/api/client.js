@@ -41,9 +41,10 @@ export function createApi({ baseURL, username, password }) {
       return res.data
     },
 
-    async getDatasetData(datasetId, { limit = 200, offset = 0 } = {}) {
+    async getDatasetData(datasetId, { limit = 200, offset = 0, ...query } = {}) {
+      // `query` is passed through: columns, sort and filters such as pressure__gte.
       const res = await client.get(`/datasets/${datasetId}/data/`, {
-        params: { limit, offset },
+        params: { limit, offset, ...query },
       })
       return res.data
     },
@@ -214,7 +214,7 @@ export function Dashboard({ api, apiBaseUrl, username, onLogout }) {
               Refresh
             </button>
           </div>
-          <div className="hint small">Only the latest 5 uploads are stored.</div>
+          <div className="hint small">Showing the latest 5 uploads.</div>
         </div>
 
         <div className="sidebarSection">